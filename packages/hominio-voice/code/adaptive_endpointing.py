@@ -0,0 +1,166 @@
+# adaptive_endpointing.py
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _quantile(values: list, q: float) -> float:
+    """Linear-interpolated quantile of a non-empty list."""
+    ordered = sorted(values)
+    pos = q * (len(ordered) - 1)
+    low = math.floor(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class SpeakerPauseModel:
+    """
+    Online model of one speaker's pause behaviour, used to scale the silence
+    duration TurnDetection suggests before a turn is considered finished.
+
+    Fed by the recorder's silence events:
+    - silence that ends with the speaker continuing is an intra-turn pause,
+    - silence that ends the recording is a turn end; if the speaker starts
+      again within `false_cut_window_s`, the turn was cut too early (a false
+      cut, and its full gap is recorded as an intra-turn pause),
+    - otherwise the gap until the next recording is an inter-turn pause.
+
+    The endpoint scale is the `1 - target_false_cut_rate` quantile of the
+    intra-turn pauses relative to `reference_pause_s` (the same quantile for
+    a typical speaker, which the fixed pause constants are tuned for), shrunk
+    toward 1.0 while few pauses are known. A feedback term additionally nudges
+    the scale up when the observed false-cut rate exceeds the target and down
+    when it stays below it.
+    """
+
+    def __init__(
+            self,
+            target_false_cut_rate: float = 0.05,
+            reference_pause_s: float = 1.0,
+            false_cut_window_s: float = 1.5,
+            min_scale: float = 0.5,
+            max_scale: float = 1.6,
+            prior_samples: int = 10,
+            feedback_gain: float = 0.1,
+            history: int = 200,
+        ) -> None:
+        """
+        Initializes the pause model.
+
+        Args:
+            target_false_cut_rate: Desired fraction of turn ends that were premature.
+            reference_pause_s: Intra-turn pause quantile of a typical speaker.
+            false_cut_window_s: Speech resuming this soon after a turn end counts as a false cut.
+            min_scale: Lower bound of the endpoint scale.
+            max_scale: Upper bound of the endpoint scale.
+            prior_samples: Pseudo-count pulling the learned scale toward 1.0.
+            feedback_gain: Step size of the false-cut rate feedback.
+            history: Number of recent pauses and turn ends kept.
+        """
+        self.target_false_cut_rate = target_false_cut_rate
+        self.reference_pause_s = reference_pause_s
+        self.false_cut_window_s = false_cut_window_s
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.prior_samples = prior_samples
+        self.feedback_gain = feedback_gain
+        self.history = history
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets everything learned about the speaker (new session)."""
+        with self._lock:
+            self.intra_pauses: Deque[float] = deque(maxlen=self.history)
+            self.inter_pauses: Deque[float] = deque(maxlen=self.history)
+            self.turn_outcomes: Deque[bool] = deque(maxlen=50) # True = false cut
+            self.feedback_bias: float = 1.0
+            self._silence_start: Optional[float] = None
+            self._turn_end: Optional[Dict[str, float]] = None
+
+    # --- Recorder events ---
+
+    def on_silence_start(self, timestamp: Optional[float] = None) -> None:
+        """The speaker stopped talking (silence onset)."""
+        with self._lock:
+            self._silence_start = timestamp or time.time()
+
+    def on_speech_resume(self, timestamp: Optional[float] = None) -> None:
+        """Speech resumed inside the same recording: an intra-turn pause."""
+        now = timestamp or time.time()
+        with self._lock:
+            if self._silence_start is not None:
+                self.intra_pauses.append(now - self._silence_start)
+                self._silence_start = None
+
+    def on_turn_end(self, timestamp: Optional[float] = None) -> None:
+        """The silence lasted long enough to end the recording."""
+        now = timestamp or time.time()
+        with self._lock:
+            self._turn_end = {"silence_start": self._silence_start or now, "cut": now}
+            self._silence_start = None
+
+    def on_speech_start(self, timestamp: Optional[float] = None) -> None:
+        """A new recording started; classifies the preceding turn end."""
+        now = timestamp or time.time()
+        with self._lock:
+            if self._turn_end is None:
+                return
+            gap = now - self._turn_end["silence_start"]
+            false_cut = now - self._turn_end["cut"] <= self.false_cut_window_s
+            self._turn_end = None
+
+            if false_cut:
+                # The speaker was only pausing, the pause outlasted the threshold
+                self.intra_pauses.append(gap)
+            else:
+                self.inter_pauses.append(gap)
+            self.turn_outcomes.append(false_cut)
+
+            # Multiplicative feedback toward the target false-cut rate
+            error = (1.0 if false_cut else 0.0) - self.target_false_cut_rate
+            self.feedback_bias *= math.exp(self.feedback_gain * error)
+            self.feedback_bias = min(max(self.feedback_bias, self.min_scale), self.max_scale)
+
+        if false_cut:
+            logger.info(f"🎤✂️ False cut detected (speech resumed {gap:.2f}s after silence onset)")
+
+    # --- Endpoint adjustment ---
+
+    def endpoint_scale(self) -> float:
+        """Returns the factor applied to suggested silence durations."""
+        with self._lock:
+            n = len(self.intra_pauses)
+            learned = 1.0
+            if n:
+                threshold = _quantile(list(self.intra_pauses), 1.0 - self.target_false_cut_rate)
+                weight = n / (n + self.prior_samples)
+                learned = 1.0 + weight * (threshold / self.reference_pause_s - 1.0)
+            scale = learned * self.feedback_bias
+        return min(max(scale, self.min_scale), self.max_scale)
+
+    def adjust(self, pause_s: float) -> float:
+        """Scales a suggested silence duration to this speaker."""
+        return pause_s * self.endpoint_scale()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns pause distribution summaries, false-cut rate and current scale."""
+        scale = self.endpoint_scale()
+        with self._lock:
+            intra, inter = list(self.intra_pauses), list(self.inter_pauses)
+            outcomes = list(self.turn_outcomes)
+            return {
+                "endpoint_scale": scale,
+                "feedback_bias": self.feedback_bias,
+                "intra_pauses": len(intra),
+                "intra_median_s": _quantile(intra, 0.5) if intra else None,
+                "inter_pauses": len(inter),
+                "inter_median_s": _quantile(inter, 0.5) if inter else None,
+                "false_cut_rate": sum(outcomes) / len(outcomes) if outcomes else None,
+            }
@@ -0,0 +1,394 @@
+# async_speech_pipeline.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional
+
+from speech_pipeline_manager import (
+    GenerationState,
+    PipelineRequest,
+    RunningGeneration,
+    SpeechPipelineManager,
+)
+from thread_manager import create_managed_thread
+
+logger = logging.getLogger(__name__)
+
+# Shared, bounded pools for the blocking calls of all async pipelines in the process
+PIPELINE_LLM_THREADS = int(os.getenv("PIPELINE_LLM_THREADS", 32))
+PIPELINE_TTS_THREADS = int(os.getenv("PIPELINE_TTS_THREADS", 16))
+# Interval at which a TTS stage still waiting for the previous synthesis call (of an aborted generation) logs a warning
+TTS_HANDOFF_WARN_INTERVAL = float(os.getenv("TTS_HANDOFF_WARN_INTERVAL", 1.0))
+
+_END_OF_STREAM = object()
+
+
+class PipelineRuntime:
+    """
+    Process-wide runtime shared by every `AsyncSpeechPipelineManager`.
+
+    One event loop thread drives all sessions' generations as asyncio tasks.
+    Blocking work is delegated to two bounded thread pools: one pulls LLM
+    stream chunks, the other runs TTS synthesis calls. Thread count therefore
+    no longer grows with the number of sessions.
+    """
+
+    def __init__(self, llm_threads: int = PIPELINE_LLM_THREADS, tts_threads: int = PIPELINE_TTS_THREADS) -> None:
+        """
+        Starts the event loop thread and creates the executors.
+
+        Args:
+            llm_threads: Maximum concurrent blocking LLM reads.
+            tts_threads: Maximum concurrent TTS synthesis calls.
+        """
+        self.llm_executor = ThreadPoolExecutor(max_workers=llm_threads, thread_name_prefix="PipelineLLM")
+        self.tts_executor = ThreadPoolExecutor(max_workers=tts_threads, thread_name_prefix="PipelineTTS")
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self.loop_thread = create_managed_thread(
+            target=self._run_loop,
+            name="SpeechPipelineLoop",
+            daemon=True,
+        )
+        self._ready.wait()
+        logger.info(f"🗣️⚡ Async pipeline runtime started (LLM threads: {llm_threads}, TTS threads: {tts_threads})")
+
+    def _run_loop(self) -> None:
+        """Thread target running the shared event loop."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+
+    def in_loop_thread(self) -> bool:
+        """Returns True if called from the runtime's event loop thread."""
+        return threading.current_thread() is self.loop_thread.thread
+
+    def shutdown(self) -> None:
+        """Stops the event loop and the executors."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.llm_executor.shutdown(wait=False, cancel_futures=True)
+        self.tts_executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("🗣️⚡ Async pipeline runtime shut down")
+
+
+# Global runtime, created on first use
+_global_pipeline_runtime: Optional[PipelineRuntime] = None
+_global_runtime_lock = threading.Lock()
+
+def get_pipeline_runtime() -> PipelineRuntime:
+    """Get the global async pipeline runtime (starts it on first call)."""
+    global _global_pipeline_runtime
+    with _global_runtime_lock:
+        if _global_pipeline_runtime is None:
+            _global_pipeline_runtime = PipelineRuntime()
+        return _global_pipeline_runtime
+
+def shutdown_pipeline_runtime() -> None:
+    """Shut down the global async pipeline runtime if it was started."""
+    global _global_pipeline_runtime
+    with _global_runtime_lock:
+        if _global_pipeline_runtime is not None:
+            _global_pipeline_runtime.shutdown()
+            _global_pipeline_runtime = None
+
+
+class AsyncSpeechPipelineManager(SpeechPipelineManager):
+    """
+    SpeechPipelineManager variant built on asyncio tasks instead of per-session threads.
+
+    Each generation is a single coroutine on the shared `PipelineRuntime`
+    loop, walking the same `GenerationState` stages as the threaded manager
+    (llm → quick_tts → final_tts → done). LLM chunks are pulled and TTS is
+    synthesized in the runtime's bounded executors. The public interface and
+    the `RunningGeneration` objects seen by the server are unchanged.
+
+    A new request never waits for the generation it supersedes: the old one
+    is signalled to stop and winds down on its own (its LLM read and TTS call
+    finish in the executors), while the new generation starts its LLM request
+    at once. Only the shared TTS stream is handed over in order, the new
+    generation's first synthesis call waits for the previous call to return.
+    """
+
+    def _start_workers(self):
+        """Attaches to the shared runtime instead of starting worker threads."""
+        self.runtime = get_pipeline_runtime()
+        self._latest_request: Optional[PipelineRequest] = None
+        self._request_task: Optional[asyncio.Task] = None
+        self._tts_future: Optional[asyncio.Future] = None # Latest synthesis call on the shared stream
+
+    def _stop_workers(self):
+        """Nothing to stop, the runtime is shared across sessions."""
+
+    # --- Requests ---
+
+    def _queue_request(self, request: PipelineRequest):
+        """
+        Hands a request to the event loop.
+
+        Only the newest pending request is processed, like the threaded
+        request queue.
+        """
+        self.runtime.loop.call_soon_threadsafe(self._enqueue_request, request)
+
+    def _enqueue_request(self, request: PipelineRequest) -> None:
+        """Stores the newest request and starts the request task if idle (loop thread)."""
+        self._latest_request = request
+        if self._request_task is None or self._request_task.done():
+            self._request_task = self.runtime.loop.create_task(self._process_requests())
+
+    async def _process_requests(self) -> None:
+        """Processes the newest pending request until none is left."""
+        while self._latest_request is not None and not self.shutdown_event.is_set():
+            request, self._latest_request = self._latest_request, None
+
+            # Simple timestamp-based deduplication for identical consecutive requests
+            if (self.previous_request and self.previous_request.data == request.data
+                    and request.timestamp - self.previous_request.timestamp < 2):
+                logger.info(f"🗣️🗑️ Skipping duplicate request - {request.action}")
+                continue
+
+            if request.action not in ("prepare", "promote"):
+                logger.info(f"🗣️🤷 '{request.action}' request received (currently no-op).")
+                self.previous_request = request
+                continue
+
+            try:
+                await self._start_generation(request.data)
+            except Exception as e:
+                logger.exception(f"🗣️💥 Error starting generation: {e}")
+            if request.action == "promote":
+                self.speculation.discard_all() # Turn is over, other hypotheses are stale
+            self.previous_request = request
+
+    async def _start_generation(self, txt: str) -> None:
+        """Aborts a different running generation without waiting for it, then starts a new one."""
+        previous = self.running_generation
+        if previous is not None and not previous.abortion_started:
+            similarity = self.text_similarity.calculate_similarity(previous.text or "", txt)
+            if similarity >= 0.95:
+                logger.debug(f"🗣️🛑🙅 Gen {previous.id} Text too similar ({similarity:.2f}). Ignoring.")
+                return
+            # Superseded by a newer hypothesis: the user's final text may still match it
+            previous.park_branch = True
+            self._begin_abort(previous, f"new request (gen {self.generation_counter + 1})")
+
+        self.generation_counter += 1
+        gen = RunningGeneration(id=self.generation_counter, condition=self.generation_condition,
+                                timeline_stats=self.timeline_stats)
+        gen.text = txt
+        gen.stop_event = threading.Event()
+        gen.task_finished = threading.Event()
+        history = self.history.messages()
+        # Switch first: from here on, deltas and audio of the previous generation are stale
+        self.running_generation = gen
+        aborted_at = previous.state_times.get(GenerationState.ABORTED) if previous is not None else None
+        if aborted_at is not None:
+            logger.debug(f"🗣️🔀 [Gen {gen.id}] Took over from Gen {previous.id} {(time.time() - aborted_at) * 1000:.1f}ms after its abort")
+        if self._serve_cached_response(gen, txt, history):
+            gen.task_finished.set()
+            return
+        try:
+            # Reuses a parked branch if an earlier hypothesis matches txt
+            gen.branch = self.speculation.acquire(txt, history)
+            gen.llm_generator = gen.branch.reader()
+        except Exception as e:
+            logger.exception(f"🗣️🧠💥 [Gen {gen.id}] Failed to create LLM generator: {e}")
+            self.running_generation = None
+            return
+        gen.task = self.runtime.loop.create_task(self._run_generation(gen))
+
+    async def _synthesize(self, gen: RunningGeneration, func, *args) -> bool:
+        """
+        Runs a synthesis call on the shared TTS stream in the TTS executor.
+
+        Calls never overlap: the stream and the look-ahead lanes are shared,
+        so this waits for the previous call to return, which may belong to an
+        aborted generation still winding down. The generation's LLM keeps
+        streaming meanwhile.
+
+        Returns:
+            The synthesis result, False if `gen` was aborted while waiting.
+        """
+        waited = time.time()
+        # Re-read after every wait: another stage may have taken the stream in the meantime
+        while (previous := self._tts_future) is not None and not previous.done():
+            done, _ = await asyncio.wait({previous}, timeout=TTS_HANDOFF_WARN_INTERVAL)
+            if gen.abortion_started:
+                return False
+            if done:
+                logger.debug(f"🗣️👄🔀 [Gen {gen.id}] TTS stream handed over after {(time.time() - waited) * 1000:.1f}ms")
+            else:
+                logger.warning(f"🗣️👄⏱️ [Gen {gen.id}] Previous synthesis still running after {time.time() - waited:.1f}s, waiting.")
+        if gen.abortion_started:
+            return False
+        future = asyncio.get_running_loop().run_in_executor(self.runtime.tts_executor, func, *args)
+        self._tts_future = future
+        # Shielded: cancelling this task must not mark the call done while its thread still runs
+        return await asyncio.shield(future)
+
+    # --- Generation coroutine ---
+
+    async def _run_generation(self, gen: RunningGeneration) -> None:
+        """Runs one generation through llm → quick_tts → final_tts → done."""
+        loop = asyncio.get_running_loop()
+        try:
+            if not await self._run_llm_stage(gen, loop):
+                return
+
+            # --- Quick TTS ---
+            gen.tts_quick_started = True
+            gen.transition(GenerationState.QUICK_TTS)
+            completed = await self._synthesize(gen, self.audio.synthesize, gen.quick_answer, gen.audio_chunks, gen.stop_event)
+            gen.audio_quick_aborted = not completed or gen.abortion_started
+            gen.audio_quick_finished = True
+            if gen.audio_quick_aborted:
+                logger.info(f"🗣️👄❌ [Gen {gen.id}] Quick TTS Marked as Aborted/Incomplete.")
+                gen.transition(GenerationState.ABORTED, reason="quick tts stopped or failed")
+                return
+            gen.tts_quick_finished_event.set()
+
+            # --- Final TTS ---
+            gen.tts_final_started = True
+            gen.timeline.mark("final_tts_start")
+            gen.transition(GenerationState.FINAL_TTS)
+            completed = await self._synthesize(
+                gen, self.audio.synthesize_generator, self._final_text_generator(gen), gen.audio_chunks, gen.stop_event
+            )
+            gen.audio_final_aborted = not completed or gen.audio_final_aborted or gen.abortion_started
+            if gen.audio_final_aborted:
+                logger.info(f"🗣️👄❌ [Gen {gen.id}] Final TTS Marked as Aborted/Incomplete.")
+            else:
+                logger.info(f"🗣️👄✅ [Gen {gen.id}] Final TTS Finished Successfully.")
+                gen.tts_final_finished_event.set()
+            gen.audio_final_finished = True
+            gen.transition(GenerationState.ABORTED if gen.audio_final_aborted else GenerationState.DONE,
+                           reason="final tts stopped or failed")
+            self._store_cached_response(gen)
+        except asyncio.CancelledError:
+            gen.transition(GenerationState.ABORTED, reason="task cancelled")
+        except Exception as e:
+            logger.exception(f"🗣️💥 [Gen {gen.id}] Generation failed: {e}")
+            gen.transition(GenerationState.ABORTED, reason="generation failed")
+        finally:
+            gen.llm_finished = True
+            gen.llm_finished_event.set()
+            gen.task_finished.set()
+
+    async def _run_llm_stage(self, gen: RunningGeneration, loop: asyncio.AbstractEventLoop) -> bool:
+        """
+        Streams LLM chunks until the quick answer boundary is found.
+
+        Returns:
+            True if a quick answer is ready for synthesis, False if aborted.
+        """
+        gen.transition(GenerationState.LLM)
+        gen.llm_iterator = iter(gen.llm_generator)
+        start_time = time.time()
+        token_count = 0
+
+        while not gen.abortion_started:
+            chunk = await loop.run_in_executor(self.runtime.llm_executor, next, gen.llm_iterator, _END_OF_STREAM)
+            if chunk is _END_OF_STREAM or gen.abortion_started:
+                break
+
+            token_count += 1
+            if token_count == 1:
+                gen.timeline.mark("llm_first_token")
+                logger.info(f"🗣️🧠⏱️ [Gen {gen.id}] TTFT: {(time.time() - start_time):.4f}s")
+            gen.quick_answer += self.preprocess_chunk(chunk)
+            if self.no_think:
+                gen.quick_answer = self.clean_quick_answer(gen.quick_answer)
+
+            context, overhang = self.text_context.get_context(gen.quick_answer)
+            if context:
+                gen.quick_answer = context
+                gen.quick_answer_overhang = overhang
+                break
+
+        if gen.abortion_started:
+            gen.llm_aborted = True
+            gen.transition(GenerationState.ABORTED, reason="llm stream stopped")
+            return False
+
+        # Either a boundary was found (the text up to it is the quick answer, the rest is
+        # the overhang) or the stream ended without one (the whole, short response is)
+        gen.quick_answer_provided = True
+        gen.timeline.mark("quick_boundary")
+        self._notify_partial(gen, gen.quick_answer)
+        return bool(gen.quick_answer)
+
+    def _final_text_generator(self, gen: RunningGeneration) -> Iterator[str]:
+        """Yields the overhang and the remaining LLM chunks (runs in the TTS thread)."""
+        if gen.quick_answer_overhang:
+            overhang = self.preprocess_chunk(gen.quick_answer_overhang)
+            gen.final_answer += overhang
+            self._notify_partial(gen, gen.quick_answer + gen.final_answer)
+            yield overhang
+
+        try:
+            for chunk in gen.llm_iterator:
+                if gen.stop_event.is_set():
+                    gen.audio_final_aborted = True
+                    break
+                chunk = self.preprocess_chunk(chunk)
+                gen.final_answer += chunk
+                self._notify_partial(gen, gen.quick_answer + gen.final_answer)
+                yield chunk
+        except Exception as e:
+            logger.exception(f"🗣️👄💥 [Gen {gen.id}] Error iterating LLM generator: {e}")
+            gen.audio_final_aborted = True
+
+    # --- Abort ---
+
+    def _begin_abort(self, gen: RunningGeneration, reason: str) -> bool:
+        """
+        Signals a generation to stop without waiting (safe from any thread).
+
+        Returns:
+            True if this call started the abort, False if it was already aborting.
+        """
+        with self.abort_lock:
+            if gen.abortion_started:
+                return False
+            gen.abortion_started = True
+        logger.info(f"🗣️🛑🚀 [Gen {gen.id}] Aborting ({reason})")
+        gen.transition(GenerationState.ABORTED, reason=reason)
+        gen.stop_event.set()
+        self.audio.interrupt()
+        if gen.branch is not None:
+            self.speculation.release(gen.branch, park=gen.park_branch)
+        return True
+
+    def abort_generation(self, wait_for_completion: bool = False, timeout: float = 7.0, reason: str = ""):
+        """
+        Aborts the current speech generation.
+
+        Args:
+            wait_for_completion: If True, blocks until the generation's task has finished.
+            timeout: Maximum time in seconds to wait if `wait_for_completion` is True.
+            reason: A string describing why the abort was requested (for logging).
+        """
+        gen = self.running_generation
+        if gen is None:
+            self.abort_completed_event.set()
+            return
+
+        self.abort_completed_event.clear()
+        self._begin_abort(gen, reason)
+        if wait_for_completion and not self.runtime.in_loop_thread():
+            if not gen.task_finished.wait(timeout=timeout):
+                logger.warning(f"🗣️🛑⏱️ [Gen {gen.id}] Timeout waiting for abort completion.")
+        if self.running_generation is gen:
+            self.running_generation = None
+        self.abort_completed_event.set()
+
+    def get_runtime_stats(self) -> Dict[str, Any]:
+        """Returns the process thread count and executor sizes."""
+        return {
+            "threads": threading.active_count(),
+            "llm_threads": self.runtime.llm_executor._max_workers,
+            "tts_threads": self.runtime.tts_executor._max_workers,
+        }
@@ -1,17 +1,23 @@
 import asyncio
 import logging
+import os
 import threading
 from typing import Optional, Callable, Dict, Any
 import numpy as np
 from scipy.signal import resample_poly
 from transcribe import TranscriptionProcessor
 from speech_pipeline_manager import SpeechPipelineManager
+from async_speech_pipeline import AsyncSpeechPipelineManager
+from prosody import ProsodyTracker
 
 # Import memory management for async queues
 from memory_manager import get_resource_tracker
 
 logger = logging.getLogger(__name__)
 
+# "threaded" (four worker threads per session) or "async" (shared event loop and executors)
+SPEECH_PIPELINE = os.getenv("SPEECH_PIPELINE", "threaded").lower()
+
 
 class AudioInputProcessor:
     """
@@ -43,7 +49,8 @@ class AudioInputProcessor:
         self.last_partial_text: Optional[str] = None
         
         # Create per-user SpeechPipelineManager instance to prevent user interference
-        self.speech_pipeline_manager = SpeechPipelineManager(
+        pipeline_cls = AsyncSpeechPipelineManager if SPEECH_PIPELINE == "async" else SpeechPipelineManager
+        self.speech_pipeline_manager = pipeline_cls(
             tts_engine="kokoro",
             llm_provider="openai", 
             llm_model="phala/llama-3.3-70b-instruct",
@@ -56,6 +63,11 @@ class AudioInputProcessor:
             silence_active_callback=self._silence_active_callback,
             pipeline_latency=pipeline_latency,
         )
+        # Acoustic turn-end cues, combined with the text signals in TurnDetection
+        self.prosody = ProsodyTracker()
+        if hasattr(self.transcriber, 'turn_detection'):
+            self.transcriber.turn_detection.prosody_source = self.prosody.turn_end_score
+
         # Flag to indicate if the transcription loop has failed fatally
         self._transcription_failed = False
         self.transcription_task = None  # Will be created when needed
@@ -239,6 +251,9 @@ class AudioInputProcessor:
                     # Timeout occurred, check loop conditions again
                     continue
 
+                # Let the STT governor see how far this session lags behind
+                self.transcriber.report_queue_depth(audio_queue.qsize())
+
                 # Check for termination signal
                 if chunk_data is None:
                     logger.debug("👂🛑 Received termination signal (None). Stopping audio processing.")
@@ -255,6 +270,7 @@ class AudioInputProcessor:
                     try:
                         processed_audio = self.process_audio_chunk(pcm_data)
                         self.transcriber.feed_audio(processed_audio.tobytes(), {})
+                        self.prosody.process(processed_audio)
                     except Exception as e:
                         logger.error(f"👂💥 Error processing audio chunk: {e}", exc_info=True)
                         # Continue processing despite error
@@ -303,6 +319,7 @@ class AudioInputProcessor:
             # Reset flags and counters
             self.interrupted = False
             self.dropped_chunks = 0
+            self.prosody.reset()
             self._task_started = False
             self._transcription_failed = False
             
@@ -16,6 +16,11 @@ from enum import Enum
 from queue import Queue
 
 from audio_in import AudioInputProcessor
+from completion_cache import get_completion_cache
+from response_cache import get_response_cache
+from kokoro_voices import get_voice_bank
+from phoneme_cache import get_phoneme_cache
+from tts_cache import get_tts_cache
 from memory_manager import get_resource_tracker
 from thread_manager import create_managed_thread
 
@@ -339,6 +344,13 @@ class AudioInputProcessorPool:
                     self.stats['queue_wait_times'].pop(0)
                     self.stats['queue_wait_times'].append(session_duration)
             
+            # Generation latency stats are per session
+            manager = getattr(pool_instance.instance, 'speech_pipeline_manager', None)
+            if manager is not None:
+                manager.timeline_stats.reset()
+                manager.audio.reset_network_rtt() # The next session's client has its own network path
+                manager.audio.reset_playout()
+
             # Reset instance state
             pool_instance.state = InstanceState.AVAILABLE
             pool_instance.session_id = None
@@ -407,8 +419,36 @@ class AudioInputProcessorPool:
                 'statistics': self.stats.copy(),
                 'max_capacity': self.max_size,
                 'utilization_percent': (self.stats['current_allocated'] / len(self.instances)) * 100 if self.instances else 0,
+                'completion_cache': get_completion_cache().get_stats(),
+                'response_cache': get_response_cache().get_stats(),
+                'tts_cache': get_tts_cache().get_stats(),
+                'kokoro_voices': get_voice_bank().get_stats(),
+                'phoneme_cache': get_phoneme_cache().get_stats(),
             }
             return status
+
+    def get_session_timelines(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the generation latency histograms and end-of-turn statistics of a session's pipeline.
+
+        Args:
+            session_id: The session ID the instance is allocated to
+
+        Returns:
+            Per-stage histograms, outcomes, recent timelines and 'endpointing'
+            statistics, or None if the session has no instance
+        """
+        with self.lock:
+            instance_id = self.session_allocations.get(session_id)
+            pool_instance = self.instances.get(instance_id) if instance_id else None
+            manager = getattr(pool_instance.instance, 'speech_pipeline_manager', None) if pool_instance else None
+            if manager is None:
+                return None
+            transcriber = getattr(pool_instance.instance, 'transcriber', None)
+            return {
+                **manager.get_timeline_stats(),
+                'endpointing': transcriber.get_endpointing_stats() if transcriber is not None else None,
+            }
     
     def _start_health_monitor(self) -> None:
         """Start the health monitoring thread."""
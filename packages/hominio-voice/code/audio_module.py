@@ -1,18 +1,23 @@
 import asyncio
 import logging
 import os
+import re
 import struct
 import threading
 import time
-from collections import namedtuple
+from collections import deque, namedtuple
 from queue import Queue
-from typing import Callable, Generator, Optional
+from typing import Any, Callable, Deque, Generator, Iterable, Iterator, List, Optional
 
 import numpy as np
-from RealtimeTTS import (KokoroEngine, TextToAudioStream)
+from RealtimeTTS import TextToAudioStream
 
 # Import memory management
+from kokoro_voices import DEFAULT_VOICE, create_kokoro_engine
+from jitter_buffer import JitterBufferPolicy, NetworkRTT, PlayoutClock, RealTimeFactorEstimator
 from memory_manager import BufferManager, get_resource_tracker
+from thread_manager import create_managed_thread
+from tts_cache import USE_TTS_CACHE, cache_key, get_tts_cache
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +30,204 @@ ENGINE_SILENCES = {
 # Stream chunk sizes influence latency vs. throughput trade-offs
 QUICK_ANSWER_STREAM_CHUNK_SIZE = 8
 FINAL_ANSWER_STREAM_CHUNK_SIZE = 30
+# Sentences are synthesized (and cached) one at a time
+SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+")
+MIN_SENTENCE_CHARS = 10 # Shorter fragments ("Dr.", "Hi.") are merged with the next sentence
+# Sentences of the final answer synthesized concurrently (one engine per lane); 1 disables look-ahead
+TTS_LOOKAHEAD = max(1, int(os.getenv("TTS_LOOKAHEAD", 2)))
+LOOKAHEAD_STOP_TIMEOUT_S = 2.0 # Longest wait for all lanes to stop on interrupt
+
+
+def split_sentences(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Regroups streamed text chunks into sentences.
+
+    A sentence ends at '.', '!', '?' or '…' followed by whitespace; the
+    remainder is yielded once the chunks are exhausted.
+
+    Args:
+        chunks: Text chunks, e.g. LLM tokens.
+
+    Yields:
+        Stripped sentences of at least `MIN_SENTENCE_CHARS` characters (the last one may be shorter).
+    """
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        parts = SENTENCE_END_RE.split(pending)
+        pending = parts.pop()
+        carry = ""
+        for part in parts:
+            carry = f"{carry} {part}" if carry else part
+            if len(carry) >= MIN_SENTENCE_CHARS:
+                yield carry.strip()
+                carry = ""
+        if carry:
+            pending = f"{carry} {pending}"
+    if pending.strip():
+        yield pending.strip()
+
+
+class _SentenceJob:
+    """One sentence of a look-ahead synthesis and the audio produced for it so far."""
+
+    def __init__(self, sentence: str, key: str) -> None:
+        self.sentence = sentence
+        self.key = key
+        self.chunks: List[bytes] = []
+        self.lane: Optional[Any] = None  # Stream synthesizing it (None for cache hits)
+        self.thread: Optional[Any] = None
+        self.done = False
+        self.cached = False
+        self.cacheable = True           # False once a chunk was lost
+
+
+class _ChunkSink:
+    """
+    Output side of one synthesis call.
+
+    Acts as the jitter buffer of the stream: holds back the first chunks
+    until the processor's `JitterBufferPolicy` target is buffered, then
+    streams chunks as they come. The processor's playout clock, advanced by
+    the server as chunks are actually sent, estimates the client's buffer;
+    when it runs dry with nothing left to send, the sink counts an underrun
+    and buffers again.
+    Also feeds the real-time factor estimator with the synthesis runs the
+    caller reports, logs slow chunks, puts chunks
+    into the audio queue and fires the processor's
+    `on_first_audio_chunk_synthesize` callback once.
+    """
+    SR, BPS = 24000, 2 # Assumed Sample Rate and Bytes Per Sample (16-bit)
+
+    def __init__(self, processor: "AudioProcessor", audio_chunks: Queue, generation_string: str, label: str) -> None:
+        self.processor = processor
+        self.policy: JitterBufferPolicy = processor.jitter_policy
+        self.audio_chunks = audio_chunks
+        self.generation_string = generation_string
+        self.label = label
+        # Buffering state variables
+        self.buffer: list[bytes] = []
+        self.buffering: bool = True
+        self.buf_dur: float = 0.0
+        self.target: float = self.policy.target_s()
+        self.start = time.time()
+        self.prev_chunk_time: float = 0.0 # Track time of previous chunk
+        self.first_call: bool = True
+        self.callback_fired: bool = False
+
+    def _put(self, chunks: list[bytes], when: str = "") -> bool:
+        """Queues chunks, returns True if at least one was put."""
+        put_any = False
+        for c in chunks:
+            try:
+                self.audio_chunks.put_nowait(c)
+                put_any = True
+            except asyncio.QueueFull:
+                logger.warning(f"👄⚠️ {self.generation_string} {self.label} audio queue full{when}, dropping chunk.")
+                break  # Stop trying to put more chunks if queue is full
+        return put_any
+
+    def _fire_first_chunk_callback(self) -> None:
+        if self.callback_fired:
+            return
+        callback = self.processor.on_first_audio_chunk_synthesize
+        if callback:
+            try:
+                logger.debug(f"👄🚀 {self.generation_string} {self.label} Firing on_first_audio_chunk_synthesize.")
+                callback(self.audio_chunks) # The queue identifies the generation the audio belongs to
+            except Exception as e:
+                logger.error(f"👄💥 {self.generation_string} {self.label} Error in on_first_audio_chunk_synthesize callback: {e}", exc_info=True)
+        # Ensure callback fires only once per synthesis call
+        self.callback_fired = True
+
+    def _flush_buffer(self, when: str = "") -> bool:
+        put_occurred = self._put(self.buffer, when)
+        self.buffer.clear()
+        self.buf_dur = 0.0
+        self.buffering = False
+        return put_occurred
+
+    def push(self, chunk: bytes) -> bool:
+        """
+        Handles one freshly synthesized chunk.
+
+        Returns:
+            False if the chunk was rejected by the buffer manager (dropped).
+        """
+        now = time.time()
+        samples = len(chunk) // self.BPS
+        play_duration = samples / self.SR # Duration of the current chunk
+
+        # --- Timing and Logging ---
+        if self.first_call:
+            self.first_call = False
+            self.prev_chunk_time = now
+            logger.debug(f"👄🚀 {self.generation_string} {self.label} audio start. TTFA: {now - self.start:.2f}s.")
+        else:
+            gap = now - self.prev_chunk_time
+            self.prev_chunk_time = now
+            if gap > play_duration * 1.1: # Allow small tolerance
+                logger.debug(f"👄🐢 {self.generation_string} {self.label} chunk slow (gap={gap:.3f}s > {play_duration:.3f}s).")
+
+        # --- Buffering Logic with Memory Management ---
+        # Use BufferManager to prevent memory leaks
+        if not self.processor.audio_buffer_manager.add(chunk):
+            logger.warning(f"👄⚠️ {self.generation_string} {self.label} audio buffer manager rejected chunk (buffer full)")
+            return False  # Skip this chunk to prevent memory overflow
+
+        # Playout ran dry while nothing was waiting to be sent: synthesis fell behind, buffer
+        # again. Audio still queued (e.g. a speculative generation not released yet) is no underrun.
+        if not self.buffering and self.audio_chunks.empty() and self.policy.playout.client_buffer(now) < 0:
+            self.policy.stats["underruns"] += 1
+            self.target = self.policy.target_s()
+            self.buffering = True
+            logger.warning(f"👄❌ {self.generation_string} {self.label} playout underrun, rebuffering {self.target:.2f}s.")
+
+        put_occurred = False
+        if self.buffering:
+            self.buffer.append(chunk)
+            self.buf_dur += play_duration
+            if self.buf_dur >= self.target:
+                logger.debug(f"👄➡️ {self.generation_string} {self.label} Flushing buffer (dur={self.buf_dur:.2f}s, target={self.target:.2f}s).")
+                self.policy.stats["buffers"] += 1
+                put_occurred = self._flush_buffer()
+        else: # Not buffering, put chunk directly
+            put_occurred = self._put([chunk])
+
+        if put_occurred:
+            self._fire_first_chunk_callback()
+        return True
+
+    def record_run(self, wall_s: float, audio_bytes: int) -> None:
+        """
+        Feeds one completed synthesis run into the real-time factor estimator.
+
+        Push gaps are no measure of synthesis speed (they include LLM waits and
+        look-ahead bursts), so callers time each engine run themselves.
+        Cached audio is never reported.
+
+        Args:
+            wall_s: Wall time of the run, from play start to its end.
+            audio_bytes: Bytes of audio the run produced.
+        """
+        self.policy.rtf.update(wall_s, audio_bytes / (self.BPS * self.SR))
+
+    def push_cached(self, chunks: list[bytes]) -> None:
+        """Queues the complete audio of a cached sentence; audio buffered before it goes out first."""
+        self._flush_buffer()
+        if self._put(chunks):
+            self._fire_first_chunk_callback()
+
+    def flush(self) -> None:
+        """Flushes the remaining buffer if the stream finished before the target was reached."""
+        if self.buffering and self.buffer:
+            logger.debug(f"👄➡️ {self.generation_string} {self.label} Flushing remaining buffer after stream finished.")
+            self._flush_buffer(" on final flush")
+        self.buffer.clear()
+
+    def discard(self) -> None:
+        """Drops buffered audio (interruption)."""
+        self.buffer.clear()
 
 class AudioProcessor:
     """
@@ -57,6 +260,8 @@ class AudioProcessor:
             
         self.stop_event = threading.Event()
         self.finished_event = threading.Event()
+        # Signalled when the stream stops or a stop is requested, replaces polling is_playing()
+        self._synthesis_condition = threading.Condition()
         self.audio_chunks = asyncio.Queue() # Queue for synthesized audio output
         self.orpheus_model = orpheus_model  # Kept for compatibility
 
@@ -64,13 +269,16 @@ class AudioProcessor:
         self.audio_buffer_manager = BufferManager(max_size=200, max_age_seconds=5.0)
         self.resource_tracker = get_resource_tracker()
         self.resource_tracker.track_resource("global", "AudioProcessor", f"audio_processor_{id(self)}")
+        # Adaptive jitter buffer of all synthesis calls (RTF is measured across calls)
+        self.jitter_policy = JitterBufferPolicy(RealTimeFactorEstimator(), NetworkRTT(), PlayoutClock())
 
         self.silence = ENGINE_SILENCES["kokoro"]
         self.current_stream_chunk_size = QUICK_ANSWER_STREAM_CHUNK_SIZE # Initial chunk size
 
         # Initialize Kokoro engine - simplified config for natural sound
         logger.info(f"👄⚙️ Initializing Kokoro engine")
-        self.engine = KokoroEngine(voice="af_heart")
+        self.voice = DEFAULT_VOICE # Used when a synthesis call does not name a voice
+        self.engine = create_kokoro_engine(self.voice)
 
         # Initialize the RealtimeTTS stream
         self.stream = TextToAudioStream(
@@ -137,8 +345,46 @@ class AudioProcessor:
             logger.warning("👄⚠️ TTFA measurement failed (no audio chunk received).")
             self.tts_inference_time = 0
 
+        # Stream run arguments of every synthesized sentence (on_audio_chunk is added per call)
+        self._play_kwargs = dict(
+            log_synthesized_text=True, # Log the text being synthesized
+            muted=True, # We handle audio via the queue
+            fast_sentence_fragment=False, # Standard processing
+            comma_silence_duration=self.silence.comma,
+            sentence_silence_duration=self.silence.sentence,
+            default_silence_duration=self.silence.default,
+            force_first_fragment_after_words=999999, # Don't force early fragments
+        )
+
+        # Look-ahead lanes for the final answer: the main stream plus one stream per extra lane
+        self.lookahead = TTS_LOOKAHEAD
+        self._lanes = [self.stream] + [self._create_lane_stream(play_kwargs) for _ in range(self.lookahead - 1)]
+        if self.lookahead > 1:
+            logger.info(f"👄⚙️ Final answer look-ahead synthesis with {self.lookahead} lanes")
+        # Voice each stream's engine is currently set to
+        self._stream_voices = {id(stream): self.voice for stream in self._lanes}
+
         # Callbacks to be set externally if needed
-        self.on_first_audio_chunk_synthesize: Optional[Callable[[], None]] = None
+        # Called with the audio queue of the synthesis call
+        self.on_first_audio_chunk_synthesize: Optional[Callable[[Queue], None]] = None
+
+    def _create_lane_stream(self, prewarm_kwargs: dict) -> TextToAudioStream:
+        """
+        Creates and prewarms an additional stream for look-ahead synthesis (its engine shares the Kokoro model).
+
+        Args:
+            prewarm_kwargs: Play arguments used for the prewarm run.
+        """
+        stream = TextToAudioStream(
+            create_kokoro_engine(self.voice),
+            muted=True,
+            playout_chunk_size=4096,
+        )
+        stream.feed("prewarm")
+        stream.play(**prewarm_kwargs) # Synchronous play for prewarm
+        while stream.is_playing():
+            time.sleep(0.01)
+        return stream
 
     def on_audio_stream_stop(self) -> None:
         """
@@ -147,7 +393,41 @@ class AudioProcessor:
         Logs the event and sets the `finished_event` to signal completion or stop.
         """
         logger.info("👄🛑 Audio stream stopped.")
-        self.finished_event.set()
+        with self._synthesis_condition:
+            self.finished_event.set()
+            self._synthesis_condition.notify_all()
+
+    def interrupt(self) -> None:
+        """
+        Wakes a blocked `synthesize`/`synthesize_generator` call so it sees its stop_event.
+
+        Must be called after setting the stop_event passed to the synthesis call.
+        """
+        with self._synthesis_condition:
+            self._synthesis_condition.notify_all()
+
+    def _wait_for_synthesis(self, stop_event: threading.Event) -> bool:
+        """
+        Blocks until the running synthesis finishes or `stop_event` is set.
+
+        Args:
+            stop_event: The stop event of the running synthesis call.
+
+        Returns:
+            True if the stream finished, False if stop_event was set.
+        """
+        with self._synthesis_condition:
+            while not (stop_event.is_set() or self.finished_event.is_set()):
+                # The timeout only guards against a stop_event set without interrupt()
+                self._synthesis_condition.wait(timeout=1.0)
+        if stop_event.is_set():
+            return False
+
+        # on_audio_stream_stop fires just before the play thread clears is_playing
+        play_thread = getattr(self.stream, "play_thread", None)
+        if play_thread is not None and play_thread is not threading.current_thread():
+            play_thread.join(timeout=1.0)
+        return True
 
     def synthesize(
             self,
@@ -155,13 +435,16 @@ class AudioProcessor:
             audio_chunks: Queue, 
             stop_event: threading.Event,
             generation_string: str = "",
+            voice: Optional[str] = None,
         ) -> bool:
         """
         Synthesizes audio from a complete text string and puts chunks into a queue.
 
-        Feeds the entire text string to the TTS engine. As audio chunks are generated,
-        they are potentially buffered initially for smoother streaming and then put
-        into the provided queue. Synthesis can be interrupted via the stop_event.
+        The text is split into sentences; each sentence is served from the
+        TTS audio cache if it was synthesized before, otherwise fed to the
+        engine. Audio chunks are potentially buffered initially for smoother
+        streaming and then put into the provided queue. Synthesis can be
+        interrupted via the stop_event.
         Triggers the `on_first_audio_chunk_synthesize` callback when the first valid audio chunk is queued.
 
         Args:
@@ -170,7 +453,9 @@ class AudioProcessor:
                           This should typically be the instance's `self.audio_chunks`.
             stop_event: A threading.Event to signal interruption of the synthesis.
                         This should typically be the instance's `self.stop_event`.
+                        Call `interrupt()` after setting it to wake the waiting call.
             generation_string: An optional identifier string for logging purposes.
+            voice: Voice to speak with, defaults to `self.voice`.
 
         Returns:
             True if synthesis completed fully, False if interrupted by stop_event.
@@ -179,127 +464,13 @@ class AudioProcessor:
             logger.warning("👄⚠️ Empty text provided to synthesize, skipping.")
             return True
 
-        self.stream.feed(text)
-        self.finished_event.clear() # Reset finished event before starting
-
-        # Buffering state variables
-        buffer: list[bytes] = []
-        good_streak: int = 0
-        buffering: bool = True
-        buf_dur: float = 0.0
-        SR, BPS = 24000, 2 # Assumed Sample Rate and Bytes Per Sample (16-bit)
-        start = time.time()
-        self._quick_prev_chunk_time: float = 0.0 # Track time of previous chunk
-
-        def on_audio_chunk(chunk: bytes):
-            nonlocal buffer, good_streak, buffering, buf_dur, start
-            # Check for interruption signal
-            if stop_event.is_set():
-                logger.info(f"👄🛑 {generation_string} Quick audio stream interrupted by stop_event. Text: {text[:50]}...")
-                return
-
-            now = time.time()
-            samples = len(chunk) // BPS
-            play_duration = samples / SR # Duration of the current chunk
-
-            # --- Timing and Logging ---
-            if on_audio_chunk.first_call:
-                on_audio_chunk.first_call = False
-                self._quick_prev_chunk_time = now
-                ttfa_actual = now - start
-                logger.debug(f"👄🚀 {generation_string} Quick audio start. TTFA: {ttfa_actual:.2f}s. Text: {text[:50]}...")
-            else:
-                gap = now - self._quick_prev_chunk_time
-                self._quick_prev_chunk_time = now
-                if gap <= play_duration * 1.1: # Allow small tolerance
-                    good_streak += 1
-                else:
-                    logger.warning(f"👄❌ {generation_string} Quick chunk slow (gap={gap:.3f}s > {play_duration:.3f}s). Text: {text[:50]}...")
-                    good_streak = 0 # Reset streak on slow chunk
-
-            put_occurred_this_call = False # Track if put happened in this specific call
-
-            # --- Buffering Logic with Memory Management ---
-            # Use BufferManager to prevent memory leaks
-            if self.audio_buffer_manager.add(chunk):
-                buffer.append(chunk) # Only add if buffer manager accepts it
-                buf_dur += play_duration # Update buffer duration
-            else:
-                logger.warning(f"👄⚠️ {generation_string} Quick audio buffer manager rejected chunk (buffer full)")
-                return  # Skip this chunk to prevent memory overflow
-
-            if buffering:
-                # Check conditions to flush buffer and stop buffering
-                if good_streak >= 2 or buf_dur >= 0.5: # Flush if stable or buffer > 0.5s
-                    logger.debug(f"👄➡️ {generation_string} Quick Flushing buffer (streak={good_streak}, dur={buf_dur:.2f}s).")
-                    for c in buffer:
-                        try:
-                            audio_chunks.put_nowait(c)
-                            put_occurred_this_call = True
-                        except asyncio.QueueFull:
-                            logger.warning(f"👄⚠️ {generation_string} Quick audio queue full, dropping chunk.")
-                            break  # Stop trying to put more chunks if queue is full
-                    buffer.clear()
-                    buf_dur = 0.0 # Reset buffer duration
-                    buffering = False # Stop buffering mode
-            else: # Not buffering, put chunk directly
-                try:
-                    audio_chunks.put_nowait(chunk)
-                    put_occurred_this_call = True
-                except asyncio.QueueFull:
-                    logger.warning(f"👄⚠️ {generation_string} Quick audio queue full, dropping chunk.")
-
-            # --- First Chunk Callback ---
-            if put_occurred_this_call and not on_audio_chunk.callback_fired:
-                if self.on_first_audio_chunk_synthesize:
-                    try:
-                        logger.debug(f"👄🚀 {generation_string} Quick Firing on_first_audio_chunk_synthesize.")
-                        self.on_first_audio_chunk_synthesize()
-                    except Exception as e:
-                        logger.error(f"👄💥 {generation_string} Quick Error in on_first_audio_chunk_synthesize callback: {e}", exc_info=True)
-                # Ensure callback fires only once per synthesize call
-                on_audio_chunk.callback_fired = True
-
-        # Initialize callback state for this run
-        on_audio_chunk.first_call = True
-        on_audio_chunk.callback_fired = False
-
-        play_kwargs = dict(
-            log_synthesized_text=True, # Log the text being synthesized
-            on_audio_chunk=on_audio_chunk,
-            muted=True, # We handle audio via the queue
-            fast_sentence_fragment=False, # Standard processing
-            comma_silence_duration=self.silence.comma,
-            sentence_silence_duration=self.silence.sentence,
-            default_silence_duration=self.silence.default,
-            force_first_fragment_after_words=999999, # Don't force early fragments
-        )
-
         logger.debug(f"👄▶️ {generation_string} Quick Starting synthesis. Text: {text[:50]}...")
-        self.stream.play_async(**play_kwargs)
-
-        # Wait loop for completion or interruption
-        while self.stream.is_playing() or not self.finished_event.is_set():
-            if stop_event.is_set():
-                self.stream.stop()
-                logger.info(f"👄🛑 {generation_string} Quick answer synthesis aborted by stop_event. Text: {text[:50]}...")
-                buffer.clear()
-                self.finished_event.wait(timeout=1.0) # Wait for stream stop confirmation
-                return False # Indicate interruption
-            time.sleep(0.01)
-
-        # If loop exited normally, check if buffer still has content (stream finished before flush)
-        if buffering and buffer and not stop_event.is_set():
-            logger.debug(f"👄➡️ {generation_string} Quick Flushing remaining buffer after stream finished.")
-            for c in buffer:
-                 try:
-                    audio_chunks.put_nowait(c)
-                 except asyncio.QueueFull:
-                    logger.warning(f"👄⚠️ {generation_string} Quick audio queue full on final flush, dropping chunk.")
-            buffer.clear()
-
-        logger.debug(f"👄✅ {generation_string} Quick answer synthesis complete. Text: {text[:50]}...")
-        return True # Indicate successful completion
+        completed = self._synthesize_sentences(split_sentences([text]), audio_chunks, stop_event, generation_string, "Quick", voice or self.voice)
+        if completed:
+            logger.debug(f"👄✅ {generation_string} Quick answer synthesis complete. Text: {text[:50]}...")
+        else:
+            logger.info(f"👄🛑 {generation_string} Quick answer synthesis aborted by stop_event. Text: {text[:50]}...")
+        return completed
 
     def synthesize_generator(
             self,
@@ -307,13 +478,17 @@ class AudioProcessor:
             audio_chunks: Queue, # Should match self.audio_chunks type
             stop_event: threading.Event,
             generation_string: str = "",
+            voice: Optional[str] = None,
         ) -> bool:
         """
         Synthesizes audio from a generator yielding text chunks and puts audio into a queue.
 
-        Feeds text chunks yielded by the generator to the TTS engine. As audio chunks
-        are generated, they are potentially buffered initially and then put into the
-        provided queue. Synthesis can be interrupted via the stop_event.
+        Text chunks yielded by the generator are regrouped into sentences;
+        each sentence is served from the TTS audio cache if possible,
+        otherwise fed to the engine. With `TTS_LOOKAHEAD` > 1, upcoming
+        sentences are synthesized in parallel and queued in order. Audio chunks are potentially buffered
+        initially and then put into the provided queue. Synthesis can be
+        interrupted via the stop_event.
         Triggers the `on_first_audio_chunk_synthesize` callback when the first valid audio chunk is queued.
 
         Args:
@@ -322,130 +497,320 @@ class AudioProcessor:
                           This should typically be the instance's `self.audio_chunks`.
             stop_event: A threading.Event to signal interruption of the synthesis.
                         This should typically be the instance's `self.stop_event`.
+                        Call `interrupt()` after setting it to wake the waiting call.
             generation_string: An optional identifier string for logging purposes.
+            voice: Voice to speak with, defaults to `self.voice`.
 
         Returns:
             True if synthesis completed fully, False if interrupted by stop_event.
         """
-        # Feed the generator to the stream
-        self.stream.feed(generator)
-        self.finished_event.clear() # Reset finished event
+        voice = voice or self.voice
+        logger.debug(f"👄▶️ {generation_string} Final Starting synthesis from generator.")
+        if self.lookahead > 1:
+            completed = self._synthesize_lookahead(split_sentences(generator), audio_chunks, stop_event, generation_string, "Final", voice)
+        else:
+            completed = self._synthesize_sentences(split_sentences(generator), audio_chunks, stop_event, generation_string, "Final", voice)
+        if completed:
+            logger.debug(f"👄✅ {generation_string} Final answer synthesis complete.")
+        else:
+            logger.info(f"👄🛑 {generation_string} Final answer synthesis aborted by stop_event.")
+        return completed
 
-        # Buffering state variables
-        buffer: list[bytes] = []
-        good_streak: int = 0
-        buffering: bool = True
-        buf_dur: float = 0.0
-        SR, BPS = 24000, 2 # Assumed Sample Rate and Bytes Per Sample
-        start = time.time()
-        self._final_prev_chunk_time: float = 0.0 # Separate timer for generator synthesis
+    def _synthesize_sentences(
+            self,
+            sentences: Iterable[str],
+            audio_chunks: Queue,
+            stop_event: threading.Event,
+            generation_string: str,
+            label: str,
+            voice: str,
+        ) -> bool:
+        """
+        Streams the audio of `sentences` into `audio_chunks`, one sentence at a time.
+
+        Cached sentences are queued directly from the TTS audio cache; all
+        others are synthesized with one stream run each, so their audio can
+        be attributed to the sentence and cached.
+
+        Args:
+            sentences: Sentences to speak, in order.
+            audio_chunks: The queue to put the resulting audio chunks (bytes) into.
+            stop_event: Interrupts synthesis when set.
+            generation_string: Identifier string for logging.
+            label: "Quick" or "Final", for logging.
+            voice: Voice to speak with.
+
+        Returns:
+            True if all sentences were spoken, False if interrupted by stop_event.
+        """
+        tts_cache = get_tts_cache() if USE_TTS_CACHE else None
+        sink = _ChunkSink(self, audio_chunks, generation_string, label)
+        recording: Optional[list[bytes]] = None # Audio of the sentence being synthesized
+        run_bytes = 0 # Audio produced by the current engine run
 
         def on_audio_chunk(chunk: bytes):
-            nonlocal buffer, good_streak, buffering, buf_dur, start
+            nonlocal recording, run_bytes
+            # Check for interruption signal
             if stop_event.is_set():
-                logger.info(f"👄🛑 {generation_string} Final audio stream interrupted by stop_event.")
+                logger.info(f"👄🛑 {generation_string} {label} audio stream interrupted by stop_event.")
                 return
+            run_bytes += len(chunk)
+            if not sink.push(chunk):
+                recording = None # Sentence audio is incomplete, do not cache it
+            elif recording is not None:
+                recording.append(chunk)
 
-            now = time.time()
-            samples = len(chunk) // BPS
-            play_duration = samples / SR
-
-            # --- Timing and Logging ---
-            if on_audio_chunk.first_call:
-                on_audio_chunk.first_call = False
-                self._final_prev_chunk_time = now
-                ttfa_actual = now-start
-                logger.debug(f"👄🚀 {generation_string} Final audio start. TTFA: {ttfa_actual:.2f}s.")
-            else:
-                gap = now - self._final_prev_chunk_time
-                self._final_prev_chunk_time = now
-                if gap <= play_duration * 1.1:
-                    good_streak += 1
-                else:
-                    logger.warning(f"👄❌ {generation_string} Final chunk slow (gap={gap:.3f}s > {play_duration:.3f}s).")
-                    good_streak = 0
-
-            put_occurred_this_call = False
-
-            # --- Buffering Logic with Memory Management ---
-            # Use BufferManager to prevent memory leaks
-            if self.audio_buffer_manager.add(chunk):
-                buffer.append(chunk)
-                buf_dur += play_duration
-            else:
-                logger.warning(f"👄⚠️ {generation_string} Final audio buffer manager rejected chunk (buffer full)")
-                return  # Skip this chunk to prevent memory overflow
-                
-            if buffering:
-                if good_streak >= 2 or buf_dur >= 0.5: # Same flush logic as synthesize
-                    logger.debug(f"👄➡️ {generation_string} Final Flushing buffer (streak={good_streak}, dur={buf_dur:.2f}s).")
-                    for c in buffer:
-                        try:
-                           audio_chunks.put_nowait(c)
-                           put_occurred_this_call = True
-                        except asyncio.QueueFull:
-                            logger.warning(f"👄⚠️ {generation_string} Final audio queue full, dropping chunk.")
-                            break  # Stop trying to put more chunks if queue is full
-                    buffer.clear()
-                    buf_dur = 0.0
-                    buffering = False
-            else: # Not buffering
-                try:
-                    audio_chunks.put_nowait(chunk)
-                    put_occurred_this_call = True
-                except asyncio.QueueFull:
-                    logger.warning(f"👄⚠️ {generation_string} Final audio queue full, dropping chunk.")
-
-            # --- First Chunk Callback --- (Using the same callback as synthesize)
-            if put_occurred_this_call and not on_audio_chunk.callback_fired:
-                if self.on_first_audio_chunk_synthesize:
-                    try:
-                        logger.debug(f"👄🚀 {generation_string} Final Firing on_first_audio_chunk_synthesize.")
-                        self.on_first_audio_chunk_synthesize()
-                    except Exception as e:
-                        logger.error(f"👄💥 {generation_string} Final Error in on_first_audio_chunk_synthesize callback: {e}", exc_info=True)
-                on_audio_chunk.callback_fired = True
-
-        # Initialize callback state
-        on_audio_chunk.first_call = True
-        on_audio_chunk.callback_fired = False
-
-        play_kwargs = dict(
-            log_synthesized_text=True, # Log text from generator
-            on_audio_chunk=on_audio_chunk,
-            muted=True,
-            fast_sentence_fragment=False,
-            comma_silence_duration=self.silence.comma,
-            sentence_silence_duration=self.silence.sentence,
-            default_silence_duration=self.silence.default,
-            force_first_fragment_after_words=999999,
-        )
-
-        logger.debug(f"👄▶️ {generation_string} Final Starting synthesis from generator.")
-        self.stream.play_async(**play_kwargs)
+        play_kwargs = dict(self._play_kwargs, on_audio_chunk=on_audio_chunk)
 
-        # Wait loop for completion or interruption
-        while self.stream.is_playing() or not self.finished_event.is_set():
+        for sentence in sentences:
             if stop_event.is_set():
+                return False
+
+            key = cache_key(self.engine_name, voice, sentence)
+            cached = tts_cache.get(key) if tts_cache else None
+            if cached is not None:
+                logger.debug(f"👄💾 {generation_string} {label} TTS cache hit: {sentence[:50]}")
+                sink.push_cached(cached)
+                continue
+
+            recording = []
+            run_bytes = 0
+            self._use_voice(self.stream, voice)
+            self.stream.feed(sentence)
+            self.finished_event.clear() # Reset finished event before starting
+            run_start = time.monotonic()
+            self.stream.play_async(**play_kwargs)
+
+            # Block until completion or interruption
+            if not self._wait_for_synthesis(stop_event):
                 self.stream.stop()
-                logger.info(f"👄🛑 {generation_string} Final answer synthesis aborted by stop_event.")
-                buffer.clear()
+                sink.discard()
                 self.finished_event.wait(timeout=1.0) # Wait for stream stop confirmation
                 return False # Indicate interruption
-            time.sleep(0.01)
 
-        # Flush remaining buffer if stream finished before flush condition met
-        if buffering and buffer and not stop_event.is_set():
-            logger.debug(f"👄➡️ {generation_string} Final Flushing remaining buffer after stream finished.")
-            for c in buffer:
-                try:
-                   audio_chunks.put_nowait(c)
-                except asyncio.QueueFull:
-                   logger.warning(f"👄⚠️ {generation_string} Final audio queue full on final flush, dropping chunk.")
-            buffer.clear()
-
-        logger.debug(f"👄✅ {generation_string} Final answer synthesis complete.")
-        return True # Indicate successful completion
+            sink.record_run(time.monotonic() - run_start, run_bytes)
+            if tts_cache and recording:
+                tts_cache.put(key, recording)
+            recording = None
+
+        if not stop_event.is_set():
+            sink.flush()
+        return True
+
+    def _synthesize_lookahead(
+            self,
+            sentences: Iterable[str],
+            audio_chunks: Queue,
+            stop_event: threading.Event,
+            generation_string: str,
+            label: str,
+            voice: str,
+        ) -> bool:
+        """
+        Streams the audio of `sentences` into `audio_chunks`, synthesizing upcoming sentences in parallel.
+
+        A dispatcher thread pulls sentences from `sentences` (usually the LLM
+        stream) and hands each one to a free synthesis lane, at most
+        `self.lookahead` sentences ahead of the one being queued. The calling
+        thread reassembles their audio in sentence order: the head sentence is
+        streamed live as its chunks arrive, sentences finished ahead of time are
+        queued in one go once they become the head. On stop_event all busy
+        lanes are stopped and waited for, since the next generation reuses them.
+        However the call exits, the dispatcher is told to stop (independently of
+        stop_event, which the caller may clear) and joined with a bound.
+
+        Args:
+            sentences: Sentences to speak, in order.
+            audio_chunks: The queue to put the resulting audio chunks (bytes) into.
+            stop_event: Interrupts synthesis when set.
+            generation_string: Identifier string for logging.
+            label: "Quick" or "Final", for logging.
+            voice: Voice to speak with.
+
+        Returns:
+            True if all sentences were spoken, False if interrupted by stop_event.
+        """
+        tts_cache = get_tts_cache() if USE_TTS_CACHE else None
+        sink = _ChunkSink(self, audio_chunks, generation_string, label)
+        condition = self._synthesis_condition # Also notified by interrupt()
+        jobs: Deque[_SentenceJob] = deque() # Dispatched, not yet fully queued, in order
+        free_lanes: Queue = Queue()
+        for lane in self._lanes:
+            free_lanes.put(lane)
+        budget = threading.Semaphore(self.lookahead)
+        dispatch_done = threading.Event()
+        # Private to this call and set whenever it exits: the caller may clear (and reuse)
+        # stop_event right after an interrupted call, while the dispatcher is still
+        # blocked on the sentence source
+        cancelled = threading.Event()
+
+        def stopped() -> bool:
+            return stop_event.is_set() or cancelled.is_set()
+
+        def notify() -> None:
+            with condition:
+                condition.notify_all()
+
+        def run_job(lane, job: "_SentenceJob") -> None:
+            """Lane thread: synthesizes one sentence (blocking play)."""
+            def on_audio_chunk(chunk: bytes):
+                if not stopped():
+                    job.chunks.append(chunk)
+                    notify()
+            try:
+                self._use_voice(lane, voice)
+                lane.feed(job.sentence)
+                with condition:
+                    # The stop path stops lanes after setting the stop flags; a stop before play() would be lost
+                    if stopped():
+                        return
+                run_start = time.monotonic()
+                lane.play(**dict(self._play_kwargs, on_audio_chunk=on_audio_chunk))
+                if not stopped():
+                    sink.record_run(time.monotonic() - run_start, sum(len(c) for c in job.chunks))
+            except Exception as e:
+                logger.error(f"👄💥 {generation_string} {label} Look-ahead synthesis failed: {e}", exc_info=True)
+                job.cacheable = False
+            finally:
+                free_lanes.put(lane) # Before marking done: a queued job never holds a lane
+                job.done = True
+                notify()
+
+        def dispatch() -> None:
+            """Dispatcher thread: pulls sentences and starts their synthesis within the budget."""
+            try:
+                for sentence in sentences:
+                    while not budget.acquire(timeout=0.1):
+                        if stopped():
+                            return
+                    if stopped():
+                        return
+                    job = _SentenceJob(sentence, cache_key(self.engine_name, voice, sentence))
+                    cached = tts_cache.get(job.key) if tts_cache else None
+                    if cached is not None:
+                        logger.debug(f"👄💾 {generation_string} {label} TTS cache hit: {sentence[:50]}")
+                        job.chunks, job.cached, job.done = cached, True, True
+                        with condition:
+                            jobs.append(job)
+                            condition.notify_all()
+                        continue
+                    job.lane = free_lanes.get()
+                    with condition:
+                        # Published with its thread, so the stop path always sees what it has to stop and join
+                        if stopped():
+                            free_lanes.put(job.lane)
+                            return
+                        job.thread = create_managed_thread(target=run_job, name="TTSLookahead", args=(job.lane, job), daemon=True)
+                        jobs.append(job)
+            except Exception as e:
+                logger.error(f"👄💥 {generation_string} {label} Sentence dispatch failed: {e}", exc_info=True)
+            finally:
+                dispatch_done.set()
+                notify()
+
+        dispatcher = create_managed_thread(target=dispatch, name="TTSLookaheadDispatch", daemon=True)
+        try:
+            position = 0 # Chunks of the head job already queued
+            interrupted = False
+            while True:
+                with condition:
+                    while not stop_event.is_set():
+                        if jobs and (jobs[0].done or len(jobs[0].chunks) > position):
+                            break
+                        if not jobs and dispatch_done.is_set():
+                            break
+                        condition.wait(timeout=1.0)
+                    interrupted = stop_event.is_set()
+                    if interrupted or not jobs:
+                        break
+                    head = jobs[0]
+                    finished = head.done # Read before the chunks: done is set after the last append
+                    new_chunks = head.chunks[position:]
+                    position += len(new_chunks)
+                    if finished:
+                        jobs.popleft()
+
+                if head.cached:
+                    sink.push_cached(new_chunks)
+                else:
+                    for chunk in new_chunks:
+                        if not sink.push(chunk):
+                            head.cacheable = False
+                if finished:
+                    if tts_cache and not head.cached and head.cacheable and head.chunks:
+                        tts_cache.put(head.key, head.chunks)
+                    position = 0
+                    budget.release()
+
+            if interrupted:
+                with condition:
+                    cancelled.set() # No job is dispatched after this
+                    busy = [job for job in jobs if job.thread is not None and not job.done]
+                for job in busy:
+                    job.lane.stop()
+                # Lanes are reused by the next generation, so wait for all of them. A lane
+                # may enter play() right after its first stop(), hence stop until it ends.
+                deadline = time.monotonic() + LOOKAHEAD_STOP_TIMEOUT_S
+                for job in busy:
+                    while job.thread.thread.is_alive() and time.monotonic() < deadline:
+                        job.lane.stop()
+                        job.thread.thread.join(timeout=0.1)
+                sink.discard()
+                return False
+
+            sink.flush()
+            return True
+        finally:
+            cancelled.set()
+            notify()
+            # Bounded: a dispatcher blocked on the LLM stream exits on its next sentence without dispatching it
+            dispatcher.thread.join(timeout=LOOKAHEAD_STOP_TIMEOUT_S)
+
+    def _use_voice(self, stream: TextToAudioStream, voice: str) -> None:
+        """Switches the engine of `stream` to `voice` if it is set to another one."""
+        if self._stream_voices.get(id(stream)) != voice:
+            stream.engine.set_voice(voice)
+            self._stream_voices[id(stream)] = voice
+
+    def set_voice(self, voice: str) -> None:
+        """
+        Sets the voice used by synthesis calls that do not name one.
+
+        Args:
+            voice: Kokoro voice name, e.g. "af_heart".
+        """
+        self._use_voice(self.stream, voice) # Loads the voice now rather than on the first answer
+        self.voice = voice
+
+    def record_network_rtt(self, rtt_s: float) -> None:
+        """
+        Adds a measured round-trip time to the client; it widens the jitter buffer target.
+
+        Args:
+            rtt_s: Round-trip time in seconds.
+        """
+        self.jitter_policy.rtt.update(rtt_s)
+
+    def reset_network_rtt(self) -> None:
+        """Forgets the measured round-trip time (new client)."""
+        self.jitter_policy.rtt.reset()
+
+    def record_audio_sent(self, chunk: bytes) -> None:
+        """
+        Advances the client playout clock by a TTS chunk the server just sent.
+
+        Args:
+            chunk: Raw 16-bit PCM at the engine's 24 kHz rate.
+        """
+        self.jitter_policy.playout.on_sent(len(chunk) / (_ChunkSink.BPS * _ChunkSink.SR))
+
+    def reset_playout(self) -> None:
+        """The client stopped playing TTS audio (or a new client connected)."""
+        self.jitter_policy.playout.reset()
+
+    def get_jitter_stats(self) -> dict:
+        """Returns the jitter buffer target, its inputs and underrun counts."""
+        return self.jitter_policy.get_stats()
 
     def shutdown(self) -> None:
         """
@@ -0,0 +1,140 @@
+# audio_resampler.py
+import base64
+import logging
+from math import gcd
+from typing import Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TTS_SAMPLE_RATE = 24000       # Kokoro output (int16 mono)
+DEFAULT_OUTPUT_RATE = 48000   # Clients that do not negotiate get the previous 48 kHz stream
+MIN_OUTPUT_RATE, MAX_OUTPUT_RATE = 8000, 192000
+
+ZERO_CROSSINGS = 10           # Sinc lobes per side; input samples of filter history
+KAISER_BETA = 8.0             # ~80 dB stopband
+ROLLOFF = 0.94                # Passband edge as a fraction of the lower Nyquist frequency
+
+
+class StreamingResampler:
+    """
+    Polyphase windowed-sinc resampler for chunked audio.
+
+    Converts between any two integer sample rates. The filter history is
+    carried across chunks, so the output of a chunked stream is identical
+    to resampling the whole stream at once; there are no boundary
+    artifacts and no overlap bookkeeping. The filter is causal, delaying
+    the output by `ZERO_CROSSINGS` input samples (0.4 ms at 24 kHz).
+    """
+
+    def __init__(self, in_rate: int, out_rate: int) -> None:
+        """
+        Args:
+            in_rate: Sample rate of the input.
+            out_rate: Sample rate of the output.
+        """
+        g = gcd(in_rate, out_rate)
+        self.in_rate, self.out_rate = in_rate, out_rate
+        self.up, self.down = out_rate // g, in_rate // g
+
+        # Low-pass at the lower Nyquist frequency, designed at the upsampled rate
+        factor = max(self.up, self.down)
+        num_taps = 2 * ZERO_CROSSINGS * factor + 1
+        n = np.arange(num_taps) - (num_taps - 1) / 2
+        taps = np.sinc(ROLLOFF * n / factor) * np.kaiser(num_taps, KAISER_BETA)
+        taps *= self.up / taps.sum() # Unity gain per polyphase branch
+
+        # phases[p, t] is the tap applied to the input sample t steps back for output phase p
+        self.phase_taps = -(-num_taps // self.up)
+        padded = np.zeros(self.phase_taps * self.up)
+        padded[:num_taps] = taps
+        self.phases = padded.reshape(self.phase_taps, self.up).T.astype(np.float32)
+        self.reset()
+
+    def reset(self) -> None:
+        """Starts a new stream (clears the filter history)."""
+        self._history = np.zeros(self.phase_taps - 1, dtype=np.float32)
+        self._received = 0  # Input samples seen
+        self._next = 0      # Index of the next output sample
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Resamples the next chunk of the stream.
+
+        Args:
+            samples: Float32 input samples.
+
+        Returns:
+            Float32 output samples that are fully determined by the input so far.
+        """
+        if len(samples) == 0:
+            return np.zeros(0, dtype=np.float32)
+        buf = np.concatenate((self._history, samples.astype(np.float32, copy=False)))
+        received_before = self._received
+        self._received += len(samples)
+
+        end = (self._received * self.up - 1) // self.down + 1
+        positions = np.arange(self._next, end, dtype=np.int64) * self.down
+        newest = positions // self.up - received_before + len(self._history) # Buffer index of each output's newest input
+        window = newest[:, None] - np.arange(self.phase_taps)[None, :]
+        out = np.einsum("ij,ij->i", self.phases[positions % self.up], buf[window])
+
+        self._next = end
+        self._history = buf[len(buf) - (self.phase_taps - 1):]
+        return out.astype(np.float32, copy=False)
+
+
+def negotiate_output_rate(requested: Any) -> int:
+    """
+    Validates a client's requested TTS playback rate.
+
+    Args:
+        requested: The rate the client reported (its playback AudioContext rate).
+
+    Returns:
+        The rate to stream at, or `DEFAULT_OUTPUT_RATE` if the request is unusable.
+    """
+    try:
+        rate = int(requested)
+    except (TypeError, ValueError):
+        return DEFAULT_OUTPUT_RATE
+    return rate if MIN_OUTPUT_RATE <= rate <= MAX_OUTPUT_RATE else DEFAULT_OUTPUT_RATE
+
+
+class TTSOutputEncoder:
+    """
+    Encodes a session's TTS chunks for the client.
+
+    Chunks go out unchanged when the client plays at the engine's native
+    rate; otherwise they pass through one `StreamingResampler`. Every
+    chunk sent to the client (answer audio, fillers, fade tails) must use
+    the session's encoder so the resampler sees one continuous stream.
+    """
+
+    def __init__(self, output_rate: int = DEFAULT_OUTPUT_RATE) -> None:
+        """
+        Args:
+            output_rate: The client's playback sample rate.
+        """
+        self.output_rate = output_rate
+        self.resampler: Optional[StreamingResampler] = None
+        if output_rate != TTS_SAMPLE_RATE:
+            self.resampler = StreamingResampler(TTS_SAMPLE_RATE, output_rate)
+
+    def encode(self, chunk: bytes) -> str:
+        """
+        Converts one int16 PCM chunk at `TTS_SAMPLE_RATE` to Base64 PCM at the output rate.
+
+        Args:
+            chunk: Raw 16-bit PCM bytes from the TTS engine.
+
+        Returns:
+            Base64 encoded 16-bit PCM (empty for empty input).
+        """
+        if self.resampler is None:
+            return base64.b64encode(chunk).decode("utf-8")
+        audio = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        out = self.resampler.process(audio)
+        pcm = np.clip(np.rint(out), -32768, 32767).astype(np.int16).tobytes()
+        return base64.b64encode(pcm).decode("utf-8")
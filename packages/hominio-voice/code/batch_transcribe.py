@@ -0,0 +1,298 @@
+# batch_transcribe.py
+import argparse
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import gcd
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE: int = 16000
+INT16_MAX_ABS_VALUE: float = 32768.0
+# Audio is decoded in windows of this length so huge files never need to be
+# converted to float32 in one piece; segment timestamps are offset accordingly.
+DECODE_WINDOW_S: int = 600
+
+# Per-process model, created by _init_worker
+_worker_model: Any = None
+_worker_settings: Dict[str, Any] = {}
+
+
+def whisper_settings_from_config(recorder_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extracts the final-pass Whisper settings from a RealtimeSTT recorder config,
+    so batch jobs decode exactly like the live `TranscriptionProcessor`.
+
+    Args:
+        recorder_config: A recorder configuration such as `DEFAULT_RECORDER_CONFIG`.
+
+    Returns:
+        Dictionary with model, language, beam_size, initial_prompt and vad_filter.
+    """
+    return {
+        "model": recorder_config.get("model", "base.en"),
+        "language": recorder_config.get("language", "en"),
+        "beam_size": recorder_config.get("beam_size", 3),
+        "initial_prompt": recorder_config.get("initial_prompt"),
+        "vad_filter": recorder_config.get("faster_whisper_vad_filter", False),
+    }
+
+
+def _find_wav_data(mm: mmap.mmap) -> Tuple[int, int, int, int]:
+    """
+    Locates the PCM payload of a WAV file by walking its RIFF chunks.
+
+    Args:
+        mm: Memory map of the whole file.
+
+    Returns:
+        Tuple of (data offset, data length in bytes, sample rate, channels).
+
+    Raises:
+        ValueError: If the file is not 16-bit PCM WAV.
+    """
+    if mm[:4] != b"RIFF" or mm[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+
+    sample_rate = channels = None
+    pos = 12
+    while pos + 8 <= len(mm):
+        chunk_id = mm[pos:pos + 4]
+        chunk_size = struct.unpack("<I", mm[pos + 4:pos + 8])[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", mm[body:body + 16])
+            if audio_format not in (1, 0xFFFE) or bits != 16:
+                raise ValueError(f"unsupported WAV encoding (format {audio_format}, {bits} bit), expected 16-bit PCM")
+        elif chunk_id == b"data":
+            if sample_rate is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            return body, min(chunk_size, len(mm) - body), sample_rate, channels
+        pos = body + chunk_size + (chunk_size & 1)
+    raise ValueError("WAV file has no data chunk")
+
+
+def iter_audio_windows(path: str, pcm_sample_rate: int = TARGET_SAMPLE_RATE) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Memory-maps a WAV or raw PCM file and yields float32 16 kHz mono windows.
+
+    Raw files (anything that is not RIFF/WAVE) are treated as 16-bit mono PCM
+    at `pcm_sample_rate`. Only one window at a time is converted/resampled.
+
+    Args:
+        path: Path to the audio file.
+        pcm_sample_rate: Sample rate of raw PCM input.
+
+    Yields:
+        Tuples of (window start in seconds, float32 audio normalized to [-1.0, 1.0]).
+    """
+    from scipy.signal import resample_poly
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:4] == b"RIFF":
+            offset, length, sample_rate, channels = _find_wav_data(mm)
+        else:
+            offset, length, sample_rate, channels = 0, len(mm), pcm_sample_rate, 1
+
+        frame_bytes = 2 * channels
+        total_frames = length // frame_bytes
+        window_frames = DECODE_WINDOW_S * sample_rate
+        g = gcd(TARGET_SAMPLE_RATE, sample_rate)
+
+        for start in range(0, total_frames, window_frames):
+            count = min(window_frames, total_frames - start)
+            pcm = np.frombuffer(mm, dtype=np.int16, count=count * channels, offset=offset + start * frame_bytes)
+            audio = pcm.astype(np.float32) / INT16_MAX_ABS_VALUE
+            del pcm  # Release the view so the mmap can be closed
+            if channels > 1:
+                audio = audio.reshape(-1, channels).mean(axis=1)
+            if sample_rate != TARGET_SAMPLE_RATE:
+                audio = resample_poly(audio, TARGET_SAMPLE_RATE // g, sample_rate // g).astype(np.float32)
+            yield start / sample_rate, audio
+
+
+def _init_worker(settings: Dict[str, Any], device: str, compute_type: str) -> None:
+    """Process pool initializer: loads one Whisper model per worker process."""
+    global _worker_model, _worker_settings
+    from faster_whisper import WhisperModel
+
+    _worker_settings = settings
+    # One decoding thread per process, the pool already uses every core
+    _worker_model = WhisperModel(settings["model"], device=device, compute_type=compute_type, cpu_threads=1)
+
+
+def _transcribe_file(path: str, name: str, pcm_sample_rate: int, events: Any) -> None:
+    """
+    Transcribes one file inside a worker process, publishing every segment to
+    `events` as soon as Whisper emits it.
+
+    Args:
+        path: Path of the audio file on disk.
+        name: Name reported in events (e.g. the original upload filename).
+        pcm_sample_rate: Sample rate of raw PCM input.
+        events: Shared queue receiving segment / file_done / error events.
+    """
+    started = time.time()
+    audio_s = 0.0
+    segment_count = 0
+    try:
+        for window_start, audio in iter_audio_windows(path, pcm_sample_rate):
+            audio_s += len(audio) / TARGET_SAMPLE_RATE
+            segments, _ = _worker_model.transcribe(
+                audio,
+                language=_worker_settings["language"],
+                beam_size=_worker_settings["beam_size"],
+                initial_prompt=_worker_settings["initial_prompt"],
+                vad_filter=_worker_settings["vad_filter"],
+            )
+            for segment in segments:
+                segment_count += 1
+                events.put({
+                    "type": "segment",
+                    "file": name,
+                    "start": round(window_start + segment.start, 3),
+                    "end": round(window_start + segment.end, 3),
+                    "text": segment.text.strip(),
+                })
+        elapsed = time.time() - started
+        events.put({
+            "type": "file_done",
+            "file": name,
+            "segments": segment_count,
+            "audio_seconds": round(audio_s, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "rtf": round(elapsed / audio_s, 4) if audio_s else None,
+        })
+    except Exception as e:
+        events.put({"type": "error", "file": name, "error": str(e)})
+
+
+class BatchTranscriber:
+    """
+    Offline, high-throughput transcription of recorded audio files.
+
+    Files are decoded in a process pool sized to the CPU cores with the same
+    Whisper settings as the live recorder configuration. Each worker loads its
+    own model once; files are read through memory-mapped I/O. Results are
+    yielded as a stream of events while workers produce them.
+    """
+
+    def __init__(
+            self,
+            recorder_config: Optional[Dict[str, Any]] = None,
+            max_workers: Optional[int] = None,
+            device: str = "cpu",
+            compute_type: str = "int8",
+        ) -> None:
+        """
+        Initializes the BatchTranscriber and starts its process pool.
+
+        Args:
+            recorder_config: Recorder configuration to take Whisper settings from.
+                             Defaults to `transcribe.DEFAULT_RECORDER_CONFIG`.
+            max_workers: Number of worker processes (defaults to the CPU core count).
+            device: Device for worker models. CPU by default, the GPU belongs to live sessions.
+            compute_type: CTranslate2 compute type for worker models.
+        """
+        if recorder_config is None:
+            from transcribe import DEFAULT_RECORDER_CONFIG
+            recorder_config = DEFAULT_RECORDER_CONFIG
+
+        self.settings = whisper_settings_from_config(recorder_config)
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        # Spawn keeps CUDA/threads of the server process out of the workers
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.settings, device, compute_type),
+        )
+        logger.info(f"👂📦 Batch transcriber started with {self.max_workers} workers (model {self.settings['model']}, {device})")
+
+    def transcribe_files(self, files: List[Tuple[str, str]], pcm_sample_rate: int = TARGET_SAMPLE_RATE) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribes files in parallel and yields events as they are produced.
+
+        Args:
+            files: List of (path on disk, display name) tuples.
+            pcm_sample_rate: Sample rate of raw PCM input files.
+
+        Yields:
+            Event dictionaries of type "segment", "file_done" or "error".
+        """
+        events = self._manager.Queue()
+        futures = {
+            self._executor.submit(_transcribe_file, path, name, pcm_sample_rate, events): name
+            for path, name in files
+        }
+        pending = set(futures)
+
+        while pending or not events.empty():
+            try:
+                yield events.get(timeout=0.1)
+            except queue.Empty:
+                pass
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                if future.exception() is not None:
+                    yield {"type": "error", "file": futures[future], "error": str(future.exception())}
+
+    def shutdown(self) -> None:
+        """Stops the worker processes."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
+        logger.info("👂📦 Batch transcriber shut down")
+
+
+# Global batch transcriber instance, created on first use
+_global_batch_transcriber: Optional[BatchTranscriber] = None
+_global_batch_lock = threading.Lock()
+
+def get_batch_transcriber() -> BatchTranscriber:
+    """Get the global batch transcriber instance (starts the process pool on first call)."""
+    global _global_batch_transcriber
+    with _global_batch_lock:
+        if _global_batch_transcriber is None:
+            _global_batch_transcriber = BatchTranscriber()
+        return _global_batch_transcriber
+
+def shutdown_batch_transcriber() -> None:
+    """Shut down the global batch transcriber if it was started."""
+    global _global_batch_transcriber
+    with _global_batch_lock:
+        if _global_batch_transcriber is not None:
+            _global_batch_transcriber.shutdown()
+            _global_batch_transcriber = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe WAV/PCM files with the live Whisper settings.")
+    parser.add_argument("files", nargs="+", help="WAV files or raw 16-bit mono PCM files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU cores)")
+    parser.add_argument("--pcm-sample-rate", type=int, default=TARGET_SAMPLE_RATE, help="sample rate of raw PCM files")
+    parser.add_argument("--device", default="cpu", help="device for worker models (cpu or cuda)")
+    parser.add_argument("--compute-type", default="int8", help="CTranslate2 compute type")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    transcriber = BatchTranscriber(max_workers=args.workers, device=args.device, compute_type=args.compute_type)
+    try:
+        # One JSON event per line on stdout, as results finish
+        for event in transcriber.transcribe_files([(p, p) for p in args.files], args.pcm_sample_rate):
+            print(json.dumps(event), flush=True)
+    finally:
+        transcriber.shutdown()
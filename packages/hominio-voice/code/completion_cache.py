@@ -0,0 +1,276 @@
+# completion_cache.py
+import collections
+import hashlib
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Process-wide LRU size (entries)
+COMPLETION_CACHE_SIZE = int(os.getenv("TURN_DETECTION_CACHE_SIZE", 8192))
+# Optional on-disk table of precomputed probabilities; empty disables it
+COMPLETION_CACHE_TABLE = os.getenv(
+    "TURN_DETECTION_CACHE_TABLE",
+    os.path.expanduser("~/.cache/hominio/completion_probabilities.bin"),
+)
+
+# Short utterances users produce constantly, precomputed at startup (raw text; callers
+# pass them through the same preprocessing as live text before prewarming)
+COMMON_PHRASES = [
+    "yes", "no", "okay", "ok", "yeah", "yep", "nope", "sure", "right", "alright",
+    "thank you", "thanks", "thank you so much", "thanks a lot", "please", "sorry",
+    "hello", "hi", "hey", "good morning", "good night", "goodbye", "bye",
+    "I see", "got it", "of course", "exactly", "absolutely", "maybe", "I dont know",
+    "what", "why", "how", "really", "wait", "hmm", "um", "uh", "so", "and", "but",
+    "I think", "I want", "can you", "could you", "tell me", "what about", "let me think",
+    "thats great", "sounds good", "that makes sense", "never mind", "go on", "continue",
+    "stop", "again", "one more time", "what do you mean", "how are you", "Im fine",
+]
+
+_TABLE_MAGIC = b"HVCP1\x00\x00\x00"
+_TABLE_HEADER = struct.Struct("<8sQ")  # magic, number of slots
+_TABLE_SLOT = struct.Struct("<Qf")     # 64-bit key hash (0 = empty), probability
+
+
+def normalize_key(cleaned_for_model: str) -> str:
+    """Normalizes model-ready text into a cache key (whitespace-collapsed)."""
+    return " ".join(cleaned_for_model.split())
+
+
+def _key_hash(key: str) -> int:
+    """Stable 64-bit hash of a cache key (never 0, which marks empty slots)."""
+    value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1
+
+
+class MmapProbabilityTable:
+    """
+    Read-only, memory-mapped open-addressing hash table of key hash → probability.
+
+    Lookups hash the key and probe 12-byte slots directly in the mapped file,
+    so the table costs no heap memory and is shared by the page cache between
+    processes.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Maps an existing table file.
+
+        Args:
+            path: Table file written by `MmapProbabilityTable.build`.
+
+        Raises:
+            ValueError: If the file is not a probability table.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.slots = _TABLE_HEADER.unpack_from(self._mm, 0)
+        if magic != _TABLE_MAGIC or self.slots == 0:
+            self.close()
+            raise ValueError(f"{path} is not a completion probability table")
+
+    @staticmethod
+    def build(path: str, entries: Dict[str, float]) -> None:
+        """
+        Writes a table file with 2x slot headroom and linear probing.
+
+        Args:
+            path: Destination file path.
+            entries: Mapping of cache key to probability.
+        """
+        slots = 1
+        while slots < max(2 * len(entries), 16):
+            slots *= 2
+        table = bytearray(_TABLE_HEADER.size + slots * _TABLE_SLOT.size)
+        _TABLE_HEADER.pack_into(table, 0, _TABLE_MAGIC, slots)
+        for key, prob in entries.items():
+            h = _key_hash(key)
+            index = h & (slots - 1)
+            while True:
+                offset = _TABLE_HEADER.size + index * _TABLE_SLOT.size
+                existing, _ = _TABLE_SLOT.unpack_from(table, offset)
+                if existing in (0, h):
+                    _TABLE_SLOT.pack_into(table, offset, h, prob)
+                    break
+                index = (index + 1) & (slots - 1)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(table)
+        os.replace(tmp_path, path)  # Atomic swap, readers keep their old mapping
+
+    def get(self, key: str) -> Optional[float]:
+        """Returns the stored probability for `key`, or None."""
+        h = _key_hash(key)
+        index = h & (self.slots - 1)
+        for _ in range(self.slots):
+            stored, prob = _TABLE_SLOT.unpack_from(self._mm, _TABLE_HEADER.size + index * _TABLE_SLOT.size)
+            if stored == h:
+                return prob
+            if stored == 0:
+                return None
+            index = (index + 1) & (self.slots - 1)
+        return None
+
+    def close(self) -> None:
+        """Unmaps the table."""
+        self._mm.close()
+        self._file.close()
+
+
+class CompletionProbabilityCache:
+    """
+    Process-wide, thread-safe LRU of sentence completion probabilities.
+
+    Keyed by the normalized model-ready text (`cleaned_for_model`), so all
+    TurnDetection instances share results for the short utterances users
+    repeat across sessions. An optional memory-mapped on-disk table serves as
+    a second tier and is prewarmed from `COMMON_PHRASES` at startup.
+    """
+
+    def __init__(self, max_size: int = COMPLETION_CACHE_SIZE, table_path: Optional[str] = COMPLETION_CACHE_TABLE) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            max_size: Maximum number of in-memory entries.
+            table_path: Path of the on-disk table, or None/empty to disable it.
+        """
+        self.max_size = max_size
+        self.table_path = table_path or None
+        self._base_table_path = self.table_path
+        self.table: Optional[MmapProbabilityTable] = None
+        self._entries: collections.OrderedDict[str, float] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "table_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, cleaned_for_model: str) -> Optional[float]:
+        """
+        Looks up a probability, promoting on-disk hits into the LRU.
+
+        Args:
+            cleaned_for_model: The model-ready text.
+
+        Returns:
+            The cached probability, or None on a miss.
+        """
+        key = normalize_key(cleaned_for_model)
+        with self._lock:
+            prob = self._entries.get(key)
+            if prob is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return prob
+            if self.table is not None:
+                prob = self.table.get(key)
+                if prob is not None:
+                    self.stats["table_hits"] += 1
+                    self._put_locked(key, prob)
+                    return prob
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, cleaned_for_model: str, prob: float) -> None:
+        """Stores a probability computed by the model."""
+        with self._lock:
+            self._put_locked(normalize_key(cleaned_for_model), prob)
+
+    def _put_locked(self, key: str, prob: float) -> None:
+        """Inserts into the LRU and evicts the oldest entry if full (lock held)."""
+        self._entries[key] = prob
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def variant_table_path(self, variant: str) -> Optional[str]:
+        """
+        Returns the on-disk table path for one model variant.
+
+        Probabilities differ between models and backends (torch vs ONNX int8),
+        so each variant gets its own file, e.g.
+        `completion_probabilities.onnx-int8-KoljaB_SentenceFinishedClassification.bin`.
+
+        Args:
+            variant: Backend and model identifier; empty keeps the configured path.
+        """
+        if self._base_table_path is None or not variant:
+            return self._base_table_path
+        slug = re.sub(r"[^A-Za-z0-9.-]+", "_", variant).strip("_")
+        root, ext = os.path.splitext(self._base_table_path)
+        return f"{root}.{slug}{ext}"
+
+    def prewarm(self, predict: Callable[[str], float], phrases: Iterable[str] = COMMON_PHRASES, variant: str = "") -> None:
+        """
+        Ensures probabilities for `phrases` are available without inference.
+
+        Maps the variant's on-disk table if present, computes only the phrases
+        it lacks with `predict`, and rewrites the table if anything was added.
+        Without a table path, the phrases are computed straight into the LRU.
+
+        Args:
+            predict: Uncached model inference for a model-ready sentence.
+            phrases: Model-ready phrases to precompute (as produced for live text).
+            variant: Backend and model identifier selecting the table file.
+        """
+        keys = [normalize_key(p) for p in phrases if p.strip()]
+        self.table_path = self.variant_table_path(variant)
+
+        if self.table_path is None:
+            for key in keys:
+                if key not in self._entries:
+                    self.put(key, predict(key))
+            logger.info(f"🎤🔥 Completion cache prewarmed with {len(keys)} phrases (in memory)")
+            return
+
+        existing: Dict[str, float] = {}
+        if os.path.exists(self.table_path):
+            try:
+                table = MmapProbabilityTable(self.table_path)
+                existing = {key: prob for key in keys if (prob := table.get(key)) is not None}
+                table.close()
+            except Exception as e:
+                logger.warning(f"🎤⚠️ Ignoring unreadable completion table {self.table_path}: {e}")
+
+        missing = [key for key in keys if key not in existing]
+        if missing:
+            for key in missing:
+                existing[key] = predict(key)
+            MmapProbabilityTable.build(self.table_path, existing)
+
+        with self._lock:
+            if self.table is not None:
+                self.table.close()
+            self.table = MmapProbabilityTable(self.table_path)
+        logger.info(f"🎤🔥 Completion table ready at {self.table_path} "
+                    f"({len(existing)} phrases, {len(missing)} computed)")
+
+    def clear(self) -> None:
+        """Drops all in-memory entries (the on-disk table is kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, hit rate and current size."""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["table_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "hit_rate": (self.stats["hits"] + self.stats["table_hits"]) / lookups if lookups else 0.0,
+            }
+
+
+# Global completion probability cache instance
+_global_completion_cache = CompletionProbabilityCache()
+
+def get_completion_cache() -> CompletionProbabilityCache:
+    """Get the global completion probability cache instance."""
+    return _global_completion_cache
@@ -0,0 +1,243 @@
+# conversation_history.py
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from thread_manager import create_managed_thread
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    logger.debug("🗣️ℹ️ tiktoken not available - estimating history tokens from characters")
+
+# Tokens of verbatim history sent with each request (summary included)
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 1500))
+# After folding, the verbatim part is brought down to this fraction of the budget
+HISTORY_FOLD_TARGET = float(os.getenv("HISTORY_FOLD_TARGET", 0.6))
+# Upper bound for the running summary itself
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", 300))
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a spoken conversation between a user and an assistant. "
+    "Merge the previous summary with the new messages into one concise summary in plain prose. "
+    "Keep names, facts, preferences, open questions and commitments; drop small talk. "
+    f"Stay under {HISTORY_SUMMARY_MAX_TOKENS // 4 * 3} words. Reply with the summary only."
+)
+
+MESSAGE_OVERHEAD_TOKENS = 4 # Role and separators per chat message
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens of `text`.
+
+    Uses tiktoken's cl100k_base encoding when available (close enough to the
+    Llama tokenizer for budgeting), otherwise estimates 4 characters per token.
+    """
+    global _encoding
+    if TIKTOKEN_AVAILABLE:
+        with _encoding_lock:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+class ConversationHistory:
+    """
+    Token-budgeted chat history with a running summary of older turns.
+
+    Token counts are computed once per message on append. When the verbatim
+    messages exceed `token_budget`, the oldest ones are folded into the
+    summary by a background LLM call started at the end of a turn, so the
+    next request never waits for summarization. Until the fold completes,
+    `messages()` leaves out whatever does not fit the budget, which keeps the
+    prompt size bounded at all times.
+
+    Behaves like the plain list it replaces for `append`, `len`, iteration
+    and indexing.
+    """
+
+    def __init__(self, summarizer_llm: Optional[Any] = None, token_budget: int = HISTORY_TOKEN_BUDGET,
+                 fold_target: float = HISTORY_FOLD_TARGET) -> None:
+        """
+        Initializes an empty history.
+
+        Args:
+            summarizer_llm: `LLM` instance used for summaries (its system prompt
+                should be `SUMMARY_SYSTEM_PROMPT`). None disables summarization,
+                older turns are then simply dropped from the prompt.
+            token_budget: Maximum tokens of summary plus verbatim messages per request.
+            fold_target: Fraction of the budget left verbatim after a fold.
+        """
+        self.summarizer_llm = summarizer_llm
+        self.token_budget = token_budget
+        self.fold_target = fold_target
+
+        self._lock = threading.Lock()
+        self._messages: List[Dict[str, str]] = []
+        self._tokens: List[int] = []
+        self.summary: Optional[str] = None
+        self.summary_tokens: int = 0
+        self._epoch: int = 0 # Bumped by clear(), invalidates running folds
+        self._fold_thread = None
+        self.stats: Dict[str, Any] = {"folds": 0, "folded_messages": 0, "fold_failures": 0, "last_fold_s": None}
+
+    # --- List interface ---
+
+    def append(self, message: Dict[str, str]) -> None:
+        """
+        Adds a message and counts its tokens.
+
+        An assistant message ends a turn; if the history is over budget, a
+        background fold is started.
+        """
+        tokens = count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+        with self._lock:
+            self._messages.append(message)
+            self._tokens.append(tokens)
+        if message.get("role") == "assistant":
+            self._maybe_fold()
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        with self._lock:
+            return iter(list(self._messages))
+
+    def __getitem__(self, index):
+        with self._lock:
+            return self._messages[index]
+
+    def clear(self) -> None:
+        """Forgets all messages and the summary."""
+        with self._lock:
+            self._messages.clear()
+            self._tokens.clear()
+            self.summary = None
+            self.summary_tokens = 0
+            self._epoch += 1
+
+    def trim(self, keep: int) -> None:
+        """Drops all but the newest `keep` messages (memory pressure); the summary is kept."""
+        with self._lock:
+            if len(self._messages) > keep:
+                del self._messages[:-keep]
+                del self._tokens[:-keep]
+                self._epoch += 1
+
+    # --- Prompt construction ---
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens of the summary plus all verbatim messages."""
+        with self._lock:
+            return self.summary_tokens + sum(self._tokens)
+
+    def messages(self) -> List[Dict[str, str]]:
+        """
+        Returns the history to send with a request, within the token budget.
+
+        The summary (if any) comes first as a system message, followed by the
+        newest messages that fit the remaining budget.
+        """
+        with self._lock:
+            budget = self.token_budget - self.summary_tokens
+            start = len(self._messages)
+            while start > 0 and budget - self._tokens[start - 1] >= 0:
+                start -= 1
+                budget -= self._tokens[start]
+            recent = list(self._messages[start:])
+            summary = self.summary
+
+        if summary:
+            return [{"role": "system", "content": f"Summary of the earlier conversation: {summary}"}] + recent
+        return recent
+
+    # --- Background summarization ---
+
+    def _maybe_fold(self) -> None:
+        """Starts a fold of the oldest messages if the history is over budget."""
+        with self._lock:
+            if self.summary_tokens + sum(self._tokens) <= self.token_budget:
+                return
+            if self._fold_thread is not None and self._fold_thread.thread.is_alive():
+                return
+
+            # Fold the oldest messages until the verbatim part fits the target
+            target = self.token_budget * self.fold_target - self.summary_tokens
+            verbatim = sum(self._tokens)
+            count = 0
+            while count < len(self._messages) - 1 and verbatim > target:
+                verbatim -= self._tokens[count]
+                count += 1
+            if count == 0:
+                return
+            to_fold = list(self._messages[:count])
+            epoch, previous_summary = self._epoch, self.summary
+
+        if self.summarizer_llm is None:
+            self._apply_fold(epoch, count, previous_summary)
+            return
+
+        self._fold_thread = create_managed_thread(
+            target=self._fold,
+            name="HistorySummarizer",
+            args=(epoch, count, previous_summary, to_fold),
+            daemon=True,
+        )
+
+    def _fold(self, epoch: int, count: int, previous_summary: Optional[str], to_fold: List[Dict[str, str]]) -> None:
+        """Thread target: summarizes `to_fold` into the running summary."""
+        started = time.time()
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in to_fold)
+        prompt = (f"Previous summary: {previous_summary or '(none)'}\n\n"
+                  f"New messages:\n{transcript}\n\nUpdated summary:")
+        try:
+            summary = "".join(self.summarizer_llm.generate(text=prompt, use_system_prompt=True)).strip()
+        except Exception as e:
+            self.stats["fold_failures"] += 1
+            logger.warning(f"🗣️📝💥 History summarization failed, retrying next turn: {e}")
+            return
+        if not summary:
+            self.stats["fold_failures"] += 1
+            return
+        if self._apply_fold(epoch, count, summary):
+            self.stats["last_fold_s"] = time.time() - started
+            logger.info(f"🗣️📝 Folded {count} messages into summary in {self.stats['last_fold_s']:.2f}s "
+                        f"({self.summary_tokens} summary tokens, {self.total_tokens} total)")
+
+    def _apply_fold(self, epoch: int, count: int, summary: Optional[str]) -> bool:
+        """Replaces the oldest `count` messages by `summary` unless the history changed underneath."""
+        with self._lock:
+            if epoch != self._epoch:
+                logger.debug("🗣️📝 History changed during summarization, discarding fold")
+                return False
+            del self._messages[:count]
+            del self._tokens[:count]
+            self.summary = summary
+            self.summary_tokens = count_tokens(summary) + MESSAGE_OVERHEAD_TOKENS if summary else 0
+            self.stats["folds"] += 1
+            self.stats["folded_messages"] += count
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns message and token counts and fold counters."""
+        with self._lock:
+            return {
+                **self.stats,
+                "messages": len(self._messages),
+                "verbatim_tokens": sum(self._tokens),
+                "summary_tokens": self.summary_tokens,
+                "token_budget": self.token_budget,
+            }
@@ -0,0 +1,229 @@
+# filler_audio.py
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from queue import Empty, Queue
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Play a filler when the predicted output latency (LLM TTFT + TTS TTFA) exceeds this
+FILLER_LATENCY_THRESHOLD_MS = float(os.getenv("FILLER_LATENCY_THRESHOLD_MS", 700))
+# Silence after the user's turn end before a filler starts (speculation may already have audio)
+FILLER_MIN_WAIT_S = float(os.getenv("FILLER_MIN_WAIT_S", 0.25))
+# Predicted latencies above this use a "thinking" filler instead of a backchannel
+FILLER_THINKING_MS = float(os.getenv("FILLER_THINKING_MS", 1500))
+# "0" disables fillers
+USE_FILLERS = os.getenv("FILLERS", "1") != "0"
+
+BACKCHANNEL_PHRASES = ["Mm-hm.", "Okay.", "Right.", "Sure."]
+THINKING_PHRASES = ["Let me think.", "Hmm, let me see.", "Good question.", "One moment."]
+
+SAMPLE_RATE = 24000
+CLIP_CHUNK_SAMPLES = 1024      # ~43 ms per chunk, the granularity of cancellation
+FADE_SAMPLES = 480             # 20 ms fade-out at handover
+SILENCE_THRESHOLD = 300        # int16 amplitude treated as silence when trimming
+LEAD_S = 0.1                   # Audio sent ahead of real time
+
+
+@dataclass
+class FillerClip:
+    """One pre-synthesized filler phrase."""
+    text: str
+    kind: str                  # "backchannel" or "thinking"
+    pcm: np.ndarray            # int16, 24 kHz mono, silence-trimmed
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / SAMPLE_RATE
+
+
+def _trim_silence(pcm: np.ndarray) -> np.ndarray:
+    """Removes leading and trailing silence (the engine pads sentences)."""
+    loud = np.flatnonzero(np.abs(pcm.astype(np.int32)) > SILENCE_THRESHOLD)
+    if len(loud) == 0:
+        return pcm[:0]
+    tail = int(0.03 * SAMPLE_RATE) # Keep a short natural decay
+    return pcm[loud[0]:min(len(pcm), loud[-1] + tail)]
+
+
+class FillerLibrary:
+    """
+    Process-wide store of filler and backchannel clips, synthesized once per voice.
+    """
+
+    def __init__(self) -> None:
+        self._clips: Dict[str, List[FillerClip]] = {}
+        self._lock = threading.Lock()
+
+    def ensure(self, audio: Any) -> List[FillerClip]:
+        """
+        Returns the clips for the voice of `audio`, synthesizing them on first use.
+
+        Args:
+            audio: The session's `AudioProcessor` (its voice is used).
+        """
+        voice = getattr(audio, "voice", "")
+        with self._lock:
+            clips = self._clips.get(voice)
+            if clips is not None:
+                return clips
+
+            started = time.time()
+            clips = []
+            for kind, phrases in (("backchannel", BACKCHANNEL_PHRASES), ("thinking", THINKING_PHRASES)):
+                for text in phrases:
+                    chunks: Queue = Queue()
+                    try:
+                        if not audio.synthesize(text, chunks, threading.Event(), "[filler]"):
+                            continue
+                    except Exception as e:
+                        logger.warning(f"🗣️💬💥 Failed to synthesize filler '{text}': {e}")
+                        continue
+                    parts = []
+                    while True:
+                        try:
+                            parts.append(chunks.get_nowait())
+                        except Empty:
+                            break
+                    pcm = _trim_silence(np.frombuffer(b"".join(parts), dtype=np.int16))
+                    if len(pcm):
+                        clips.append(FillerClip(text=text, kind=kind, pcm=pcm))
+            self._clips[voice] = clips
+        logger.info(f"🗣️💬 Synthesized {len(clips)} filler clips for voice '{voice}' in {time.time() - started:.2f}s")
+        return clips
+
+
+class FillerPlayback:
+    """
+    Real-time paced playout of one clip, so it can be cut off at any chunk.
+    """
+
+    def __init__(self, clip: FillerClip) -> None:
+        self.clip = clip
+        self.position = 0       # Samples already sent
+        self.started = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.position >= len(self.clip.pcm)
+
+    def next_chunk(self) -> Optional[bytes]:
+        """Returns the next chunk once it is due (at most `LEAD_S` ahead of real time)."""
+        if self.done or self.position / SAMPLE_RATE > time.time() - self.started + LEAD_S:
+            return None
+        chunk = self.clip.pcm[self.position:self.position + CLIP_CHUNK_SAMPLES]
+        self.position += len(chunk)
+        return chunk.tobytes()
+
+    def fade_out(self) -> Optional[bytes]:
+        """Ends playback with a short fade of the upcoming samples (no click at the cut)."""
+        if self.done:
+            return None
+        tail = self.clip.pcm[self.position:self.position + FADE_SAMPLES].astype(np.float32)
+        self.position = len(self.clip.pcm)
+        tail *= np.linspace(1.0, 0.0, len(tail), dtype=np.float32)
+        return tail.astype(np.int16).tobytes()
+
+
+class FillerPolicy:
+    """
+    Decides per turn whether to mask the answer latency with a filler clip.
+
+    A filler starts once the user's turn has ended, no answer audio is ready
+    after `min_wait_s`, and the predicted output latency exceeds
+    `threshold_ms`. At most one filler is played per turn; it is handed over
+    to the answer with a short fade as soon as answer audio arrives, and
+    dropped immediately on interruption or abort.
+    """
+
+    def __init__(self, clips: List[FillerClip], threshold_ms: float = FILLER_LATENCY_THRESHOLD_MS,
+                 min_wait_s: float = FILLER_MIN_WAIT_S, thinking_ms: float = FILLER_THINKING_MS) -> None:
+        """
+        Args:
+            clips: The session voice's filler clips.
+            threshold_ms: Minimum predicted latency that warrants a filler.
+            min_wait_s: Silence after the turn end before a filler may start.
+            thinking_ms: Predicted latency from which a "thinking" filler is chosen.
+        """
+        self.clips = clips
+        self.threshold_ms = threshold_ms
+        self.min_wait_s = min_wait_s
+        self.thinking_ms = thinking_ms
+        self.playback: Optional[FillerPlayback] = None
+        self._turn_end: Optional[float] = None
+        self._played_this_turn = False
+        self._last_text: Optional[str] = None
+        self.stats: Dict[str, int] = {"played": 0, "handovers": 0, "cancelled": 0}
+
+    @property
+    def playing(self) -> bool:
+        return self.playback is not None and not self.playback.done
+
+    def poll(self, predicted_latency_ms: float) -> Optional[bytes]:
+        """
+        Called while the turn has ended but no answer audio is available.
+
+        Args:
+            predicted_latency_ms: The pipeline's predicted output latency.
+
+        Returns:
+            The next filler chunk to send, or None.
+        """
+        now = time.time()
+        if self._turn_end is None:
+            self._turn_end = now
+        if self.playback is None:
+            if (self._played_this_turn or not self.clips or predicted_latency_ms < self.threshold_ms
+                    or now - self._turn_end < self.min_wait_s):
+                return None
+            self.playback = FillerPlayback(self._choose(predicted_latency_ms))
+            self._played_this_turn = True
+            self.stats["played"] += 1
+            logger.info(f"🗣️💬 Playing filler '{self.playback.clip.text}' (predicted latency {predicted_latency_ms:.0f}ms)")
+        return self.playback.next_chunk()
+
+    def _choose(self, predicted_latency_ms: float) -> FillerClip:
+        """Picks a clip of the fitting kind, avoiding an immediate repeat."""
+        kind = "thinking" if predicted_latency_ms >= self.thinking_ms else "backchannel"
+        candidates = [c for c in self.clips if c.kind == kind] or self.clips
+        if len(candidates) > 1:
+            candidates = [c for c in candidates if c.text != self._last_text]
+        clip = random.choice(candidates)
+        self._last_text = clip.text
+        return clip
+
+    def handover(self) -> Optional[bytes]:
+        """Ends a playing filler before answer audio; returns the fade-out chunk to send first."""
+        if not self.playing:
+            self.playback = None
+            return None
+        self.stats["handovers"] += 1
+        tail = self.playback.fade_out()
+        self.playback = None
+        return tail
+
+    def cancel(self) -> None:
+        """Drops a playing filler without fade (interruption, abort)."""
+        if self.playing:
+            self.stats["cancelled"] += 1
+        self.playback = None
+
+    def reset(self) -> None:
+        """Prepares for the next turn."""
+        self.cancel()
+        self._turn_end = None
+        self._played_this_turn = False
+
+
+# Global filler library instance
+_global_filler_library = FillerLibrary()
+
+def get_filler_library() -> FillerLibrary:
+    """Get the global filler library instance."""
+    return _global_filler_library
@@ -0,0 +1,222 @@
+# generation_timeline.py
+import bisect
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Lifecycle events of a generation, in their usual order
+TIMELINE_EVENTS = (
+    "created",
+    "llm_first_token",
+    "quick_boundary",
+    "quick_tts_first_chunk",
+    "final_tts_start",
+    "first_chunk_sent",
+    "finished",
+    "aborted",
+)
+
+# Stage name -> (start event, end event); recorded once the end event is marked
+TIMELINE_STAGES: Dict[str, Tuple[str, str]] = {
+    "llm_ttft": ("created", "llm_first_token"),
+    "quick_boundary": ("created", "quick_boundary"),
+    "quick_tts_ttfa": ("quick_boundary", "quick_tts_first_chunk"),
+    "first_audio": ("created", "quick_tts_first_chunk"),
+    "final_tts_start": ("created", "final_tts_start"),
+    "first_chunk_sent": ("created", "first_chunk_sent"),
+    "total": ("created", "finished"),
+    "abort": ("created", "aborted"),
+}
+
+# Upper bucket bounds (ms); the last bucket is open-ended
+HISTOGRAM_BOUNDS_MS = (10, 25, 50, 100, 200, 350, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+RECENT_TIMELINES = 20
+
+
+# Abort reason prefix -> fixed code. Reasons may carry details (ids, client text), so
+# only the code is recorded; it keeps the outcome counters bounded and free of user data.
+ABORT_REASON_CODES: Tuple[Tuple[str, str], ...] = (
+    ("new request", "superseded"),
+    ("check_abort", "superseded"),
+    ("process_prepare_generation", "superseded"),
+    ("safe_abort_running_syntheses", "interrupted"),
+    ("server.py abort_generations", "interrupted"),
+    ("reset", "reset"),
+    ("shutdown", "shutdown"),
+    ("critical_memory", "critical_memory"),
+    ("llm stream stopped", "llm_stopped"),
+    ("quick tts stopped", "quick_tts_stopped"),
+    ("final tts stopped", "final_tts_stopped"),
+    ("task cancelled", "cancelled"),
+    ("generation failed", "failed"),
+    ("benchmark", "benchmark"),
+)
+
+
+def abort_reason_code(reason: Optional[str]) -> str:
+    """Fixed code of an abort reason ("unknown" if empty, "other" if not listed in `ABORT_REASON_CODES`)."""
+    if not reason:
+        return "unknown"
+    for prefix, code in ABORT_REASON_CODES:
+        if reason.startswith(prefix):
+            return code
+    return "other"
+
+
+class GenerationTimeline:
+    """
+    Monotonic timestamps of one generation's lifecycle events.
+
+    Each event is recorded once (the first mark wins). If the timeline is
+    attached to a `TimelineStats`, every stage is added to its histograms as
+    soon as the stage's end event is marked.
+    """
+    __slots__ = TIMELINE_EVENTS + ("abort_reason", "_stats")
+
+    def __init__(self, stats: Optional["TimelineStats"] = None) -> None:
+        """
+        Starts the timeline (marks "created").
+
+        Args:
+            stats: Aggregator the stages are reported to.
+        """
+        for event in TIMELINE_EVENTS:
+            setattr(self, event, None)
+        self.abort_reason: Optional[str] = None
+        self._stats = stats
+        self.mark("created")
+
+    def mark(self, event: str) -> None:
+        """Records `event` now, unless it was recorded before (finished and aborted exclude each other)."""
+        if getattr(self, event) is not None:
+            return
+        if event in ("finished", "aborted") and self.ended:
+            return
+        setattr(self, event, time.monotonic())
+        if self._stats is not None:
+            self._stats.on_event(self, event)
+
+    @property
+    def ended(self) -> bool:
+        return self.finished is not None or self.aborted is not None
+
+    def abort(self, reason: str) -> None:
+        """Records the abort and the code of its reason (ignored once the generation ended)."""
+        if self.ended:
+            return
+        self.abort_reason = abort_reason_code(reason)
+        self.mark("aborted")
+
+    def duration_ms(self, stage: str) -> Optional[float]:
+        """Milliseconds between the start and end event of `stage`, or None if not reached."""
+        start_event, end_event = TIMELINE_STAGES[stage]
+        start, end = getattr(self, start_event), getattr(self, end_event)
+        if start is None or end is None:
+            return None
+        return (end - start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Event offsets from creation (ms) and the abort reason code."""
+        created = self.created
+        return {
+            **{event: None if getattr(self, event) is None else round((getattr(self, event) - created) * 1000, 1)
+               for event in TIMELINE_EVENTS[1:]},
+            "abort_reason": self.abort_reason,
+        }
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (ms) with count, sum, min and max."""
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value_ms: float) -> None:
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile `q` (capped at the observed max)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                bound = HISTOGRAM_BOUNDS_MS[index] if index < len(HISTOGRAM_BOUNDS_MS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}": count for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.buckets)}
+        buckets["inf"] = self.buckets[-1]
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else None,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class TimelineStats:
+    """
+    Per-session aggregation of generation timelines.
+
+    Keeps one latency histogram per stage, outcome counts (finished, and
+    aborted per reason) and the most recent timelines.
+    """
+
+    def __init__(self, recent: int = RECENT_TIMELINES) -> None:
+        """
+        Args:
+            recent: Number of completed timelines kept for inspection.
+        """
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in TIMELINE_STAGES}
+        self.outcomes: Counter = Counter()
+        self.recent: Deque[GenerationTimeline] = deque(maxlen=recent)
+
+    def on_event(self, timeline: GenerationTimeline, event: str) -> None:
+        """Records the stages ending at `event` (called by `GenerationTimeline.mark`)."""
+        with self._lock:
+            for stage, (_, end_event) in TIMELINE_STAGES.items():
+                if end_event == event:
+                    duration = timeline.duration_ms(stage)
+                    if duration is not None:
+                        self.histograms[stage].record(duration)
+            if event == "finished":
+                self.outcomes["finished"] += 1
+                self.recent.append(timeline)
+            elif event == "aborted":
+                self.outcomes[f"aborted:{timeline.abort_reason}"] += 1
+                self.recent.append(timeline)
+
+    def reset(self) -> None:
+        """Drops all recorded data (new session)."""
+        with self._lock:
+            for stage in self.histograms:
+                self.histograms[stage] = LatencyHistogram()
+            self.outcomes.clear()
+            self.recent.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns the stage histograms, outcome counts and recent timelines."""
+        with self._lock:
+            return {
+                "stages": {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+                "outcomes": dict(self.outcomes),
+                "recent": [timeline.to_dict() for timeline in self.recent],
+            }
@@ -0,0 +1,325 @@
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from colors import Colors
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE: int = 16000
+
+# A decoded word: (text, absolute start seconds, absolute end seconds)
+Word = Tuple[str, float, float]
+
+
+def _normalize_word(word: str) -> str:
+    """
+    Normalizes a single word for agreement checks between hypotheses.
+
+    Lowercases the word and strips everything except letters, digits and
+    apostrophes, so "Hello," and "hello" are considered the same token.
+
+    Args:
+        word: The raw word as returned by Whisper (may carry punctuation).
+
+    Returns:
+        The normalized word (may be empty for pure punctuation tokens).
+    """
+    return re.sub(r"[^a-z0-9']", "", word.lower())
+
+
+_shared_models: Dict[str, Any] = {}
+_model_loading_lock = threading.Lock()
+
+
+def get_shared_whisper_model(model_name: str) -> Any:
+    """
+    Returns a process-wide faster-whisper model, loading it on first use (thread-safe).
+
+    Args:
+        model_name: faster-whisper model size or path (e.g. "base.en", "tiny.en").
+
+    Returns:
+        The shared `WhisperModel` instance for `model_name`.
+    """
+    model = _shared_models.get(model_name)
+    if model is not None:
+        return model
+
+    with _model_loading_lock:
+        if model_name not in _shared_models:
+            import torch
+            from faster_whisper import WhisperModel
+
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            compute_type = "float16" if device == "cuda" else "default"
+            logger.info(f"👂🧩 Loading shared Whisper model '{model_name}' on {device}")
+            _shared_models[model_name] = WhisperModel(
+                model_size_or_path=model_name,
+                device=device,
+                compute_type=compute_type,
+            )
+        return _shared_models[model_name]
+
+
+class IncrementalDecoder:
+    """
+    Incremental real-time decoder that only re-transcribes a sliding tail window.
+
+    RealtimeSTT's real-time pass decodes the entire growing utterance on every
+    cycle, so its cost grows quadratically with utterance length. This decoder
+    keeps a committed transcript prefix made of words that two consecutive
+    hypotheses agreed on (local agreement), and only decodes the audio after
+    the committed region, passing the committed text as the Whisper prompt.
+    The stitched committed prefix + unstable tail is returned as the partial
+    transcription.
+
+    Whisper models are loaded once per process and shared by all instances
+    (see `get_shared_whisper_model`).
+    """
+    # Minimum audio after the window start worth decoding
+    _MIN_WINDOW_S: float = 0.3
+    # Tolerance when dropping re-decoded words that belong to the committed region
+    _COMMIT_OVERLAP_TOLERANCE_S: float = 0.1
+    # Max n-gram length checked when removing duplicated words at the commit boundary
+    _MAX_BOUNDARY_NGRAM: int = 5
+
+    def __init__(
+            self,
+            model_name: str = "base.en",
+            language: str = "en",
+            beam_size: int = 3,
+            initial_prompt: Optional[str] = None,
+            tail_window_s: float = 6.0,
+            prompt_max_chars: int = 200,
+        ) -> None:
+        """
+        Initializes the IncrementalDecoder.
+
+        Args:
+            model_name: faster-whisper model size or path used for real-time decoding.
+            language: Language code passed to Whisper.
+            beam_size: Beam size for the tail decodes.
+            initial_prompt: Prompt used while no committed text exists yet.
+            tail_window_s: Once the decoded window grows beyond this many seconds,
+                           its start slides forward to the end of the committed prefix.
+            prompt_max_chars: Maximum number of committed-text characters used as prompt.
+        """
+        self.model_name = model_name
+        self.language = language
+        self.beam_size = beam_size
+        self.initial_prompt = initial_prompt
+        self.tail_window_s = tail_window_s
+        self.prompt_max_chars = prompt_max_chars
+
+        self._lock = threading.Lock()
+        self._generation: int = 0
+        self._committed: List[Word] = []
+        self._tail: List[Word] = []
+        self._window_start_s: float = 0.0
+        self._committed_end_s: float = 0.0
+        self.decoded_audio_s: float = 0.0
+
+        self.last_window_s: float = 0.0
+
+        self.model = get_shared_whisper_model(model_name)
+
+    # --- State ---
+
+    def reset(self) -> None:
+        """Clears committed and tail state; call at the start of every new utterance."""
+        with self._lock:
+            self._generation += 1
+            self._committed = []
+            self._tail = []
+            self._window_start_s = 0.0
+            self._committed_end_s = 0.0
+            self.decoded_audio_s = 0.0
+
+    @property
+    def committed_text(self) -> str:
+        """Text of the committed (stable) prefix."""
+        return " ".join(w[0] for w in self._committed)
+
+    @property
+    def tail_text(self) -> str:
+        """Text of the current unstable tail hypothesis."""
+        return " ".join(w[0] for w in self._tail)
+
+    @property
+    def text(self) -> str:
+        """Stitched committed prefix + unstable tail."""
+        return " ".join(w[0] for w in self._committed + self._tail)
+
+    # --- Decoding ---
+
+    def _build_prompt(self) -> Optional[str]:
+        """
+        Builds the Whisper prompt from committed words that lie before the window.
+
+        Committed words inside the current window are decoded again and must not
+        be duplicated in the prompt. Falls back to `initial_prompt` when nothing
+        has scrolled out of the window yet.
+        """
+        outside = [w[0] for w in self._committed if w[2] <= self._window_start_s]
+        if not outside:
+            return self.initial_prompt
+        prompt = " ".join(outside)
+        return prompt[-self.prompt_max_chars:]
+
+    def _drop_boundary_overlap(self, words: List[Word]) -> List[Word]:
+        """
+        Removes words at the start of a new hypothesis that repeat the committed tail.
+
+        Args:
+            words: Newly decoded words (already filtered by timestamp).
+
+        Returns:
+            The words with any duplicated boundary n-gram removed.
+        """
+        if not self._committed or not words:
+            return words
+        max_n = min(self._MAX_BOUNDARY_NGRAM, len(self._committed), len(words))
+        for n in range(max_n, 0, -1):
+            committed_ngram = [_normalize_word(w[0]) for w in self._committed[-n:]]
+            new_ngram = [_normalize_word(w[0]) for w in words[:n]]
+            if committed_ngram == new_ngram:
+                return words[n:]
+        return words
+
+    def _transcribe_window(
+            self,
+            window: np.ndarray,
+            offset_s: float,
+            prompt: Optional[str],
+            beam_size: Optional[int] = None,
+        ) -> Tuple[List[Word], float]:
+        """
+        Decodes one window with word timestamps.
+
+        Args:
+            window: Float32 audio at 16 kHz.
+            offset_s: Absolute start time of the window in the utterance.
+            prompt: Initial prompt for Whisper.
+            beam_size: Optional beam size override (defaults to `self.beam_size`).
+
+        Returns:
+            A tuple of (decoded words with absolute timestamps, mean segment avg_logprob).
+            The log probability is 0.0 if no segment was produced.
+        """
+        segments, _ = self.model.transcribe(
+            window,
+            language=self.language,
+            beam_size=beam_size or self.beam_size,
+            initial_prompt=prompt,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            vad_filter=False,
+        )
+        words: List[Word] = []
+        logprobs: List[float] = []
+        for segment in segments:
+            logprobs.append(segment.avg_logprob)
+            for w in (segment.words or []):
+                token = w.word.strip()
+                if token:
+                    words.append((token, offset_s + w.start, offset_s + w.end))
+        avg_logprob = sum(logprobs) / len(logprobs) if logprobs else 0.0
+        return words, avg_logprob
+
+    def decode_final(self, audio: np.ndarray, beam_size: Optional[int] = None) -> Optional[Tuple[str, float]]:
+        """
+        Produces a final transcription by keeping the committed prefix and only
+        re-decoding the audio after it.
+
+        Args:
+            audio: The complete utterance as float32 samples at 16 kHz.
+            beam_size: Beam size for the tail decode (the final pass usually uses a larger one).
+
+        Returns:
+            A tuple of (final text, mean avg_logprob of the tail decode), or None if
+            nothing has been committed yet and a full decode is required.
+        """
+        with self._lock:
+            committed = list(self._committed)
+            committed_end_s = self._committed_end_s
+        if not committed:
+            return None
+
+        committed_text = " ".join(w[0] for w in committed)
+        window = audio[int(committed_end_s * SAMPLE_RATE):]
+        if len(window) / SAMPLE_RATE < self._MIN_WINDOW_S:
+            return committed_text, 0.0
+
+        prompt = committed_text[-self.prompt_max_chars:]
+        words, avg_logprob = self._transcribe_window(window, committed_end_s, prompt, beam_size)
+        with self._lock:
+            words = self._drop_boundary_overlap(words)
+        tail_text = " ".join(w[0] for w in words)
+        return f"{committed_text} {tail_text}".strip(), avg_logprob
+
+    def process(self, audio: np.ndarray) -> str:
+        """
+        Decodes the tail of the current utterance and updates the committed prefix.
+
+        Args:
+            audio: The full utterance so far as float32 samples at 16 kHz.
+
+        Returns:
+            The stitched transcription (committed prefix + unstable tail).
+        """
+        with self._lock:
+            generation = self._generation
+            window_start_s = self._window_start_s
+            prompt = self._build_prompt()
+
+        total_s = len(audio) / SAMPLE_RATE
+        if total_s - window_start_s < self._MIN_WINDOW_S:
+            return self.text
+
+        window = audio[int(window_start_s * SAMPLE_RATE):]
+        self.last_window_s = total_s - window_start_s
+        words, _ = self._transcribe_window(window, window_start_s, prompt)
+
+        with self._lock:
+            if generation != self._generation:
+                # Utterance was reset while decoding; discard the stale result
+                return self.text
+
+            # Words already covered by the committed prefix are dropped
+            threshold = self._committed_end_s - self._COMMIT_OVERLAP_TOLERANCE_S
+            words = [w for w in words if w[1] >= threshold]
+            words = self._drop_boundary_overlap(words)
+
+            # Local agreement: commit the longest prefix shared with the previous tail
+            agreed = 0
+            for new_word, old_word in zip(words, self._tail):
+                if _normalize_word(new_word[0]) != _normalize_word(old_word[0]):
+                    break
+                agreed += 1
+
+            if agreed:
+                self._committed.extend(words[:agreed])
+                self._committed_end_s = words[agreed - 1][2]
+            self._tail = words[agreed:]
+
+            # Hypotheses keep disagreeing on a very long window: force-commit older words
+            if total_s - window_start_s > 2 * self.tail_window_s:
+                cutoff_s = total_s - self.tail_window_s
+                forced = [w for w in self._tail if w[2] <= cutoff_s]
+                if forced:
+                    self._committed.extend(forced)
+                    self._committed_end_s = forced[-1][2]
+                    self._tail = self._tail[len(forced):]
+
+            # Slide the window once it grows past the tail budget
+            if total_s - window_start_s > self.tail_window_s and self._committed_end_s > window_start_s:
+                self._window_start_s = self._committed_end_s
+                logger.debug(f"👂🧩 {Colors.GRAY}Window slid to {self._window_start_s:.2f}s "
+                             f"({len(self._committed)} committed words){Colors.RESET}")
+
+            self.decoded_audio_s = total_s
+            return self.text
@@ -0,0 +1,163 @@
+# jitter_buffer.py
+import logging
+import math
+import os
+import threading
+import time
+from statistics import NormalDist
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Accepted probability that playout runs dry after the initial buffer
+JITTER_UNDERRUN_TARGET = float(os.getenv("JITTER_UNDERRUN_TARGET", 0.05))
+# Bounds of the initial (and re-)buffer in seconds of audio
+JITTER_MIN_BUFFER_S = float(os.getenv("JITTER_MIN_BUFFER_S", 0.05))
+JITTER_MAX_BUFFER_S = float(os.getenv("JITTER_MAX_BUFFER_S", 1.0))
+# Audio the buffer should carry through without running dry (roughly one sentence)
+JITTER_HORIZON_S = float(os.getenv("JITTER_HORIZON_S", 2.0))
+
+RTF_EWMA_ALPHA = 0.1      # Weight of a new real-time factor sample
+RTF_PRIOR = 0.5           # Assumed synthesis speed before any measurement (2x real time)
+RTT_EWMA_ALPHA = 0.25     # Weight of a new round-trip time sample
+
+
+class RealTimeFactorEstimator:
+    """
+    Exponentially weighted mean and variance of the synthesis real-time factor.
+
+    A sample is one synthesis run (one sentence on one engine): its wall time
+    divided by the duration of the audio it produced; values above 1 mean
+    synthesis is slower than playback. Shared by all synthesis calls of an
+    `AudioProcessor`, so a generation starts with what earlier ones measured.
+    """
+
+    def __init__(self, alpha: float = RTF_EWMA_ALPHA, prior: float = RTF_PRIOR) -> None:
+        self.alpha = alpha
+        self.mean = prior
+        self.variance = 0.0
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def update(self, wall_s: float, audio_s: float) -> None:
+        """Adds one synthesis run that produced `audio_s` seconds of audio in `wall_s` seconds."""
+        if audio_s <= 0:
+            return
+        rtf = wall_s / audio_s
+        with self._lock:
+            delta = rtf - self.mean
+            self.mean += self.alpha * delta
+            self.variance = (1 - self.alpha) * (self.variance + self.alpha * delta * delta)
+            self.samples += 1
+
+    def upper(self, z: float) -> float:
+        """Mean plus `z` standard deviations."""
+        with self._lock:
+            return self.mean + z * math.sqrt(self.variance)
+
+
+class NetworkRTT:
+    """Smoothed round-trip time to the client, fed by the server's ping/pong."""
+
+    def __init__(self, alpha: float = RTT_EWMA_ALPHA) -> None:
+        self.alpha = alpha
+        self.rtt_s = 0.0
+        self.samples = 0
+
+    def update(self, rtt_s: float) -> None:
+        self.rtt_s = rtt_s if self.samples == 0 else (1 - self.alpha) * self.rtt_s + self.alpha * rtt_s
+        self.samples += 1
+
+    def reset(self) -> None:
+        self.rtt_s = 0.0
+        self.samples = 0
+
+
+class PlayoutClock:
+    """
+    Estimate of the audio the client has buffered, driven by actual sends.
+
+    The server reports every answer chunk when it is sent to the client, so
+    audio held back (speculative generations, the jitter buffer) does not
+    count as playing. Playback is assumed to (re)start when a chunk is sent
+    to a client that ran dry.
+    """
+
+    def __init__(self) -> None:
+        self.play_start: Optional[float] = None
+        self.sent_audio = 0.0
+        self._lock = threading.Lock()
+
+    def _buffer_locked(self, now: float) -> float:
+        if self.play_start is None:
+            return 0.0
+        return self.sent_audio - (now - self.play_start)
+
+    def on_sent(self, duration_s: float, now: Optional[float] = None) -> None:
+        """Advances the clock by `duration_s` seconds of audio sent to the client."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.play_start is None or self._buffer_locked(now) < 0:
+                self.play_start = now # Client starts (or restarts) playing
+                self.sent_audio = 0.0
+            self.sent_audio += duration_s
+
+    def client_buffer(self, now: Optional[float] = None) -> float:
+        """Seconds of audio the client has left to play (negative once it ran dry)."""
+        with self._lock:
+            return self._buffer_locked(time.time() if now is None else now)
+
+    def reset(self) -> None:
+        """The client stopped playback (or a new client connected)."""
+        with self._lock:
+            self.play_start = None
+            self.sent_audio = 0.0
+
+
+class JitterBufferPolicy:
+    """
+    Decides how much audio to hold back before streaming starts (or restarts).
+
+    The target covers the audio that synthesis is expected to fall behind
+    over `horizon_s` seconds of playback, at the real-time factor that is not
+    exceeded with probability 1 - `underrun_target`, plus the network RTT as
+    a margin for delivery jitter. Fast synthesis on a quiet network therefore
+    starts almost immediately, slow synthesis buffers up to `max_buffer_s`.
+    """
+
+    def __init__(self, rtf: RealTimeFactorEstimator, rtt: NetworkRTT, playout: PlayoutClock,
+                 underrun_target: float = JITTER_UNDERRUN_TARGET, min_buffer_s: float = JITTER_MIN_BUFFER_S,
+                 max_buffer_s: float = JITTER_MAX_BUFFER_S, horizon_s: float = JITTER_HORIZON_S) -> None:
+        """
+        Args:
+            rtf: Synthesis real-time factor estimator.
+            rtt: Network round-trip time estimator.
+            playout: Client playout clock, used to detect underruns.
+            underrun_target: Accepted underrun probability (0 < target < 0.5).
+            min_buffer_s: Smallest buffer, absorbs chunk-level jitter.
+            max_buffer_s: Largest buffer, bounds the added latency.
+            horizon_s: Playback duration the buffer should carry through.
+        """
+        self.rtf = rtf
+        self.rtt = rtt
+        self.playout = playout
+        self.z = NormalDist().inv_cdf(1 - min(max(underrun_target, 1e-4), 0.5))
+        self.min_buffer_s = min_buffer_s
+        self.max_buffer_s = max_buffer_s
+        self.horizon_s = horizon_s
+        self.stats: Dict[str, int] = {"buffers": 0, "underruns": 0}
+
+    def target_s(self) -> float:
+        """Seconds of audio to buffer before streaming."""
+        deficit = self.horizon_s * max(0.0, self.rtf.upper(self.z) - 1.0)
+        return min(self.max_buffer_s, max(self.min_buffer_s, deficit + self.rtt.rtt_s))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "target_s": self.target_s(),
+            "rtf_mean": self.rtf.mean,
+            "rtf_samples": self.rtf.samples,
+            "rtt_s": self.rtt.rtt_s,
+            "client_buffer_s": self.playout.client_buffer(),
+        }
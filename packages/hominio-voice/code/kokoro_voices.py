@@ -0,0 +1,202 @@
+# kokoro_voices.py
+import logging
+import os
+import threading
+from typing import Any, Dict, List
+
+import numpy as np
+from RealtimeTTS import BaseEngine, KokoroEngine
+
+from phoneme_cache import get_phoneme_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyaudio
+    import torch
+    from huggingface_hub import hf_hub_download
+    from kokoro import KModel, KPipeline
+    KOKORO_AVAILABLE = True
+except ImportError:
+    KOKORO_AVAILABLE = False
+
+DEFAULT_VOICE = "af_heart"
+KOKORO_REPO_ID = os.getenv("KOKORO_REPO_ID", "hexgrad/Kokoro-82M")
+# Voices loaded at startup; others are loaded on first use
+KOKORO_VOICES = [v.strip() for v in os.getenv("KOKORO_VOICES", DEFAULT_VOICE).split(",") if v.strip()]
+# "0" gives every stream its own RealtimeTTS KokoroEngine (own model copy) as before
+USE_SHARED_KOKORO = os.getenv("SHARED_KOKORO", "1") != "0"
+KOKORO_SAMPLE_RATE = 24000
+MAX_PHONEMES = 510 # Longest phoneme string the model takes in one pass
+
+
+class KokoroVoiceBank:
+    """
+    Process-wide Kokoro model and voice embeddings.
+
+    The model is loaded once and shared by every engine; voices are small
+    style tensors kept in a dictionary, so an engine switches voices by
+    lookup and adding a voice costs only its embedding.
+    """
+
+    def __init__(self) -> None:
+        self.model = None
+        self.voices: Dict[str, Any] = {}
+        self.engines_created = 0
+        self._lock = threading.Lock()
+
+    def ensure_model(self) -> Any:
+        """Loads the shared model and the preloaded voices on first use."""
+        with self._lock:
+            if self.model is None:
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                logger.info(f"👄🔄 Loading shared Kokoro model on {device}")
+                self.model = KModel(repo_id=KOKORO_REPO_ID).to(device).eval()
+                for name in KOKORO_VOICES:
+                    self._load_voice(name)
+                logger.info(f"👄✅ Shared Kokoro model ready, voices: {', '.join(self.voices)}")
+            return self.model
+
+    def _load_voice(self, name: str) -> Any:
+        """
+        Loads one voice embedding (caller holds the lock).
+
+        Packs stay on the CPU: KPipeline only passes a voice through as a
+        tensor if it is a `torch.FloatTensor`, which a CUDA tensor is not (it
+        would be treated as a voice name and fail). The pipeline moves the
+        pack to the model's device itself; it is a few hundred KB.
+        """
+        pack = self.voices.get(name)
+        if pack is None:
+            path = hf_hub_download(repo_id=KOKORO_REPO_ID, filename=f"voices/{name}.pt")
+            pack = torch.load(path, weights_only=True, map_location="cpu").float()
+            self.voices[name] = pack
+        return pack
+
+    def voice(self, name: str) -> Any:
+        """Returns the embedding of voice `name`, loading it if needed."""
+        pack = self.voices.get(name)
+        if pack is not None:
+            return pack
+        with self._lock:
+            return self._load_voice(name)
+
+    def create_pipeline(self, lang_code: str) -> Any:
+        """Text frontend for one engine, running on the shared model."""
+        return KPipeline(lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=self.ensure_model())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "model_loaded": self.model is not None,
+            "voices": list(self.voices),
+            "engines": self.engines_created,
+        }
+
+
+# Global voice bank instance
+_global_voice_bank = KokoroVoiceBank()
+
+def get_voice_bank() -> KokoroVoiceBank:
+    """Get the global Kokoro voice bank instance."""
+    return _global_voice_bank
+
+
+if KOKORO_AVAILABLE:
+    class SharedKokoroEngine(BaseEngine):
+        """
+        RealtimeTTS engine on the shared Kokoro model with a per-request voice.
+
+        Each stream still needs its own engine (RealtimeTTS reads an engine's
+        output queue), but engines only hold a text frontend; model and voice
+        embeddings come from the `KokoroVoiceBank`, phonemes from the shared
+        `PhonemeCache`.
+        """
+
+        def __init__(self, voice: str = DEFAULT_VOICE, speed: float = 1.0) -> None:
+            """
+            Args:
+                voice: Initial voice name (e.g. "af_heart"; the first letter selects the language).
+                speed: Speaking rate.
+            """
+            super().__init__()
+            self.bank = get_voice_bank()
+            self.speed = speed
+            self._pipelines: Dict[str, Any] = {}
+            self.set_voice(voice)
+            self.bank.engines_created += 1
+
+        def post_init(self) -> None:
+            self.engine_name = "kokoro"
+
+        def get_stream_info(self):
+            return pyaudio.paInt16, 1, KOKORO_SAMPLE_RATE
+
+        def get_voices(self) -> List[str]:
+            return list(self.bank.voices)
+
+        def set_voice(self, voice: str) -> None:
+            """Selects the voice of the next synthesis (a dictionary lookup once loaded)."""
+            self.voice = voice
+            self._voice_pack = self.bank.voice(voice)
+
+        def _pipeline(self) -> Any:
+            lang_code = self.voice[0]
+            pipeline = self._pipelines.get(lang_code)
+            if pipeline is None:
+                pipeline = self._pipelines[lang_code] = self.bank.create_pipeline(lang_code)
+            return pipeline
+
+        def synthesize(self, text: str) -> bool:
+            """
+            Synthesizes `text` into the engine queue as int16 PCM chunks.
+
+            Returns:
+                False if stopped before the end.
+            """
+            super().synthesize(text)
+            pipeline = self._pipeline()
+            # Grapheme-to-phoneme conversion goes through the shared cache
+            phonemes = get_phoneme_cache().phonemize(self.voice[0], text, pipeline.g2p)
+            if not phonemes:
+                return True
+            if len(phonemes) <= MAX_PHONEMES:
+                results = pipeline.generate_from_tokens(phonemes, voice=self._voice_pack, speed=self.speed)
+            else:
+                results = pipeline(text, voice=self._voice_pack, speed=self.speed) # Frontend splits long input
+            for result in results:
+                if self.stop_synthesis_event.is_set():
+                    return False
+                if result.audio is None:
+                    continue
+                audio = result.audio.detach().cpu().numpy()
+                self.queue.put(np.clip(audio * 32767, -32768, 32767).astype(np.int16).tobytes())
+            return True
+
+
+def create_kokoro_engine(voice: str = DEFAULT_VOICE) -> BaseEngine:
+    """
+    Creates an engine for one stream: on the shared model if available, else a standalone KokoroEngine.
+
+    Args:
+        voice: Initial voice name.
+    """
+    if KOKORO_AVAILABLE and USE_SHARED_KOKORO:
+        return SharedKokoroEngine(voice=voice)
+    return KokoroEngine(voice=voice)
+
+
+if __name__ == "__main__":
+    # Smoke test on the default device (CUDA if available): one sentence per preloaded voice
+    import time
+
+    from logsetup import setup_logging
+    setup_logging(logging.INFO)
+    if not KOKORO_AVAILABLE:
+        raise SystemExit("kokoro is not installed")
+    for voice_name in KOKORO_VOICES:
+        engine = SharedKokoroEngine(voice=voice_name)
+        started = time.monotonic()
+        engine.synthesize("This is a short smoke test of the shared Kokoro engine.")
+        samples = sum(len(engine.queue.get_nowait()) for _ in range(engine.queue.qsize())) // 2
+        print(f"{voice_name}: {samples / KOKORO_SAMPLE_RATE:.2f}s audio in {time.monotonic() - started:.2f}s "
+              f"on {next(get_voice_bank().model.parameters()).device}")
@@ -0,0 +1,97 @@
+# phoneme_cache.py
+import collections
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from tts_cache import preprocess_text
+
+logger = logging.getLogger(__name__)
+
+# Bound of the cache (sentences)
+PHONEME_CACHE_SENTENCES = int(os.getenv("PHONEME_CACHE_SENTENCES", 4096))
+# "0" disables the cache
+USE_PHONEME_CACHE = os.getenv("PHONEME_CACHE", "1") != "0"
+
+# Grapheme-to-phoneme function: text -> (phoneme string, tokens or None)
+G2P = Callable[[str], Tuple[str, Optional[Sequence[Any]]]]
+
+
+class PhonemeCache:
+    """
+    Shared, bounded cache of the Kokoro text frontend's output.
+
+    Maps (language, normalized sentence) to its phoneme string. Whole
+    sentences only: pronunciation depends on context (heteronyms like
+    "read" or "live", "the" before a vowel), so phonemes assembled from
+    cached words could differ from what the frontend produces. LRU bounded
+    and shared by all engines and voices.
+    """
+
+    def __init__(self, max_sentences: int = PHONEME_CACHE_SENTENCES) -> None:
+        """
+        Args:
+            max_sentences: Maximum cached sentences.
+        """
+        self.max_sentences = max_sentences
+        self.enabled = USE_PHONEME_CACHE
+        self._sentences: "collections.OrderedDict[Tuple[str, str], str]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    def phonemize(self, lang_code: str, text: str, g2p: G2P) -> str:
+        """
+        Returns the phonemes of a sentence, running `g2p` only on a cache miss.
+
+        Args:
+            lang_code: Kokoro language code (first letter of the voice name).
+            text: The sentence.
+            g2p: The engine's grapheme-to-phoneme function.
+
+        Returns:
+            The phoneme string.
+        """
+        text = preprocess_text(text)
+        if not self.enabled:
+            return g2p(text)[0].strip()
+
+        key = (lang_code, text)
+        with self._lock:
+            phonemes = self._sentences.get(key)
+            if phonemes is not None:
+                self._sentences.move_to_end(key)
+                self.stats["hits"] += 1
+                return phonemes
+            self.stats["misses"] += 1
+
+        phonemes = g2p(text)[0].strip() # CPU work, outside the lock
+        with self._lock:
+            self._sentences[key] = phonemes
+            self._sentences.move_to_end(key)
+            while len(self._sentences) > self.max_sentences:
+                self._sentences.popitem(last=False)
+        return phonemes
+
+    def clear(self) -> None:
+        """Drops all entries (benchmarks)."""
+        with self._lock:
+            self._sentences.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+                "sentences": len(self._sentences),
+                "enabled": self.enabled,
+            }
+
+
+# Global phoneme cache instance
+_global_phoneme_cache = PhonemeCache()
+
+def get_phoneme_cache() -> PhonemeCache:
+    """Get the global phoneme cache instance."""
+    return _global_phoneme_cache
@@ -0,0 +1,302 @@
+# pipeline_benchmark.py
+import argparse
+import logging
+import resource
+import statistics
+import threading
+import time
+from queue import Empty, Queue
+from typing import Any, Dict, List, Optional, Tuple
+
+from speech_pipeline_manager import GenerationState, RunningGeneration, SpeechPipelineManager
+
+logger = logging.getLogger(__name__)
+
+TURN_PROMPTS = [
+    "What is the capital of France?",
+    "Tell me a short fact about octopuses.",
+    "How do I make a good cup of tea?",
+    "Give me one tip for sleeping better.",
+]
+
+# Quick answers for the TTS scenario
+QUICK_ANSWERS = [
+    "Sure, let me check that for you.",
+    "That is a great question and I love it.",
+    "Here is what I found for you.",
+    "Paris is the capital of France.",
+]
+
+
+def _context_switches() -> int:
+    """Voluntary plus involuntary context switches of this process so far."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_nvcsw + usage.ru_nivcsw
+
+
+def _wait_for_new_generation(manager: SpeechPipelineManager, previous: Optional[RunningGeneration],
+                             started: float, timeout: float) -> Optional[RunningGeneration]:
+    """Waits until a generation other than `previous` is running (requests are processed asynchronously)."""
+    while time.monotonic() - started < timeout:
+        gen = manager.running_generation
+        if gen is not None and gen is not previous:
+            return gen
+        time.sleep(0.001)
+    return None
+
+
+def _run_turn(manager: SpeechPipelineManager, text: str, timeout: float) -> Optional[float]:
+    """
+    Runs one turn and returns the time from request to first audio chunk.
+
+    Drains the generation's audio like the server would and waits until the
+    generation reaches a terminal state.
+    """
+    previous = manager.running_generation
+    started = time.monotonic()
+    manager.prepare_generation(text)
+    gen = _wait_for_new_generation(manager, previous, started, timeout)
+    if gen is None:
+        return None
+
+    first_chunk_latency = None
+    while time.monotonic() - started < timeout:
+        try:
+            gen.audio_chunks.get(timeout=0.05)
+            if first_chunk_latency is None:
+                first_chunk_latency = time.monotonic() - started
+        except Empty:
+            if gen.state in (GenerationState.DONE, GenerationState.ABORTED):
+                break
+    manager.running_generation = None  # Released by the server after final audio
+    return first_chunk_latency
+
+
+def run_benchmark(pipeline_cls: type, sessions: int, turns: int, timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    Runs `turns` turns on `sessions` concurrent pipelines of `pipeline_cls`.
+
+    Uses the real LLM and TTS backends, so results include provider latency;
+    compare modes in the same environment and back to back.
+
+    Args:
+        pipeline_cls: `SpeechPipelineManager` or `AsyncSpeechPipelineManager`.
+        sessions: Number of concurrent pipeline instances.
+        turns: Turns per session.
+        timeout: Per-turn timeout in seconds.
+
+    Returns:
+        Dictionary with thread counts, context switches and turn latencies.
+    """
+    threads_before = threading.active_count()
+    managers = [pipeline_cls(tts_engine="kokoro", llm_provider="openai") for _ in range(sessions)]
+    threads_idle = threading.active_count()
+
+    latencies: List[float] = []
+    failures = 0
+    peak_threads = threads_idle
+    lock = threading.Lock()
+
+    def session(manager: SpeechPipelineManager, index: int) -> None:
+        nonlocal failures, peak_threads
+        for turn in range(turns):
+            latency = _run_turn(manager, TURN_PROMPTS[(index + turn) % len(TURN_PROMPTS)], timeout)
+            with lock:
+                peak_threads = max(peak_threads, threading.active_count())
+                if latency is None:
+                    failures += 1
+                else:
+                    latencies.append(latency)
+
+    switches_before = _context_switches()
+    started = time.monotonic()
+    drivers = [threading.Thread(target=session, args=(m, i), daemon=True) for i, m in enumerate(managers)]
+    for driver in drivers:
+        driver.start()
+    for driver in drivers:
+        driver.join()
+    elapsed = time.monotonic() - started
+    switches = _context_switches() - switches_before
+
+    for manager in managers:
+        manager.shutdown()
+
+    latencies.sort()
+    return {
+        "pipeline": pipeline_cls.__name__,
+        "sessions": sessions,
+        "turns": sessions * turns,
+        "failed_turns": failures,
+        # Driver threads of this benchmark are excluded from the peak
+        "threads_added_idle": threads_idle - threads_before,
+        "threads_peak": peak_threads - threads_before - sessions,
+        "context_switches_per_turn": switches / max(1, sessions * turns),
+        "first_audio_median_s": statistics.median(latencies) if latencies else None,
+        "first_audio_p95_s": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+        "elapsed_s": elapsed,
+    }
+
+
+def _run_handoff(manager: SpeechPipelineManager, first_text: str, second_text: str,
+                 timeout: float) -> Optional[Tuple[float, Optional[float], Optional[float]]]:
+    """
+    Supersedes a speaking generation and measures how fast the new one takes over.
+
+    Starts a generation for `first_text`, waits until its audio is being
+    synthesized, then requests `second_text` like a changed transcription
+    hypothesis would, which aborts the first generation.
+
+    Returns:
+        Seconds from the second request until the new generation is running,
+        until its first LLM token, and until its first audio chunk (None if
+        not reached), or None if the first generation never started speaking.
+    """
+    previous = manager.running_generation
+    started = time.monotonic()
+    manager.prepare_generation(first_text)
+    first = _wait_for_new_generation(manager, previous, started, timeout)
+    if first is None:
+        return None
+    while not first.quick_answer_first_chunk_ready:
+        if time.monotonic() - started > timeout or first.state in (GenerationState.DONE, GenerationState.ABORTED):
+            return None
+        time.sleep(0.001)
+
+    requested = time.monotonic()
+    manager.prepare_generation(second_text)
+    second = _wait_for_new_generation(manager, first, requested, timeout)
+    if second is None:
+        return None
+    handoff = time.monotonic() - requested
+
+    ttft = first_audio = None
+    while time.monotonic() - requested < timeout:
+        if ttft is None and second.quick_answer:
+            ttft = time.monotonic() - requested
+        try:
+            second.audio_chunks.get(timeout=0.001)
+            first_audio = time.monotonic() - requested
+            break
+        except Empty:
+            if second.state in (GenerationState.DONE, GenerationState.ABORTED):
+                break
+    manager.abort_generation(wait_for_completion=True, reason="benchmark round done")
+    manager.running_generation = None
+    return handoff, ttft, first_audio
+
+
+def run_handoff_benchmark(pipeline_cls: type, rounds: int, timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    Measures abort-to-new-generation latencies over `rounds` superseded generations.
+
+    Args:
+        pipeline_cls: `SpeechPipelineManager` or `AsyncSpeechPipelineManager`.
+        rounds: Number of superseded generations.
+        timeout: Per-round timeout in seconds.
+
+    Returns:
+        Dictionary with median/p95 of handoff, TTFT and first audio after the abort.
+    """
+    manager = pipeline_cls(tts_engine="kokoro", llm_provider="openai")
+    samples: Dict[str, List[float]] = {"handoff": [], "ttft": [], "first_audio": []}
+    failures = 0
+    for index in range(rounds):
+        result = _run_handoff(manager, TURN_PROMPTS[index % len(TURN_PROMPTS)],
+                              TURN_PROMPTS[(index + 1) % len(TURN_PROMPTS)], timeout)
+        if result is None:
+            failures += 1
+            continue
+        for name, value in zip(("handoff", "ttft", "first_audio"), result):
+            if value is not None:
+                samples[name].append(value)
+    manager.shutdown()
+
+    report: Dict[str, Any] = {"pipeline": pipeline_cls.__name__, "rounds": rounds, "failed_rounds": failures}
+    for name, values in samples.items():
+        values.sort()
+        report[f"abort_to_{name}_median_s"] = statistics.median(values) if values else None
+        report[f"abort_to_{name}_p95_s"] = values[int(0.95 * (len(values) - 1))] if values else None
+    return report
+
+
+def _quick_answer_ttfa(audio: Any, text: str) -> Optional[float]:
+    """Seconds from a quick answer synthesis call until its first audio chunk is queued."""
+    first: List[float] = []
+    audio.on_first_audio_chunk_synthesize = lambda _queue: first.append(time.monotonic())
+    started = time.monotonic()
+    audio.synthesize(text, Queue(), threading.Event(), "[benchmark]")
+    return first[0] - started if first else None
+
+
+def run_tts_benchmark(rounds: int) -> Dict[str, Any]:
+    """
+    Measures quick answer TTFA with and without the phoneme cache.
+
+    Known sentences are measured with the cache disabled and with a warm
+    cache. Run with TTS_CACHE=0, otherwise repeated sentences are served
+    as cached audio.
+
+    Args:
+        rounds: Measurements per known sentence.
+
+    Returns:
+        Dictionary with median TTFA per case and the phoneme cache stats.
+    """
+    from audio_module import AudioProcessor
+    from phoneme_cache import get_phoneme_cache
+    from tts_cache import USE_TTS_CACHE
+
+    if USE_TTS_CACHE:
+        logger.warning("TTS audio cache is enabled, repeated sentences skip synthesis; run with TTS_CACHE=0")
+    audio = AudioProcessor(engine="kokoro")
+    cache = get_phoneme_cache()
+
+    def measure(texts: List[str], repeats: int) -> Optional[float]:
+        values = []
+        for _ in range(repeats):
+            for text in texts:
+                ttfa = _quick_answer_ttfa(audio, text)
+                if ttfa is not None:
+                    values.append(ttfa)
+        return statistics.median(values) if values else None
+
+    report: Dict[str, Any] = {"rounds": rounds}
+    cache.clear()
+    cache.enabled = False
+    report["known_uncached_ttfa_median_s"] = measure(QUICK_ANSWERS, rounds)
+
+    cache.enabled = True
+    measure(QUICK_ANSWERS, 1) # Warm the cache
+    report["known_cached_ttfa_median_s"] = measure(QUICK_ANSWERS, rounds)
+    stats = cache.get_stats()
+    report.update({f"phoneme_{k}": v for k, v in stats.items() if k in ("hits", "misses")})
+    audio.shutdown()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare threaded and asyncio speech pipelines, or measure TTS TTFA.")
+    parser.add_argument("--mode", choices=["threaded", "async", "both"], default="both")
+    parser.add_argument("--scenario", choices=["turns", "handoff", "tts"], default="turns",
+                        help="concurrent turns, aborting a speaking generation for a new one, "
+                             "or quick answer TTFA with and without the phoneme cache")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent pipeline instances")
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    parser.add_argument("--rounds", type=int, default=10,
+                        help="superseded generations (handoff), repeats per sentence (tts)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-turn timeout in seconds")
+    args = parser.parse_args()
+
+    from logsetup import setup_logging
+    setup_logging(logging.WARNING)
+
+    if args.scenario == "tts":
+        reports = [run_tts_benchmark(args.rounds)] # Pipeline independent
+    else:
+        from async_speech_pipeline import AsyncSpeechPipelineManager
+        modes = {"threaded": [SpeechPipelineManager], "async": [AsyncSpeechPipelineManager],
+                 "both": [SpeechPipelineManager, AsyncSpeechPipelineManager]}[args.mode]
+        reports = (run_handoff_benchmark(cls, args.rounds, args.timeout) if args.scenario == "handoff"
+                   else run_benchmark(cls, args.sessions, args.turns, args.timeout) for cls in modes)
+    for report in reports:
+        print(" ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in report.items()))
@@ -0,0 +1,153 @@
+# prosody.py
+import logging
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE: int = 16000
+FRAME_SIZE: int = 640           # 40 ms analysis frames (two pitch periods at 50 Hz)
+HOP_SIZE: int = 320             # 20 ms hop
+FFT_SIZE: int = 1024            # >= FRAME_SIZE + max lag, so the autocorrelation is not circular
+MIN_F0_HZ: float = 60.0
+MAX_F0_HZ: float = 400.0
+VOICING_THRESHOLD: float = 0.45 # Normalized autocorrelation peak required for a voiced frame
+SPEECH_DB: float = -45.0        # Frame energy (dBFS) above which a frame counts as speech
+HISTORY_FRAMES: int = 250       # 5 s of frame features
+TAIL_FRAMES: int = 25           # Final 500 ms of speech used for slopes
+
+_MIN_LAG = int(SAMPLE_RATE / MAX_F0_HZ)
+_MAX_LAG = int(SAMPLE_RATE / MIN_F0_HZ)
+_WINDOW = np.hanning(FRAME_SIZE).astype(np.float32)
+
+
+def _slope(t: np.ndarray, y: np.ndarray) -> float:
+    """Least-squares slope of y over t."""
+    t_centered = t - t.mean()
+    denom = float(np.dot(t_centered, t_centered))
+    return float(np.dot(t_centered, y - y.mean()) / denom) if denom > 0 else 0.0
+
+
+def _run_lengths(mask: np.ndarray) -> np.ndarray:
+    """Lengths of consecutive True runs in a boolean array."""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[1::2] - edges[::2]
+
+
+class ProsodyTracker:
+    """
+    Vectorized prosody features on the 16 kHz input stream.
+
+    Each incoming chunk is cut into 40 ms frames (20 ms hop); energy and an
+    autocorrelation pitch estimate are computed for all frames of the chunk
+    at once via a batched FFT. From the last 500 ms of speech it derives the
+    classic turn-yielding cues:
+    - pitch slope (semitones/s, falling pitch ends declaratives),
+    - energy decay (dB/s, speakers trail off at turn ends),
+    - final-syllable lengthening (last voiced run vs. the speaker's median run).
+    """
+
+    def __init__(self) -> None:
+        """Initializes empty feature history."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears buffered audio and feature history."""
+        with self._lock:
+            self._pending = np.zeros(0, dtype=np.float32)
+            self._energy_db = np.zeros(0, dtype=np.float32)
+            self._f0 = np.zeros(0, dtype=np.float32) # 0 = unvoiced
+
+    def process(self, chunk: np.ndarray) -> None:
+        """
+        Analyzes a chunk of 16 kHz int16 audio.
+
+        Args:
+            chunk: Mono int16 samples at 16 kHz.
+        """
+        audio = np.concatenate((self._pending, chunk.astype(np.float32) / 32768.0))
+        if len(audio) < FRAME_SIZE:
+            self._pending = audio
+            return
+
+        frames = np.lib.stride_tricks.sliding_window_view(audio, FRAME_SIZE)[::HOP_SIZE]
+        self._pending = audio[len(frames) * HOP_SIZE:]
+
+        energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+        # Batched autocorrelation via the power spectrum
+        spectrum = np.fft.rfft(frames * _WINDOW, n=FFT_SIZE, axis=1)
+        autocorr = np.fft.irfft(np.abs(spectrum) ** 2, n=FFT_SIZE, axis=1)[:, :_MAX_LAG + 1]
+        normalized = autocorr[:, _MIN_LAG:] / np.maximum(autocorr[:, :1], 1e-10)
+        peak_lag = np.argmax(normalized, axis=1)
+        peak = normalized[np.arange(len(frames)), peak_lag]
+        voiced = (peak > VOICING_THRESHOLD) & (energy_db > SPEECH_DB)
+        f0 = np.where(voiced, SAMPLE_RATE / (peak_lag + _MIN_LAG), 0.0).astype(np.float32)
+
+        with self._lock:
+            self._energy_db = np.concatenate((self._energy_db, energy_db.astype(np.float32)))[-HISTORY_FRAMES:]
+            self._f0 = np.concatenate((self._f0, f0))[-HISTORY_FRAMES:]
+
+    def features(self) -> Optional[Dict[str, float]]:
+        """
+        Computes prosodic cues for the most recent stretch of speech.
+
+        Returns:
+            Dictionary with 'pitch_slope' (semitones/s), 'energy_decay' (dB/s),
+            'lengthening' (ratio) and 'silence_s' (time since the last speech
+            frame), or None if there is not enough recent speech.
+        """
+        with self._lock:
+            energy_db, f0 = self._energy_db.copy(), self._f0.copy()
+
+        speech_idx = np.flatnonzero(energy_db > SPEECH_DB)
+        if len(speech_idx) < 5:
+            return None
+        last = speech_idx[-1]
+        start = max(0, last - TAIL_FRAMES + 1)
+        t = np.arange(start, last + 1, dtype=np.float32) * (HOP_SIZE / SAMPLE_RATE)
+
+        tail_f0 = f0[start:last + 1]
+        voiced = tail_f0 > 0
+        pitch_slope = 0.0
+        if voiced.sum() >= 4:
+            semitones = 12.0 * np.log2(tail_f0[voiced] / np.median(tail_f0[voiced]))
+            pitch_slope = _slope(t[voiced], semitones)
+
+        energy_decay = _slope(t, energy_db[start:last + 1])
+
+        runs = _run_lengths(f0[:last + 1] > 0)
+        lengthening = 1.0
+        if len(runs) >= 3:
+            lengthening = float(runs[-1] / max(np.median(runs[:-1]), 1.0))
+
+        return {
+            "pitch_slope": pitch_slope,
+            "energy_decay": energy_decay,
+            "lengthening": lengthening,
+            "silence_s": float((len(energy_db) - 1 - last) * HOP_SIZE / SAMPLE_RATE),
+        }
+
+    def turn_end_score(self) -> Optional[float]:
+        """
+        Combines the cues into a turn-yielding score.
+
+        Falling pitch, decaying energy and a lengthened final syllable push the
+        score toward 1.0; rising pitch (questions are handled by the text
+        signal) or sustained energy push it toward 0.0.
+
+        Returns:
+            Score between 0.0 and 1.0, or None if no features are available.
+        """
+        feats = self.features()
+        if feats is None:
+            return None
+        z = (-0.08 * feats["pitch_slope"]                       # -10 st/s → +0.8
+             - 0.02 * feats["energy_decay"]                     # -40 dB/s → +0.8
+             + float(np.clip(feats["lengthening"] - 1.0, -1.0, 1.0))
+             - 0.4)
+        return float(1.0 / (1.0 + np.exp(-z)))
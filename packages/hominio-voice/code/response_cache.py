@@ -0,0 +1,179 @@
+# response_cache.py
+import collections
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from queue import Queue
+from typing import Any, Dict, List, Optional, Sequence
+
+from speculation import normalize_hypothesis
+
+logger = logging.getLogger(__name__)
+
+# Entries older than this are not served (seconds)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 3600))
+# Total PCM bytes kept across all entries
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Only short utterances are frequent enough to be worth caching
+RESPONSE_CACHE_MAX_WORDS = int(os.getenv("RESPONSE_CACHE_MAX_WORDS", 6))
+# "0" disables the cache
+USE_RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "1") != "0"
+
+
+@dataclass
+class CachedResponse:
+    """Answer text and synthesized audio of one cached turn."""
+    quick_answer: str
+    final_answer: str
+    pcm_chunks: List[bytes]
+    created: float = field(default_factory=time.time)
+    hits: int = 0
+
+    @property
+    def size(self) -> int:
+        """PCM bytes held by this entry."""
+        return sum(len(c) for c in self.pcm_chunks)
+
+
+class RecordingQueue(Queue):
+    """Audio chunk queue that also keeps a copy of every chunk put into it."""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES // 8) -> None:
+        """
+        Args:
+            max_bytes: Recording stops (the queue keeps working) beyond this size.
+        """
+        super().__init__()
+        self.recorded: List[bytes] = []
+        self.recorded_bytes = 0
+        self.max_bytes = max_bytes
+        self.overflowed = False
+
+    def put(self, item, block=True, timeout=None):
+        if not self.overflowed:
+            self.recorded_bytes += len(item)
+            if self.recorded_bytes > self.max_bytes:
+                self.overflowed = True
+                self.recorded = []
+            else:
+                self.recorded.append(item)
+        super().put(item, block, timeout)
+
+
+class ResponseCache:
+    """
+    Process-wide cache of complete turns (answer text plus PCM) for frequent,
+    short user utterances such as greetings.
+
+    Keyed by the normalized user text, the TTS voice and a hash of the full
+    prompt history (summary included), so an answer is only replayed in
+    exactly the conversational context it was generated in; in practice
+    this means opening turns, which are identical across sessions. Entries expire after `ttl` seconds; when the
+    stored PCM exceeds `max_bytes`, least recently used entries are evicted.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 max_words: int = RESPONSE_CACHE_MAX_WORDS) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            ttl: Entry lifetime in seconds.
+            max_bytes: Maximum total PCM bytes.
+            max_words: Longer user utterances are not cached.
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_words = max_words
+        self._entries: "collections.OrderedDict[str, CachedResponse]" = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "expired": 0, "evictions": 0}
+
+    def make_key(self, text: str, history: Sequence[Dict[str, str]], voice: str = "") -> Optional[str]:
+        """
+        Builds the cache key for a user utterance, or None if it is not cacheable.
+
+        Args:
+            text: The user's transcription.
+            history: The full history sent to the LLM (`ConversationHistory.messages()`).
+            voice: TTS voice the PCM is synthesized with.
+        """
+        normalized = normalize_hypothesis(text)
+        if not normalized or len(normalized.split()) > self.max_words:
+            return None
+        # The whole prompt: a cache shared by all sessions must not answer from another conversation
+        digest = hashlib.blake2b(digest_size=16)
+        for message in history:
+            digest.update(f"{message.get('role')}\x00{message.get('content')}\x01".encode("utf-8"))
+        return f"{voice}|{normalized}|{digest.hexdigest()}"
+
+    def get(self, key: Optional[str]) -> Optional[CachedResponse]:
+        """Returns the live entry for `key`, or None."""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.created > self.ttl:
+                self._remove_locked(key)
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key: Optional[str], quick_answer: str, final_answer: str, pcm_chunks: List[bytes]) -> None:
+        """Stores a completed turn, evicting old entries beyond the byte limit."""
+        if key is None or not pcm_chunks:
+            return
+        entry = CachedResponse(quick_answer=quick_answer, final_answer=final_answer, pcm_chunks=list(pcm_chunks))
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove_locked(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self.stats["stores"] += 1
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+                self.stats["evictions"] += 1
+        logger.debug(f"🗣️💾 Cached response for '{key}' ({entry.size} PCM bytes)")
+
+    def _remove_locked(self, key: str) -> None:
+        """Drops an entry and its byte count (lock held)."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def clear(self) -> None:
+        """Drops all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns counters, entry count, stored bytes and hit rate."""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+# Global response cache instance
+_global_response_cache = ResponseCache()
+
+def get_response_cache() -> ResponseCache:
+    """Get the global response cache instance."""
+    return _global_response_cache
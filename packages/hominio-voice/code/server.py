@@ -7,7 +7,7 @@ logger = logging.getLogger(__name__)
 if __name__ == "__main__":
     logger.info("🖥️👋 Welcome to local real-time voice chat")
 
-from upsample_overlap import UpsampleOverlap
+from audio_resampler import TTSOutputEncoder, negotiate_output_rate
 # Removed datetime import - was only used for timestamp formatting
 from colors import Colors
 import uvicorn
@@ -19,13 +19,15 @@ import threading # For per-user SpeechPipelineManager worker threads and managed
 import sys
 import os # Added for environment variable access
 
-from typing import Any, Dict, Optional # For type hints in docstrings
+from typing import Any, Dict, Iterator, List, Optional # For type hints in docstrings
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, File, Form, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from starlette.responses import HTMLResponse, Response, FileResponse
+from starlette.responses import HTMLResponse, Response, FileResponse, StreamingResponse
+import shutil
+import tempfile
 
 # Removed system monitoring imports
 
@@ -36,6 +38,10 @@ from session_manager import SessionStatus
 # Memory & Thread management imports
 from memory_manager import get_memory_monitor, get_resource_tracker
 from thread_manager import get_thread_manager
+from stt_governor import get_stt_governor
+from batch_transcribe import get_batch_transcriber, shutdown_batch_transcriber
+from session_capture import SessionAudioRecorder
+from filler_audio import FillerPolicy, USE_FILLERS
 
 USE_SSL = False
 TTS_START_ENGINE = "kokoro"
@@ -61,6 +67,14 @@ except ValueError:
         logger.warning("🖥️⚠️ Invalid MAX_AUDIO_QUEUE_SIZE env var. Using default: 50")
     MAX_AUDIO_QUEUE_SIZE = 50
 
+# Interval of the ping/pong round-trip measurement that sizes the TTS jitter buffer
+RTT_PING_INTERVAL_S = float(os.getenv("RTT_PING_INTERVAL_S", 5.0))
+
+# Opt-in capture of every session's ingress audio for deterministic replay (session_capture.py)
+CAPTURE_SESSION_AUDIO_DIR = os.getenv("CAPTURE_SESSION_AUDIO_DIR")
+if CAPTURE_SESSION_AUDIO_DIR and __name__ == "__main__":
+    logger.info(f"🖥️⚙️ {Colors.apply('[PARAM]').blue} Capturing session audio to: {Colors.apply(CAPTURE_SESSION_AUDIO_DIR).blue}")
+
 
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -70,6 +84,7 @@ if sys.platform == "win32":
 from audio_in import AudioInputProcessor
 from audio_input_pool import AudioInputProcessorPool
 from speech_pipeline_manager import SpeechPipelineManager
+from async_speech_pipeline import shutdown_pipeline_runtime
 from colors import Colors
 
 # Connection rate limiting to prevent cascade failures during load testing
@@ -172,7 +187,7 @@ async def lifespan(app: FastAPI):
     """
     Manages the application's lifespan, initializing and shutting down resources.
 
-    Initializes global components like SpeechPipelineManager, Upsampler, and
+    Initializes global components like SpeechPipelineManager and
     AudioInputProcessor and stores them in `app.state`. Handles cleanup on shutdown.
 
     Args:
@@ -185,6 +200,7 @@ async def lifespan(app: FastAPI):
     app.state.MemoryMonitor = get_memory_monitor()
     app.state.ResourceTracker = get_resource_tracker()
     app.state.ThreadManager = get_thread_manager()
+    app.state.STTGovernor = get_stt_governor()
     
     # Start background monitoring
     app.state.MemoryMonitor.start_monitoring()
@@ -197,9 +213,6 @@ async def lifespan(app: FastAPI):
     
     # Removed system monitoring initialization
     
-    # Initialize components for multi-user concurrency
-    app.state.Upsampler = UpsampleOverlap()
-    
     # Initialize AudioInputProcessor pool for multi-user concurrency
     # Auto-adjust pool size based on available GPU memory
     try:
@@ -240,6 +253,10 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, 'ThreadManager'):
         app.state.ThreadManager.stop_monitoring()
         logger.info("🖥️🧠 Thread monitoring stopped")
+
+    if hasattr(app.state, 'STTGovernor'):
+        app.state.STTGovernor.stop()
+        logger.info("🖥️🎚️ STT quality governor stopped")
     
     # Shutdown session management
     if hasattr(app.state, 'SessionManager'):
@@ -253,6 +270,12 @@ async def lifespan(app: FastAPI):
         app.state.AudioInputProcessorPool.shutdown()
         logger.info("🖥️🏊‍♂️ AudioInputProcessor pool shutdown")
 
+    # Stop the async pipeline loop and executors after the pool's managers are gone
+    shutdown_pipeline_runtime()
+
+    # Shutdown batch transcription workers (only running if the endpoint was used)
+    shutdown_batch_transcriber()
+
 # --------------------------------------------------------------------
 # FastAPI app instance
 # --------------------------------------------------------------------
@@ -285,6 +308,54 @@ async def health_check():
 
 # Removed /sessions and /pool monitoring endpoints - not used by main application
 
+@app.post("/transcribe/batch")
+async def transcribe_batch(
+    files: List[UploadFile] = File(...),
+    pcm_sample_rate: int = Form(16000),
+) -> StreamingResponse:
+    """
+    Transcribes uploaded WAV/PCM recordings offline with the live Whisper settings.
+
+    Uploads are spooled to a temporary directory and decoded by the batch
+    transcriber's process pool. Segment results are streamed back as
+    newline-delimited JSON (chunked transfer) as soon as workers produce them.
+
+    Args:
+        files: WAV files or raw 16-bit mono PCM files.
+        pcm_sample_rate: Sample rate of raw PCM uploads.
+
+    Returns:
+        A StreamingResponse of NDJSON events ("segment", "file_done", "error").
+    """
+    workdir = tempfile.mkdtemp(prefix="hominio_batch_")
+
+    def spool_uploads() -> List[tuple]:
+        spooled = []
+        for index, upload in enumerate(files):
+            path = os.path.join(workdir, f"{index:04d}.audio")
+            with open(path, "wb") as out:
+                shutil.copyfileobj(upload.file, out, 1024 * 1024)
+            spooled.append((path, upload.filename or path))
+        return spooled
+
+    try:
+        spooled_files = await asyncio.to_thread(spool_uploads)
+        transcriber = await asyncio.to_thread(get_batch_transcriber)
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    logger.info(f"🖥️📦 Batch transcription of {len(spooled_files)} file(s) started")
+
+    def stream_events() -> Iterator[bytes]:
+        try:
+            for event in transcriber.transcribe_files(spooled_files, pcm_sample_rate):
+                yield (json.dumps(event) + "\n").encode("utf-8")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # Starlette iterates sync generators in its threadpool
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
 @app.get("/favicon.ico")
 async def favicon():
     """
@@ -355,6 +426,7 @@ async def process_incoming_data(ws: WebSocket, app: FastAPI, incoming_chunks: as
         callbacks: The TranscriptionCallbacks instance for this connection to manage state.
         session_id: The unique session identifier for this WebSocket connection.
     """
+    audio_capture = app.state.SessionManager.get_session_component(session_id, "audio_capture")
     try:
         while True:
             msg = await ws.receive()
@@ -387,6 +459,9 @@ async def process_incoming_data(ws: WebSocket, app: FastAPI, incoming_chunks: as
                 # The rest of the payload is raw PCM bytes
                 metadata["pcm"] = raw[8:]
 
+                if audio_capture:
+                    audio_capture.append(metadata)
+
                 # Check queue size with overflow protection
                 current_qsize = incoming_chunks.qsize()
                 if current_qsize < MAX_AUDIO_QUEUE_SIZE:
@@ -430,7 +505,7 @@ async def process_incoming_data(ws: WebSocket, app: FastAPI, incoming_chunks: as
                 data = parse_json_message(msg["text"])
                 msg_type = data.get("type")
                 # Only log important incoming messages, skip partial requests to reduce noise
-                if msg_type not in ("partial_user_request",):
+                if msg_type not in ("partial_user_request", "pong"):
                     logger.debug(Colors.apply(f"🖥️📥 ←←Client: {data}").orange)
 
 
@@ -442,6 +517,24 @@ async def process_incoming_data(ws: WebSocket, app: FastAPI, incoming_chunks: as
                     logger.debug("🖥️ℹ️ Received tts_stop from client.")
                     # Update connection-specific state via callbacks
                     callbacks.tts_client_playing = False
+                    speech_manager = getattr(callbacks.audio_processor, "speech_pipeline_manager", None)
+                    if speech_manager is not None:
+                        speech_manager.audio.reset_playout() # Client buffer is empty
+                elif msg_type == "audio_config":
+                    # The client's TTS playback rate; native-rate clients get audio without resampling
+                    output_rate = negotiate_output_rate(data.get("tts_sample_rate"))
+                    if output_rate != callbacks.tts_encoder.output_rate:
+                        callbacks.tts_encoder = TTSOutputEncoder(output_rate)
+                    logger.info(f"🖥️⚙️ TTS output at {output_rate} Hz for session {session_id[:8]}")
+                elif msg_type == "pong":
+                    # Echo of our ping timestamp; the round trip includes queued outgoing messages
+                    try:
+                        rtt = time.monotonic() - float(data.get("content"))
+                    except (TypeError, ValueError):
+                        rtt = -1.0
+                    speech_manager = getattr(callbacks.audio_processor, "speech_pipeline_manager", None)
+                    if 0 <= rtt < 30 and speech_manager is not None:
+                        speech_manager.audio.record_network_rtt(rtt)
 
                 
                 elif msg_type == "get_queue_status":
@@ -454,6 +547,8 @@ async def process_incoming_data(ws: WebSocket, app: FastAPI, incoming_chunks: as
                         "content": {
                             "queue_position": queue_position,
                             "pool_status": pool_status,
+                            # Only this session's own timelines; the pool status carries no per-session data
+                            "generation_timelines": app.state.AudioInputProcessorPool.get_session_timelines(session_id),
                             "has_processor": callbacks.audio_processor is not None
                         }
                     })
@@ -501,7 +596,7 @@ async def send_text_messages(ws: WebSocket, message_queue: asyncio.Queue) -> Non
             data = await message_queue.get()
             msg_type = data.get("type")
             # Only log important messages, skip noisy partial messages to reduce noise
-            if msg_type not in ("tts_chunk", "partial_assistant_answer", "partial_user_request"):
+            if msg_type not in ("tts_chunk", "partial_assistant_answer", "partial_user_request", "ping"):
                 logger.debug(Colors.apply(f"🖥️📤 →→Client: {data}").orange)
             await ws.send_json(data)
     except asyncio.CancelledError:
@@ -548,6 +643,20 @@ async def handle_audio_processing(audio_chunks: asyncio.Queue, callbacks: 'Trans
     finally:
         logger.info("🖥️🎧 Audio processing handler finished")
 
+async def measure_network_rtt(message_queue: asyncio.Queue) -> None:
+    """
+    Periodically pings the client; the "pong" answers feed the TTS jitter buffer's RTT estimate.
+
+    Args:
+        message_queue: The session's outgoing message queue (pings queue behind pending audio).
+    """
+    try:
+        while True:
+            await message_queue.put({"type": "ping", "content": time.monotonic()})
+            await asyncio.sleep(RTT_PING_INTERVAL_S)
+    except asyncio.CancelledError:
+        pass # Task cancellation is expected on disconnect
+
 async def _reset_interrupt_flag_async(app: FastAPI, callbacks: 'TranscriptionCallbacks'):
     """
     Resets the microphone interruption flag after a delay (async version).
@@ -569,13 +678,37 @@ async def _reset_interrupt_flag_async(app: FastAPI, callbacks: 'TranscriptionCal
         callbacks.interruption_time = 0
         logger.debug(Colors.apply("🖥️🎙️ interruption flag reset after TTS chunk (async)").cyan)
 
+def _send_filler_chunk(app: FastAPI, message_queue: asyncio.Queue, callbacks: 'TranscriptionCallbacks', speech_manager: Any) -> None:
+    """
+    Sends the next filler chunk while the user's turn has ended but no answer audio is ready.
+
+    Whether a filler plays at all is decided by the connection's `FillerPolicy`
+    from the pipeline's predicted output latency.
+
+    Args:
+        app: The FastAPI application instance.
+        message_queue: The outgoing message queue of the connection.
+        callbacks: The TranscriptionCallbacks instance of the connection.
+        speech_manager: The session's SpeechPipelineManager.
+    """
+    if not USE_FILLERS or not callbacks.tts_to_client or callbacks.user_interrupted:
+        return
+    if callbacks.filler_policy is None:
+        callbacks.filler_policy = FillerPolicy(getattr(speech_manager, "filler_clips", []))
+    chunk = callbacks.filler_policy.poll(speech_manager.full_output_pipeline_latency)
+    if chunk:
+        message_queue.put_nowait({
+            "type": "tts_chunk",
+            "content": callbacks.tts_encoder.encode(chunk)
+        })
+
 async def send_tts_chunks(app: FastAPI, message_queue: asyncio.Queue, callbacks: 'TranscriptionCallbacks') -> None:
     """
     Continuously sends TTS audio chunks from the SpeechPipelineManager to the client.
 
     Monitors the state of the current speech generation (if any) and the client
     connection (via `callbacks`). Retrieves audio chunks from the active generation's
-    queue, upsamples/encodes them, and puts them onto the outgoing `message_queue`
+    queue, encodes them at the client's playback rate, and puts them onto the outgoing `message_queue`
     for the client. Handles the end-of-generation logic and state resets.
 
     Args:
@@ -615,36 +748,42 @@ async def send_tts_chunks(app: FastAPI, message_queue: asyncio.Queue, callbacks:
                 await asyncio.sleep(0.001)
                 continue
 
-            if not speech_manager.running_generation:
+            # One generation per iteration: a newer one may replace it at any time
+            gen = speech_manager.running_generation
+            if not gen:
+                _send_filler_chunk(app, message_queue, callbacks, speech_manager) # Answer still being prepared
                 await asyncio.sleep(0.001)
                 continue
 
-            if speech_manager.running_generation.abortion_started:
+            if gen.abortion_started or gen is callbacks.superseded_generation:
+                _send_filler_chunk(app, message_queue, callbacks, speech_manager) # Hypothesis being swapped
                 await asyncio.sleep(0.001)
                 continue
 
-            if not speech_manager.running_generation.audio_quick_finished:
-                speech_manager.running_generation.tts_quick_allowed_event.set()
+            if not gen.audio_quick_finished:
+                gen.tts_quick_allowed_event.set()
 
-            if not speech_manager.running_generation.quick_answer_first_chunk_ready:
+            if not gen.quick_answer_first_chunk_ready:
+                _send_filler_chunk(app, message_queue, callbacks, speech_manager)
                 await asyncio.sleep(0.001)
                 continue
 
             chunk = None
             try:
-                chunk = speech_manager.running_generation.audio_chunks.get_nowait()
+                chunk = gen.audio_chunks.get_nowait()
                 if chunk:
                     last_quick_answer_chunk = time.time()
             except Empty:
-                final_expected = speech_manager.running_generation.quick_answer_provided
-                audio_final_finished = speech_manager.running_generation.audio_final_finished
+                final_expected = gen.quick_answer_provided
+                audio_final_finished = gen.audio_final_finished
 
                 if not final_expected or audio_final_finished:
                     logger.info("🖥️🏁 Sending of TTS chunks and 'user request/assistant answer' cycle finished.")
                     callbacks.send_final_assistant_answer() # Callbacks method
 
-                    assistant_answer = speech_manager.running_generation.quick_answer + speech_manager.running_generation.final_answer                    
-                    speech_manager.running_generation = None
+                    assistant_answer = gen.quick_answer + gen.final_answer                    
+                    if speech_manager.running_generation is gen:
+                        speech_manager.running_generation = None
 
                     callbacks.tts_chunk_sent = False # Reset via callbacks
                     callbacks.reset_state() # Reset connection state via callbacks
@@ -652,12 +791,26 @@ async def send_tts_chunks(app: FastAPI, message_queue: asyncio.Queue, callbacks:
                 await asyncio.sleep(0.001)
                 continue
 
-            base64_chunk = app.state.Upsampler.get_base64_chunk(chunk)
+            # Hand a playing filler over to the answer with a short fade
+            if callbacks.filler_policy and callbacks.filler_policy.playback is not None:
+                fade_tail = callbacks.filler_policy.handover()
+                if fade_tail:
+                    message_queue.put_nowait({
+                        "type": "tts_chunk",
+                        "content": callbacks.tts_encoder.encode(fade_tail),
+                        "generation": gen.id
+                    })
+                    speech_manager.audio.record_audio_sent(fade_tail)
+
+            base64_chunk = callbacks.tts_encoder.encode(chunk)
             message_queue.put_nowait({
                 "type": "tts_chunk",
-                "content": base64_chunk
+                "content": base64_chunk,
+                "generation": gen.id # Lets the client drop audio of superseded generations
             })
+            speech_manager.audio.record_audio_sent(chunk) # Drives the jitter buffer's playout clock
             last_chunk_sent = time.time()
+            gen.timeline.mark("first_chunk_sent")
 
             # Use connection-specific state via callbacks
             if not callbacks.tts_chunk_sent:
@@ -709,6 +862,9 @@ class TranscriptionCallbacks:
         self.interruption_time = 0
         self.assistant_answer = ""
         self.silence_active = False
+        self.filler_policy = None # FillerPolicy, created on first use (needs the session's clips)
+        self.tts_encoder = TTSOutputEncoder() # Replaced once the client reports its playback rate
+        self.superseded_generation = None # Running generation the final text did not match (promote pending)
 
     def reset_state(self):
         """Resets connection-specific state flags and variables to their initial values."""
@@ -728,6 +884,9 @@ class TranscriptionCallbacks:
         self.final_assistant_answer_sent = False
         self.partial_transcription = ""
         self.final_transcription = ""
+        self.superseded_generation = None
+        if self.filler_policy:
+            self.filler_policy.reset()
 
         # Abort generation using the session-specific speech pipeline manager
         if self.audio_processor and hasattr(self.audio_processor, 'speech_pipeline_manager'):
@@ -821,9 +980,16 @@ class TranscriptionCallbacks:
         self.user_interrupted = False # Reset connection-specific flag (user finished, not interrupted)
         
         # Use per-user speech pipeline manager
+        speech_manager = None
+        gen_kept = False # Whether the running generation answers what the user actually said
         if self.audio_processor and hasattr(self.audio_processor, 'speech_pipeline_manager'):
             speech_manager = self.audio_processor.speech_pipeline_manager
-            if speech_manager.is_valid_gen():
+            # Keep or swap in the speculative generation matching what the user actually said;
+            # a replaced generation stays running until the promote is processed, so it must not be released
+            gen_kept = speech_manager.promote_hypothesis(txt) if txt else True
+            if not gen_kept:
+                self.superseded_generation = speech_manager.running_generation
+            if gen_kept and speech_manager.is_valid_gen():
                 logger.debug(f"🖥️🔊 TTS ALLOWED (before final, Session: {self.session_id})")
                 speech_manager.running_generation.tts_quick_allowed_event.set()
         # Note: If no processor allocated yet, ignore TTS allowance
@@ -844,14 +1010,15 @@ class TranscriptionCallbacks:
             "content": user_request_content
         })
 
-        if speech_manager.is_valid_gen():
+        if gen_kept and speech_manager.is_valid_gen():
             # Send partial assistant answer (if available) to the client
             # Use connection-specific user_interrupted flag
             if speech_manager.running_generation.quick_answer and not self.user_interrupted:
                 self.assistant_answer = speech_manager.running_generation.quick_answer
                 self.message_queue.put_nowait({
                     "type": "partial_assistant_answer",
-                    "content": self.assistant_answer
+                    "content": self.assistant_answer,
+                    "generation": speech_manager.running_generation.id
                 })
 
         logger.info(f"🖥️🧠 Adding user request to history: '{user_request_content}'")
@@ -908,7 +1075,7 @@ class TranscriptionCallbacks:
         # logger.debug(f"🖥️🎙️ Silence active: {silence_active}") # Optional: Can be noisy
         self.silence_active = silence_active
 
-    def on_partial_assistant_text(self, txt: str):
+    def on_partial_assistant_text(self, txt: str, generation_id: Optional[int] = None):
         """
         Callback invoked when a partial text result from the assistant (LLM) is available.
 
@@ -917,6 +1084,7 @@ class TranscriptionCallbacks:
 
         Args:
             txt: The partial assistant text.
+            generation_id: ID of the generation the text belongs to (stamped on the message).
         """
         # Use connection-specific user_interrupted flag
         if not self.user_interrupted:
@@ -925,7 +1093,8 @@ class TranscriptionCallbacks:
             if self.tts_to_client:
                 self.message_queue.put_nowait({
                     "type": "partial_assistant_answer",
-                    "content": txt
+                    "content": txt,
+                    "generation": generation_id
                 })
 
     def on_recording_start(self):
@@ -948,6 +1117,8 @@ class TranscriptionCallbacks:
         if self.tts_client_playing:
             self.tts_to_client = False # Stop server sending TTS
             self.user_interrupted = True # Mark connection as user interrupted
+            if self.filler_policy:
+                self.filler_policy.cancel()
             logger.info(f"{Colors.apply('🖥️❗ INTERRUPTING TTS due to recording start').blue}")
 
             # Send final assistant answer *if* one was generated and not sent
@@ -1081,6 +1252,9 @@ async def websocket_endpoint(ws: WebSocket):
         app.state.SessionManager.set_session_component(session_id, "message_queue", message_queue)
         app.state.SessionManager.set_session_component(session_id, "audio_chunks", audio_chunks)
         app.state.SessionManager.set_session_component(session_id, "websocket", ws)
+        if CAPTURE_SESSION_AUDIO_DIR:
+            capture_path = os.path.join(CAPTURE_SESSION_AUDIO_DIR, f"{int(time.time())}_{session_id[:8]}.hvcap")
+            app.state.SessionManager.set_session_component(session_id, "audio_capture", SessionAudioRecorder(capture_path))
 
         # Send session info to client
         session_info_msg = {
@@ -1116,6 +1290,7 @@ async def websocket_endpoint(ws: WebSocket):
             asyncio.create_task(send_text_messages(ws, message_queue)),
             asyncio.create_task(send_tts_chunks(app, message_queue, callbacks)), # Pass callbacks
             asyncio.create_task(handle_audio_processing(audio_chunks, callbacks)), # Handle audio processing with processor allocation waiting
+            asyncio.create_task(measure_network_rtt(message_queue)), # Round-trip time for the TTS jitter buffer
         ]
 
         try:
@@ -1141,6 +1316,11 @@ async def websocket_endpoint(ws: WebSocket):
             if callbacks.audio_processor:
                 app.state.AudioInputProcessorPool.return_instance(session_id)
             
+            # Finish the session audio capture, if enabled
+            audio_capture = app.state.SessionManager.get_session_component(session_id, "audio_capture")
+            if audio_capture:
+                audio_capture.close()
+
             # Remove from rate limiter
             remove_connection_from_rate_limiter(client_host, session_id)
             
@@ -1204,6 +1384,11 @@ async def setup_processor_callbacks(app: FastAPI, session_id: str, callbacks: Tr
     audio_processor.recording_start_callback = callbacks.on_recording_start
     audio_processor.silence_active_callback = callbacks.on_silence_active
 
+    # Record STT quality tier changes from the load-adaptive governor per session
+    session_state = app.state.SessionManager.get_session_state(session_id)
+    if session_state:
+        audio_processor.transcriber.on_quality_tier_change = session_state.set_stt_quality_tier
+
     # Assign callback to the per-user SpeechPipelineManager
     if hasattr(audio_processor, 'speech_pipeline_manager'):
         audio_processor.speech_pipeline_manager.on_partial_assistant_text = callbacks.on_partial_assistant_text
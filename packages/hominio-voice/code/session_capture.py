@@ -0,0 +1,212 @@
+# session_capture.py
+import argparse
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# File layout: 8-byte magic, then records of
+#   <d arrival seconds since capture start> <I client_sent_ms> <I header flags> <I pcm bytes> + pcm payload
+CAPTURE_MAGIC = b"HVCAP1\x00\x00"
+RECORD_HEADER = struct.Struct("<dIII")
+# The capture file grows in steps of this size and is truncated on close
+GROW_STEP_BYTES = 4 * 1024 * 1024
+
+
+class SessionAudioRecorder:
+    """
+    Appends a session's ingress audio frames and header timing to a compact
+    memory-mapped capture file.
+
+    Each record stores the server arrival time relative to the first frame,
+    the client timestamp (`client_sent_ms`), the raw header flags (bit 0 is
+    `isTTSPlaying`) and the PCM payload exactly as `process_incoming_data`
+    received it, so a conversation can be replayed deterministically.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Creates the capture file and maps its first block.
+
+        Args:
+            path: Destination file path (parent directories are created).
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "w+b")
+        self._size = GROW_STEP_BYTES
+        self._file.truncate(self._size)
+        self._mm = mmap.mmap(self._file.fileno(), self._size)
+        self._mm[:len(CAPTURE_MAGIC)] = CAPTURE_MAGIC
+        self._offset = len(CAPTURE_MAGIC)
+        self._start: Optional[float] = None
+        self._lock = threading.Lock()
+        self.frames_written = 0
+        self.closed = False
+
+    def _ensure_capacity(self, needed: int) -> None:
+        """Grows the file and remaps it if `needed` more bytes do not fit."""
+        if self._offset + needed <= self._size:
+            return
+        self._mm.close()
+        while self._offset + needed > self._size:
+            self._size += GROW_STEP_BYTES
+        self._file.truncate(self._size)
+        self._mm = mmap.mmap(self._file.fileno(), self._size)
+
+    def append(self, metadata: Dict[str, Any]) -> None:
+        """
+        Appends one ingress frame.
+
+        Args:
+            metadata: The dictionary built by `process_incoming_data` (needs 'pcm',
+                      'client_sent_ms', 'isTTSPlaying' and 'server_received' in ns).
+        """
+        pcm: bytes = metadata["pcm"]
+        received_s = metadata.get("server_received", time.time_ns()) / 1e9
+        flags = 1 if metadata.get("isTTSPlaying") else 0
+
+        with self._lock:
+            if self.closed:
+                return
+            if self._start is None:
+                self._start = received_s
+            record = RECORD_HEADER.pack(received_s - self._start, metadata.get("client_sent_ms", 0), flags, len(pcm))
+            self._ensure_capacity(len(record) + len(pcm))
+            self._mm[self._offset:self._offset + len(record)] = record
+            self._offset += len(record)
+            self._mm[self._offset:self._offset + len(pcm)] = pcm
+            self._offset += len(pcm)
+            self.frames_written += 1
+
+    def close(self) -> None:
+        """Flushes the map and truncates the file to the bytes actually written."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._mm.flush()
+            self._mm.close()
+            self._file.truncate(self._offset)
+            self._file.close()
+        logger.info(f"🎙️💾 Session capture closed: {self.path} ({self.frames_written} frames)")
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads a capture file through a memory map.
+
+    Args:
+        path: Capture file written by `SessionAudioRecorder`.
+
+    Yields:
+        Dictionaries shaped like the live ingress metadata ('pcm',
+        'client_sent_ms', 'isTTSPlaying') plus 'arrival_s'.
+
+    Raises:
+        ValueError: If the file is not a session capture.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a session capture file")
+        offset = len(CAPTURE_MAGIC)
+        while offset + RECORD_HEADER.size <= len(mm):
+            arrival_s, client_sent_ms, flags, pcm_len = RECORD_HEADER.unpack_from(mm, offset)
+            offset += RECORD_HEADER.size
+            pcm = mm[offset:offset + pcm_len]
+            offset += pcm_len
+            yield {
+                "arrival_s": arrival_s,
+                "client_sent_ms": client_sent_ms,
+                "isTTSPlaying": bool(flags & 1),
+                "pcm": pcm,
+            }
+
+
+async def replay_capture(path: str, audio_processor: Any, speed: float = 1.0) -> Dict[str, Any]:
+    """
+    Feeds a capture back through `AudioInputProcessor.process_chunk_queue`.
+
+    Frames are released with their recorded arrival spacing divided by `speed`
+    (1.0 = real time, 4.0 = four times faster, 0 = as fast as possible). The
+    queue is bounded below the processor's overflow limit, so fast replays
+    wait for the consumer instead of having frames dropped.
+
+    Args:
+        path: Capture file to replay.
+        audio_processor: The AudioInputProcessor receiving the frames.
+        speed: Replay speed multiplier.
+
+    Returns:
+        Replay statistics (frames, dropped frames, recorded and replay duration).
+    """
+    # Bounded: process_chunk_queue drops the oldest chunks beyond max_queue_size
+    max_queue_size = getattr(audio_processor, "max_queue_size", 500)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queue_size // 2))
+    dropped_before = getattr(audio_processor, "dropped_chunks", 0)
+    consumer = asyncio.create_task(audio_processor.process_chunk_queue(queue))
+
+    frames = 0
+    recorded_s = 0.0
+    started = time.monotonic()
+    for frame in read_capture(path):
+        if speed > 0:
+            delay = started + frame["arrival_s"] / speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        frame["server_received"] = time.time_ns()
+        await queue.put(frame)
+        frames += 1
+        recorded_s = frame["arrival_s"]
+
+    await queue.put(None)  # Termination signal for process_chunk_queue
+    await consumer
+    stats = {
+        "frames": frames,
+        "dropped": getattr(audio_processor, "dropped_chunks", 0) - dropped_before,
+        "recorded_s": recorded_s,
+        "replay_s": time.monotonic() - started,
+    }
+    if stats["dropped"]:
+        logger.warning(f"🎙️⚠️ Replay of {path} lost {stats['dropped']} frames to queue overflow")
+    logger.info(f"🎙️▶️ Replayed {path}: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a captured session through AudioInputProcessor.")
+    parser.add_argument("capture", help="capture file written by SessionAudioRecorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, >1 faster, 0 = unthrottled")
+    parser.add_argument("--info", action="store_true", help="only print a summary of the capture")
+    args = parser.parse_args()
+
+    from logsetup import setup_logging
+    setup_logging(logging.INFO)
+
+    if args.info:
+        frames = list(read_capture(args.capture))
+        pcm_bytes = sum(len(f["pcm"]) for f in frames)
+        tts_frames = sum(1 for f in frames if f["isTTSPlaying"])
+        duration = frames[-1]["arrival_s"] if frames else 0.0
+        print(f"{len(frames)} frames, {pcm_bytes} PCM bytes, {duration:.2f}s, {tts_frames} frames during TTS playback")
+    else:
+        from audio_in import AudioInputProcessor
+
+        async def main():
+            processor = AudioInputProcessor()
+            replay_start = time.monotonic()
+
+            def on_final(text: str) -> None:
+                logger.info(f"🎙️✅ [{time.monotonic() - replay_start:7.2f}s] final: {text}")
+
+            processor.transcriber.full_transcription_callback = on_final
+            await replay_capture(args.capture, processor, args.speed)
+            processor.shutdown()
+
+        asyncio.run(main())
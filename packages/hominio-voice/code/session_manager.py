@@ -35,6 +35,10 @@ class SessionState:
     messages_received: int = 0
     audio_chunks_processed: int = 0
     tts_chunks_sent: int = 0
+
+    # STT quality (set by the load-adaptive governor)
+    stt_quality_tier: str = "high"
+    stt_tier_changes: int = 0
     
     # Current activity
     is_recording: bool = False
@@ -78,6 +82,12 @@ class SessionState:
         self.tts_chunks_sent += 1
         self.update_activity()
     
+    def set_stt_quality_tier(self, tier_name: str):
+        """Record an STT quality tier change."""
+        if tier_name != self.stt_quality_tier:
+            self.stt_quality_tier = tier_name
+            self.stt_tier_changes += 1
+    
     def set_recording(self, is_recording: bool):
         """Set recording state."""
         self.is_recording = is_recording
@@ -128,6 +138,8 @@ class SessionState:
             "messages_received": self.messages_received,
             "audio_chunks_processed": self.audio_chunks_processed,
             "tts_chunks_sent": self.tts_chunks_sent,
+            "stt_quality_tier": self.stt_quality_tier,
+            "stt_tier_changes": self.stt_tier_changes,
             "is_recording": self.is_recording,
             "is_speaking": self.is_speaking,
             "is_processing": self.is_processing,
@@ -0,0 +1,264 @@
+# speculation.py
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from thread_manager import create_managed_thread
+
+logger = logging.getLogger(__name__)
+
+# Parked hypothesis branches kept per session
+SPECULATION_MAX_BRANCHES = int(os.getenv("SPECULATION_MAX_BRANCHES", 3))
+# Chunks a parked branch keeps prefetching, enough to cover a typical quick answer
+SPECULATION_PREFETCH_TOKENS = int(os.getenv("SPECULATION_PREFETCH_TOKENS", 48))
+# LLM tokens a session may spend on branches that end up discarded
+SPECULATION_TOKEN_BUDGET = int(os.getenv("SPECULATION_TOKEN_BUDGET", 2000))
+
+# Trailing words that do not change what the user asked for
+TRIVIAL_SUFFIX_WORDS = {
+    "please", "thanks", "thank", "you", "now", "then", "so", "okay", "ok", "right",
+    "um", "uh", "hmm", "yeah", "actually", "again", "too", "maybe", "huh",
+}
+MAX_TRIVIAL_SUFFIX = 2
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_hypothesis(text: str) -> str:
+    """Lowercases, strips punctuation and collapses whitespace."""
+    return " ".join(_PUNCTUATION_RE.sub(" ", text.lower()).split())
+
+
+def is_trivial_extension(hypothesis: str, final: str) -> bool:
+    """
+    Returns True if `final` only adds trivial words to `hypothesis`.
+
+    Both arguments are normalized texts. The hypothesis must be a strict
+    word prefix of the final text, extended by at most `MAX_TRIVIAL_SUFFIX`
+    words from `TRIVIAL_SUFFIX_WORDS`.
+    """
+    hyp_words, final_words = hypothesis.split(), final.split()
+    if not hyp_words or len(final_words) <= len(hyp_words) or final_words[:len(hyp_words)] != hyp_words:
+        return False
+    suffix = final_words[len(hyp_words):]
+    return len(suffix) <= MAX_TRIVIAL_SUFFIX and all(word in TRIVIAL_SUFFIX_WORDS for word in suffix)
+
+
+class SpeculativeBranch:
+    """
+    One LLM response stream for a transcription hypothesis.
+
+    Chunks pulled from the LLM are buffered, so the stream can be replayed
+    from the start by a later generation. Exactly one pull happens at a time:
+    a prefetch thread while the branch is parked, the reading generation
+    (on demand) while it is claimed.
+    """
+
+    def __init__(self, llm: Any, text: str, history: List[Dict[str, str]]) -> None:
+        """
+        Starts the LLM request for `text`.
+
+        Args:
+            llm: The `LLM` instance to generate with.
+            text: The hypothesis (user input) text.
+            history: History messages to send with the request.
+        """
+        self.llm = llm
+        self.text = text
+        self.key = normalize_hypothesis(text)
+        self.request_id = f"spec-{uuid.uuid4()}"
+        self.chunks: List[str] = []
+        self.done = False
+        self.cancelled = False
+        self.claimed = False
+        self._pull_lock = threading.Lock()
+        self._prefetch_thread = None
+        self._generator = llm.generate(text=text, history=history, use_system_prompt=True, request_id=self.request_id)
+
+    def _pull(self) -> bool:
+        """Pulls one chunk into the buffer. Returns False once the stream is exhausted."""
+        with self._pull_lock:
+            if self.done or self.cancelled:
+                return False
+            try:
+                self.chunks.append(next(self._generator))
+                return True
+            except StopIteration:
+                self.done = True
+            except Exception as e:
+                if not self.cancelled:
+                    logger.warning(f"🗣️🔮💥 Branch '{self.text[:30]}' stream failed: {e}")
+                self.done = True
+            return False
+
+    def reader(self) -> Iterator[str]:
+        """Yields all chunks from the start, continuing with the live stream."""
+        index = 0
+        while True:
+            if index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            elif self.cancelled or (not self._pull() and index >= len(self.chunks)):
+                return
+
+    def park(self, prefetch_tokens: int) -> None:
+        """Releases the branch and keeps prefetching up to `prefetch_tokens` chunks."""
+        self.claimed = False
+        if self.done or len(self.chunks) >= prefetch_tokens:
+            return
+        if self._prefetch_thread is not None and self._prefetch_thread.thread.is_alive():
+            return
+        self._prefetch_thread = create_managed_thread(
+            target=self._prefetch,
+            name="SpeculativePrefetch",
+            args=(prefetch_tokens,),
+            daemon=True,
+        )
+
+    def _prefetch(self, prefetch_tokens: int) -> None:
+        """Thread target: pulls chunks while the branch is parked."""
+        while not self.claimed and len(self.chunks) < prefetch_tokens and self._pull():
+            pass
+
+    def cancel(self) -> None:
+        """Stops the LLM request; readers end after the buffered chunks."""
+        self.cancelled = True
+        if self._pull_lock.acquire(blocking=False):
+            # No pull in flight: closing runs generate()'s cleanup (or skips a request never started)
+            try:
+                self._generator.close()
+            except Exception as e:
+                logger.debug(f"🗣️🔮 Error closing branch stream {self.request_id}: {e}")
+            finally:
+                self._pull_lock.release()
+        else:
+            # A pull is blocked on the network; closing the HTTP stream unblocks it
+            try:
+                self.llm.cancel_generation(request_id=self.request_id)
+            except Exception as e:
+                logger.debug(f"🗣️🔮 Error cancelling branch request {self.request_id}: {e}")
+
+
+class SpeculativeBranches:
+    """
+    Keeps up to `max_branches` LLM streams keyed by transcription hypothesis.
+
+    Every potential sentence end becomes a branch. When a newer hypothesis
+    replaces the running generation, its branch is parked instead of
+    cancelled; if the user's final text turns out to match it (exactly, or
+    extended only by trivial words), the branch is promoted and its buffered
+    tokens are replayed without another round trip. Tokens of branches that
+    are discarded count against a per-session budget; once it is spent,
+    branches are no longer parked.
+    """
+
+    def __init__(self, llm: Any, max_branches: int = SPECULATION_MAX_BRANCHES,
+                 prefetch_tokens: int = SPECULATION_PREFETCH_TOKENS,
+                 token_budget: int = SPECULATION_TOKEN_BUDGET) -> None:
+        """
+        Initializes an empty branch set.
+
+        Args:
+            llm: The `LLM` instance branches generate with.
+            max_branches: Maximum number of parked branches.
+            prefetch_tokens: Chunks a parked branch prefetches.
+            token_budget: Discarded-branch tokens allowed per session.
+        """
+        self.llm = llm
+        self.max_branches = max_branches
+        self.prefetch_tokens = prefetch_tokens
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self._parked: "OrderedDict[str, SpeculativeBranch]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "created": 0, "reused_exact": 0, "reused_prefix": 0, "evicted": 0, "wasted_tokens": 0,
+        }
+
+    @property
+    def budget_left(self) -> int:
+        """Tokens still available for speculation this session."""
+        return max(0, self.token_budget - self.stats["wasted_tokens"])
+
+    def matches(self, hypothesis: str, final: str) -> bool:
+        """True if a generation for `hypothesis` can serve the input `final`."""
+        hyp_key, final_key = normalize_hypothesis(hypothesis), normalize_hypothesis(final)
+        return hyp_key == final_key or is_trivial_extension(hyp_key, final_key)
+
+    def acquire(self, text: str, history: List[Dict[str, str]]) -> SpeculativeBranch:
+        """
+        Returns a claimed branch for `text`, reusing a parked one if it matches.
+
+        Args:
+            text: The user input text.
+            history: History messages for a new LLM request.
+        """
+        key = normalize_hypothesis(text)
+        with self._lock:
+            branch = self._parked.pop(key, None)
+            if branch is not None:
+                self.stats["reused_exact"] += 1
+            else:
+                for parked_key in reversed(self._parked):
+                    if is_trivial_extension(parked_key, key):
+                        branch = self._parked.pop(parked_key)
+                        self.stats["reused_prefix"] += 1
+                        break
+            if branch is not None and not branch.cancelled:
+                branch.claimed = True
+                logger.info(f"🗣️🔮✅ Reusing branch '{branch.text[:40]}' for '{text[:40]}' "
+                            f"({len(branch.chunks)} chunks buffered)")
+                return branch
+
+            branch = SpeculativeBranch(self.llm, text, history)
+            branch.claimed = True
+            self.stats["created"] += 1
+            return branch
+
+    def release(self, branch: SpeculativeBranch, park: bool) -> None:
+        """
+        Gives back a branch whose generation was aborted.
+
+        Args:
+            branch: The branch the aborted generation was reading.
+            park: Keep it for a later match (a newer hypothesis replaced it).
+                  False discards it (user interruption, reset).
+        """
+        with self._lock:
+            if not park or self.budget_left <= 0 or self.max_branches <= 0:
+                self._discard_locked(branch)
+                return
+            self._parked.pop(branch.key, None)
+            self._parked[branch.key] = branch
+            while len(self._parked) > self.max_branches:
+                _, oldest = self._parked.popitem(last=False)
+                self.stats["evicted"] += 1
+                self._discard_locked(oldest)
+        branch.park(self.prefetch_tokens)
+
+    def discard_all(self) -> None:
+        """Cancels every parked branch (turn end, reset)."""
+        with self._lock:
+            while self._parked:
+                _, branch = self._parked.popitem()
+                self._discard_locked(branch)
+
+    def _discard_locked(self, branch: SpeculativeBranch) -> None:
+        """Cancels a branch and charges its tokens to the budget (lock held)."""
+        if branch.cancelled:
+            return
+        branch.cancel()
+        self.stats["wasted_tokens"] += len(branch.chunks)
+
+    def reset_budget(self) -> None:
+        """Restores the full token budget (new session)."""
+        with self._lock:
+            self.stats["wasted_tokens"] = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns counters, parked branch count and remaining budget."""
+        with self._lock:
+            return {**self.stats, "parked": len(self._parked), "budget_left": self.budget_left}
@@ -1,5 +1,6 @@
 # speech_pipeline_manager.py
-from typing import Optional, Callable
+from typing import Optional, Callable, Iterable
+from enum import Enum
 import threading
 import logging
 import time
@@ -11,6 +12,11 @@ from audio_module import AudioProcessor
 from text_similarity import TextSimilarity
 from text_context import TextContext
 from llm_module import LLM
+from conversation_history import ConversationHistory, SUMMARY_SYSTEM_PROMPT
+from speculation import SpeculativeBranches
+from response_cache import RecordingQueue, USE_RESPONSE_CACHE, get_response_cache
+from filler_audio import USE_FILLERS, get_filler_library
+from generation_timeline import GenerationTimeline, TimelineStats
 from colors import Colors
 from thread_manager import create_managed_thread, get_thread_manager
 from memory_manager import get_memory_monitor, get_resource_tracker
@@ -47,6 +53,19 @@ class PipelineRequest:
         self.data = data
         self.timestamp = time.time()
 
+class GenerationState(Enum):
+    """Lifecycle stages of a RunningGeneration."""
+    PREPARING = "preparing"   # Created, LLM generator requested
+    LLM = "llm"               # LLM worker streaming until the quick answer boundary
+    QUICK_TTS = "quick_tts"   # Quick answer being synthesized
+    FINAL_TTS = "final_tts"   # Quick answer done, remaining text ready for final synthesis
+    DONE = "done"
+    ABORTED = "aborted"
+
+
+TERMINAL_GENERATION_STATES = (GenerationState.DONE, GenerationState.ABORTED)
+
+
 class RunningGeneration:
     """
     Holds the state and resources for a single, ongoing text-to-speech generation process.
@@ -54,19 +73,35 @@ class RunningGeneration:
     This includes the generation ID, input text, the LLM generator object, flags indicating
     the status of LLM and TTS stages (quick and final), threading events for synchronization,
     queues for audio chunks, and text buffers for partial/complete answers.
+
+    The lifecycle is an explicit state machine (preparing → llm → quick_tts →
+    final_tts → done, or aborted from any stage). Every transition notifies the
+    shared condition variable, so workers block on stage handoffs instead of polling.
     """
-    def __init__(self, id: int):
+    def __init__(self, id: int, condition: Optional[threading.Condition] = None,
+                 timeline_stats: Optional[TimelineStats] = None):
         """
         Initializes a RunningGeneration state object.
 
         Args:
             id: A unique identifier for this generation attempt.
+            condition: Condition variable notified on every state transition.
+            timeline_stats: Session aggregator the generation's timeline reports to.
         """
         self.id: int = id # Store the generation ID
         self.text: Optional[str] = None
         self.timestamp = time.time()
+        self.timeline = GenerationTimeline(timeline_stats) # Monotonic lifecycle events
+
+        self.condition = condition or threading.Condition()
+        self.state: GenerationState = GenerationState.PREPARING
+        self.state_times: dict[GenerationState, float] = {GenerationState.PREPARING: self.timestamp}
 
         self.llm_generator = None
+        self.branch = None # SpeculativeBranch the LLM chunks are read from
+        self.park_branch: bool = False # On abort, keep the branch for a later matching hypothesis
+        self.cache_key: Optional[str] = None # Response cache key if this turn is cacheable
+        self.from_cache: bool = False
         self.llm_finished: bool = False
         self.llm_finished_event = threading.Event()
         self.llm_aborted: bool = False
@@ -93,6 +128,35 @@ class RunningGeneration:
 
         self.completed: bool = False
 
+    def transition(self, state: GenerationState, reason: Optional[str] = None) -> bool:
+        """
+        Moves the generation to `state` and wakes all waiters.
+
+        Terminal states (done, aborted) are final, later transitions are ignored.
+
+        Args:
+            state: The new lifecycle state.
+            reason: Why the generation is aborted (recorded in the timeline).
+
+        Returns:
+            True if the state changed, False if the generation was already terminal.
+        """
+        with self.condition:
+            if self.state in TERMINAL_GENERATION_STATES:
+                return False
+            previous = self.state
+            self.state = state
+            self.state_times[state] = time.time()
+            if state == GenerationState.DONE:
+                self.completed = True
+                self.timeline.mark("finished")
+            elif state == GenerationState.ABORTED:
+                self.timeline.abort(reason or "unknown")
+            self.condition.notify_all()
+        logger.debug(f"🗣️🔀 [Gen {self.id}] {previous.value} → {state.value} "
+                     f"(+{(self.state_times[state] - self.state_times[previous]) * 1000:.1f}ms)")
+        return True
+
 
 class SpeechPipelineManager:
     """
@@ -155,9 +219,20 @@ class SpeechPipelineManager:
             self.llm_inference_time = 100.0  # Default fallback value in ms
 
         # --- State ---
-        self.history = []
+        # Separate LLM instance so aborting a generation never cancels a running summary
+        self.summary_llm = LLM(
+            backend=self.llm_provider,
+            model=self.llm_model,
+            system_prompt=SUMMARY_SYSTEM_PROMPT,
+        )
+        self.history = ConversationHistory(summarizer_llm=self.summary_llm)
+        self.speculation = SpeculativeBranches(self.llm)
+        self.response_cache = get_response_cache()
+        self.timeline_stats = TimelineStats() # Per-stage latency histograms of this session's generations
         self.requests_queue = Queue()
         self.running_generation: Optional[RunningGeneration] = None
+        # Notified on every generation state transition (and on shutdown)
+        self.generation_condition = threading.Condition()
 
         # --- Threading Events ---
         self.shutdown_event = threading.Event()
@@ -185,7 +260,29 @@ class SpeechPipelineManager:
         self.thread_manager = get_thread_manager()
         self.memory_monitor = get_memory_monitor()
         self.resource_tracker = get_resource_tracker()
+        self._start_workers()
         
+        # Start memory monitoring
+        self.memory_monitor.start_monitoring()
+        
+        # Add cleanup callback for memory pressure
+        self.memory_monitor.add_cleanup_callback(self._memory_cleanup_callback)
+
+        # Called with (text, generation id); deltas of superseded generations are dropped
+        self.on_partial_assistant_text: Optional[Callable[[str, int], None]] = None
+
+        # Calculate full pipeline latency with safety checks
+        tts_time = getattr(self.audio, 'tts_inference_time', 50.0) or 50.0  # Default fallback
+        self.full_output_pipeline_latency = self.llm_inference_time + tts_time
+        logger.info(f"🗣️⏱️ Full output pipeline latency: {self.full_output_pipeline_latency:.2f}ms (LLM: {self.llm_inference_time:.2f}ms, TTS: {tts_time:.2f}ms)")
+
+        # Filler/backchannel clips played by the server while this latency is being waited out
+        self.filler_clips = get_filler_library().ensure(self.audio) if USE_FILLERS else []
+
+        logger.info("🗣️🚀 SpeechPipelineManager initialized and workers started.")
+
+    def _start_workers(self):
+        """Starts the request, LLM, quick TTS and final TTS worker threads."""
         # Create managed threads with proper lifecycle management
         self.request_processor = create_managed_thread(
             target=self._process_request_queue,
@@ -210,21 +307,6 @@ class SpeechPipelineManager:
             name="TTSFinalWorker",
             cleanup_callback=lambda: logger.debug("🗣️🧹 TTS Final worker thread cleaned up")
         )
-        
-        # Start memory monitoring
-        self.memory_monitor.start_monitoring()
-        
-        # Add cleanup callback for memory pressure
-        self.memory_monitor.add_cleanup_callback(self._memory_cleanup_callback)
-
-        self.on_partial_assistant_text: Optional[Callable[[str], None]] = None
-
-        # Calculate full pipeline latency with safety checks
-        tts_time = getattr(self.audio, 'tts_inference_time', 50.0) or 50.0  # Default fallback
-        self.full_output_pipeline_latency = self.llm_inference_time + tts_time
-        logger.info(f"🗣️⏱️ Full output pipeline latency: {self.full_output_pipeline_latency:.2f}ms (LLM: {self.llm_inference_time:.2f}ms, TTS: {tts_time:.2f}ms)")
-
-        logger.info("🗣️🚀 SpeechPipelineManager initialized and workers started.")
 
     def _memory_cleanup_callback(self, level: str):
         """
@@ -244,13 +326,13 @@ class SpeechPipelineManager:
             # Clear history if too large
             if len(self.history) > 5:
                 logger.warning(f"🗣️🧹 Critical memory - trimming history from {len(self.history)} to 5")
-                self.history = self.history[-5:]
+                self.history.trim(5)
                 
         elif level == "warning":
             # Gentle cleanup for warning level
             if len(self.history) > 20:
                 logger.info(f"🗣️🧹 Warning memory - trimming history from {len(self.history)} to 15")
-                self.history = self.history[-15:]
+                self.history.trim(15)
 
     def is_valid_gen(self) -> bool:
         """
@@ -297,6 +379,10 @@ class SpeechPipelineManager:
                 if request.action == "prepare":
                     self.process_prepare_generation(request.data)
                     self.previous_request = request
+                elif request.action == "promote":
+                    self.process_prepare_generation(request.data)
+                    self.speculation.discard_all() # Turn is over, other hypotheses are stale
+                    self.previous_request = request
                 elif request.action == "finish":
                      # Note: 'finish' action currently has no specific handling logic here.
                      logger.info(f"🗣️🤷 Request Processor: Received 'finish' action (currently no-op).")
@@ -310,16 +396,43 @@ class SpeechPipelineManager:
                 logger.exception(f"🗣️💥 Request Processor: Error: {e}")
         logger.info("🗣️🏁 Request Processor: Shutting down.")
 
-    def on_first_audio_chunk_synthesize(self):
+    def on_first_audio_chunk_synthesize(self, audio_chunks: Optional[Queue] = None):
         """
         Callback method invoked by AudioProcessor when the first TTS audio chunk is ready.
 
         Sets the `quick_answer_first_chunk_ready` flag on the current `running_generation`
-        if one exists. This flag might be used for fine-grained timing or state checks.
+        if the chunk was queued for it. Synthesis of a superseded generation may
+        still be winding down; its chunks go to that generation's own queue and
+        are ignored here.
+
+        Args:
+            audio_chunks: The queue the chunk was put into (identifies the generation).
         """
+        gen = self.running_generation
+        if gen is None:
+            return
+        if audio_chunks is not None and audio_chunks is not gen.audio_chunks:
+            logger.debug(f"🗣️🎶 Ignoring first audio chunk of a superseded generation (running: Gen {gen.id}).")
+            return
         logger.debug("🗣️🎶 First audio chunk synthesized. Setting TTS quick allowed event.")
-        if self.running_generation:
-            self.running_generation.quick_answer_first_chunk_ready = True
+        gen.timeline.mark("quick_tts_first_chunk")
+        gen.quick_answer_first_chunk_ready = True
+
+    def _notify_partial(self, gen: RunningGeneration, text: str):
+        """
+        Forwards an assistant text delta of `gen` to `on_partial_assistant_text`.
+
+        Deltas of a generation that is no longer the running one are stale and dropped.
+        """
+        if not self.on_partial_assistant_text:
+            return
+        if gen is not self.running_generation:
+            logger.debug(f"🗣️💬 [Gen {gen.id}] Dropping stale assistant text delta.")
+            return
+        try:
+            self.on_partial_assistant_text(text, gen.id)
+        except Exception as e:
+            logger.warning(f"🗣️💥 Callback error in on_partial_assistant_text: {e}")
 
     def preprocess_chunk(self, chunk: str) -> str:
         """
@@ -405,6 +518,7 @@ class SpeechPipelineManager:
             # Set state for active generation
             self.llm_generation_active = True
             self.stop_llm_finished_event.clear()
+            current_gen.transition(GenerationState.LLM)
             start_time = time.time()
             token_count = 0
 
@@ -424,6 +538,7 @@ class SpeechPipelineManager:
                         current_gen.quick_answer = self.clean_quick_answer(current_gen.quick_answer)
 
                     if token_count == 1:
+                        current_gen.timeline.mark("llm_first_token")
                         logger.info(f"🗣️🧠⏱️ [Gen {gen_id}] LLM Worker: TTFT: {(time.time() - start_time):.4f}s")
 
                     # Check for quick answer boundary only if not already provided
@@ -432,8 +547,8 @@ class SpeechPipelineManager:
                         if context:
                             # Debug log removed to reduce noise
                             current_gen.quick_answer = context
-                            if self.on_partial_assistant_text:
-                                self.on_partial_assistant_text(current_gen.quick_answer)
+                            current_gen.timeline.mark("quick_boundary")
+                            self._notify_partial(current_gen, current_gen.quick_answer)
                             current_gen.quick_answer_overhang = overhang
                             current_gen.quick_answer_provided = True
                             self.llm_answer_ready_event.set() # Signal TTS quick worker
@@ -450,8 +565,8 @@ class SpeechPipelineManager:
                     logger.info(f"🗣️🧠✔️ [Gen {gen_id}] LLM Worker: No context boundary found, using full response as quick answer.")
                     # quick_answer already contains the full text
                     current_gen.quick_answer_provided = True # Mark as provided
-                    if self.on_partial_assistant_text:
-                        self.on_partial_assistant_text(current_gen.quick_answer)
+                    current_gen.timeline.mark("quick_boundary")
+                    self._notify_partial(current_gen, current_gen.quick_answer)
                     self.llm_answer_ready_event.set() # Signal TTS quick worker
 
             except Exception as e:
@@ -467,8 +582,10 @@ class SpeechPipelineManager:
                     logger.debug(f"🗣️🧠❌ [Gen {gen_id}] LLM Aborted, requesting TTS quick/final stop.")
                     self.stop_tts_quick_request_event.set()
                     self.stop_tts_final_request_event.set()
+                    self.audio.interrupt()
                     # Wake up TTS quick worker if it's waiting
                     self.llm_answer_ready_event.set()
+                    current_gen.transition(GenerationState.ABORTED, reason="llm stream stopped or failed")
 
                 logger.debug(f"🗣️🧠🏁 [Gen {gen_id}] LLM Worker: Finished processing cycle.")
 
@@ -549,6 +666,8 @@ class SpeechPipelineManager:
 
                     # Texts are different enough, initiate abort
                     logger.debug(f"🗣️🛑🚀 {current_gen_id_str} Text different enough ({similarity:.2f}). Requesting abort.")
+                    # Superseded by a newer hypothesis: the user's final text may still match it
+                    self.running_generation.park_branch = True
                     start_time = time.time()
                     # Call the synchronous public abort method - THIS IS KEY
                     self.abort_generation(wait_for_completion=wait_for_finish, timeout=7.0, reason=f"check_abort found different text ({abort_reason})")
@@ -614,6 +733,7 @@ class SpeechPipelineManager:
             self.stop_tts_quick_finished_event.clear()
             current_gen.tts_quick_finished_event.clear() # Reset TTS finish marker for this attempt
             current_gen.tts_quick_started = True
+            current_gen.transition(GenerationState.QUICK_TTS)
 
             # --- tts_quick_allowed_event Wait Logic ---
             # This event seems intended for external control/timing, but isn't set anywhere
@@ -676,46 +796,56 @@ class SpeechPipelineManager:
 
                 current_gen.audio_quick_finished = True # Mark quick audio phase as done (even if aborted)
 
+                # Hand off to the final TTS worker (or end the generation)
+                if current_gen.audio_quick_aborted:
+                    current_gen.transition(GenerationState.ABORTED, reason="quick tts stopped or failed")
+                elif current_gen.quick_answer_provided:
+                    current_gen.transition(GenerationState.FINAL_TTS)
+                else:
+                    current_gen.transition(GenerationState.DONE)
+                    self._store_cached_response(current_gen)
+
+    def _final_tts_pending(self) -> bool:
+        """Returns True if the running generation is handed off to final TTS and not yet started."""
+        gen = self.running_generation
+        return (gen is not None
+                and gen.state == GenerationState.FINAL_TTS
+                and not gen.tts_final_started
+                and not gen.abortion_started)
+
     def _tts_final_worker_loop(self):
         """
         Worker thread target that handles TTS synthesis for the 'final' part of the answer.
 
-        Continuously checks the `running_generation`. It waits until the 'quick' TTS
-        phase (`tts_quick_started` and `audio_quick_finished`) is complete and was not
-        aborted (`audio_quick_aborted`). It also requires that a `quick_answer` was
-        actually identified (`quick_answer_provided`).
+        Blocks on `generation_condition` until the running generation transitions
+        to `GenerationState.FINAL_TTS`, which the quick TTS worker does once the
+        quick answer was synthesized successfully (an aborted quick answer moves
+        the generation to `ABORTED` instead, so final TTS never starts).
 
-        If conditions are met, it sets flags (`tts_final_started`), defines an inner
+        When woken, it sets `tts_final_started`, defines an inner
         generator (`get_generator`) that yields the `quick_answer_overhang` followed
         by the remaining chunks from the `llm_generator`. It then calls
         `audio.synthesize_generator` with this generator, feeding audio chunks into the
         *same* `audio_chunks` queue used by the quick worker. Handles stop requests
         (`stop_tts_final_request_event`) and signals completion/abortion via
-        `stop_tts_final_finished_event` and internal flags. Runs until `shutdown_event` is set.
+        `stop_tts_final_finished_event`, internal flags and the final state transition.
+        Runs until `shutdown_event` is set.
         """
         logger.debug("🗣️👄🚀 Final TTS Worker: Starting...")
         while not self.shutdown_event.is_set():
-            current_gen = self.running_generation
-            time.sleep(0.01) # Prevent tight spinning when idle
-
-            # --- Wait for prerequisites ---
-            if not current_gen: continue # No active generation
-            if current_gen.tts_final_started: continue # Final TTS already running for this gen
-            if not current_gen.tts_quick_started: continue # Quick TTS hasn't even started
-            if not current_gen.audio_quick_finished: continue # Quick TTS hasn't finished (successfully or aborted)
-
-            gen_id = current_gen.id # Get ID once prerequisites seem met
+            with self.generation_condition:
+                # Timeout only bounds the shutdown check, handoffs notify the condition
+                self.generation_condition.wait_for(
+                    lambda: self.shutdown_event.is_set() or self._final_tts_pending(),
+                    timeout=1.0,
+                )
+                if self.shutdown_event.is_set() or not self._final_tts_pending():
+                    continue
+                current_gen = self.running_generation
+                current_gen.tts_final_started = True # Claim it while holding the condition
+                current_gen.timeline.mark("final_tts_start")
 
-            # --- Check conditions to *start* final TTS ---
-            if current_gen.audio_quick_aborted:
-                #logger.debug(f"🗣️👄🙅 [Gen {gen_id}] Final TTS Worker: Quick TTS was aborted, skipping final TTS.")
-                continue
-            if not current_gen.quick_answer_provided:
-                 logger.debug(f"🗣️👄🙅 [Gen {gen_id}] Final TTS Worker: Quick answer boundary was not found, skipping final TTS (quick TTS handled everything).")
-                 continue
-            if current_gen.abortion_started:
-                 logger.debug(f"🗣️👄🙅 [Gen {gen_id}] Final TTS Worker: Generation is aborting, skipping final TTS.")
-                 continue
+            gen_id = current_gen.id
 
             # --- Conditions met, start final TTS ---
             logger.debug(f"🗣️👄🔄 [Gen {gen_id}] Final TTS Worker: Processing final TTS...")
@@ -727,12 +857,7 @@ class SpeechPipelineManager:
                     preprocessed_overhang = self.preprocess_chunk(current_gen.quick_answer_overhang)
                     logger.debug(f"🗣️👄< [Gen {gen_id}] Final TTS Gen: Yielding overhang: '{preprocessed_overhang[:50]}...'")
                     current_gen.final_answer += preprocessed_overhang # Add preprocessed version
-                    if self.on_partial_assistant_text:
-                         logger.debug(f"🗣️👄< [Gen {gen_id}] Final TTS Worker on_partial_assistant_text: Sending overhang.")
-                         try:
-                            self.on_partial_assistant_text(current_gen.quick_answer + current_gen.final_answer)
-                         except Exception as cb_e:
-                             logger.warning(f"🗣️💥 Callback error in on_partial_assistant_text (overhang): {cb_e}")
+                    self._notify_partial(current_gen, current_gen.quick_answer + current_gen.final_answer)
                     yield preprocessed_overhang
 
                 # Yield remaining chunks from LLM generator
@@ -747,12 +872,7 @@ class SpeechPipelineManager:
 
                          preprocessed_chunk = self.preprocess_chunk(chunk)
                          current_gen.final_answer += preprocessed_chunk
-                         if self.on_partial_assistant_text:
-                             # Debug logging removed to reduce noise
-                            try:
-                                 self.on_partial_assistant_text(current_gen.quick_answer + current_gen.final_answer)
-                            except Exception as cb_e:
-                                 logger.warning(f"🗣️💥 Callback error in on_partial_assistant_text (final chunk): {cb_e}")
+                         self._notify_partial(current_gen, current_gen.quick_answer + current_gen.final_answer)
 
                          yield preprocessed_chunk
                     logger.debug(f"🗣️👄< [Gen {gen_id}] Final TTS Gen: Finished iterating LLM chunks.")
@@ -763,7 +883,6 @@ class SpeechPipelineManager:
             # Set state for active generation
             self.tts_final_generation_active = True
             self.stop_tts_final_finished_event.clear()
-            current_gen.tts_final_started = True
             current_gen.tts_final_finished_event.clear() # Reset TTS finish marker
 
             try:
@@ -801,6 +920,9 @@ class SpeechPipelineManager:
                     current_gen.tts_final_finished_event.set() # Signal natural completion
 
                 current_gen.audio_final_finished = True # Mark final audio phase as done (even if aborted)
+                current_gen.transition(GenerationState.ABORTED if current_gen.audio_final_aborted else GenerationState.DONE,
+                                       reason="final tts stopped or failed")
+                self._store_cached_response(current_gen)
 
 
     # --- Processing Methods ---
@@ -847,18 +969,20 @@ class SpeechPipelineManager:
         self.abort_block_event.set() # Ensure block is released if check_abort didn't run/clear it
 
         # --- Create new generation object ---
-        self.running_generation = RunningGeneration(id=new_gen_id)
+        self.running_generation = RunningGeneration(id=new_gen_id, condition=self.generation_condition,
+                                                    timeline_stats=self.timeline_stats)
         self.running_generation.text = txt
 
+        history = self.history.messages() # Token-budgeted history with summary
+        if self._serve_cached_response(self.running_generation, txt, history):
+            return
+
         try:
-            logger.debug(f"🗣️🧠🚀 [Gen {new_gen_id}] Calling LLM generate...")
-            # TODO: Update history management if needed
-            # self.history.append({"role": "user", "content": txt}) # Example history update
-            self.running_generation.llm_generator = self.llm.generate(
-                text=txt,
-                history=self.history, # Pass current history
-                use_system_prompt=True,
-            )
+            logger.debug(f"🗣️🧠🚀 [Gen {new_gen_id}] Acquiring LLM branch...")
+            # Reuses a parked branch if an earlier hypothesis matches txt
+            branch = self.speculation.acquire(txt, history)
+            self.running_generation.branch = branch
+            self.running_generation.llm_generator = branch.reader()
             logger.debug(f"🗣️🧠✔️ [Gen {new_gen_id}] LLM generator created. Setting generator ready event.")
             self.generator_ready_event.set() # Signal LLM worker
         except Exception as e:
@@ -866,7 +990,56 @@ class SpeechPipelineManager:
             self.running_generation = None # Clean up if generator creation failed
 
 
-    def process_abort_generation(self):
+    def _serve_cached_response(self, gen: RunningGeneration, txt: str, history: list) -> bool:
+        """
+        Completes `gen` from the response cache if `txt` was answered before in the same context.
+
+        On a hit the cached PCM is queued into `gen.audio_chunks` at once and
+        the generation goes straight to done, no LLM or TTS work is started.
+        On a miss, a cacheable generation gets a recording audio queue so
+        its answer can be stored once it completes.
+
+        Returns:
+            True if the generation was served from the cache.
+        """
+        if not USE_RESPONSE_CACHE:
+            return False
+        gen.cache_key = self.response_cache.make_key(txt, history, voice=getattr(self.audio, "voice", ""))
+        cached = self.response_cache.get(gen.cache_key)
+        if cached is None:
+            if gen.cache_key is not None:
+                gen.audio_chunks = RecordingQueue()
+            return False
+
+        logger.info(f"🗣️💾 [Gen {gen.id}] Response cache hit for '{txt[:50]}' ({len(cached.pcm_chunks)} chunks)")
+        gen.from_cache = True
+        gen.quick_answer = cached.quick_answer
+        gen.final_answer = cached.final_answer
+        gen.quick_answer_provided = bool(cached.final_answer)
+        gen.llm_finished = True
+        gen.llm_finished_event.set()
+        for chunk in cached.pcm_chunks:
+            gen.audio_chunks.put_nowait(chunk)
+        gen.quick_answer_first_chunk_ready = True
+        gen.timeline.mark("quick_tts_first_chunk")
+        gen.tts_quick_started = gen.tts_final_started = True
+        gen.audio_quick_finished = gen.audio_final_finished = True
+        gen.tts_quick_finished_event.set()
+        gen.tts_final_finished_event.set()
+        self._notify_partial(gen, gen.quick_answer + gen.final_answer)
+        gen.transition(GenerationState.DONE)
+        return True
+
+    def _store_cached_response(self, gen: RunningGeneration):
+        """Stores a naturally completed, cacheable generation in the response cache."""
+        audio = gen.audio_chunks
+        if (gen.cache_key is None or gen.from_cache or gen.abortion_started
+                or gen.audio_quick_aborted or gen.audio_final_aborted
+                or not isinstance(audio, RecordingQueue) or audio.overflowed):
+            return
+        self.response_cache.put(gen.cache_key, gen.quick_answer, gen.final_answer, audio.recorded)
+
+    def process_abort_generation(self, reason: str = ""):
         """
         Handles the core logic of aborting the current generation.
 
@@ -904,6 +1077,7 @@ class SpeechPipelineManager:
             # --- Start Abort Process ---
             logger.debug(f"🗣️🛑🚀 {current_gen_id_str} Abortion process starting...")
             current_gen_obj.abortion_started = True # Mark immediately
+            current_gen_obj.transition(GenerationState.ABORTED, reason=reason)
             self.abort_block_event.clear() # Block new requests *before* waiting
             self.abort_completed_event.clear() # Clear completion flag at start
             self.stop_everything_event.set() # General signal (might be unused by workers)
@@ -924,8 +1098,8 @@ class SpeechPipelineManager:
                     self.stop_llm_finished_event.clear() # Reset for next time
                 else:
                     logger.warning(f"🗣️🛑🧠⏱️ {current_gen_id_str} Timeout waiting for LLM stop confirmation.")
-                # Attempt external cancellation if available
-                if hasattr(self.llm, 'cancel_generation'):
+                # Branch streams are parked or cancelled individually below
+                if current_gen_obj.branch is None and hasattr(self.llm, 'cancel_generation'):
                     logger.debug(f"🗣️🛑🧠🔌 {current_gen_id_str} Calling external LLM cancel_generation.")
                     try:
                         self.llm.cancel_generation()
@@ -943,6 +1117,7 @@ class SpeechPipelineManager:
             if is_tts_quick_potentially_active:
                 logger.debug(f"🗣️🛑👄❌ {current_gen_id_str} Stopping Quick TTS...")
                 self.stop_tts_quick_request_event.set()
+                self.audio.interrupt() # Wake the synthesis call blocked in AudioProcessor
                 self.llm_answer_ready_event.set() # Wake up TTS worker if it's waiting
                 stopped = self.stop_tts_quick_finished_event.wait(timeout=5.0) # Wait for TTS worker
                 if stopped:
@@ -962,7 +1137,7 @@ class SpeechPipelineManager:
             if is_tts_final_potentially_active:
                 logger.info(f"🗣️🛑👄❌ {current_gen_id_str} Stopping Final TTS...")
                 self.stop_tts_final_request_event.set()
-                # No event to .set() here to wake it up, it polls state
+                self.audio.interrupt() # Wake the synthesis call blocked in AudioProcessor
                 stopped = self.stop_tts_final_finished_event.wait(timeout=5.0) # Wait for TTS worker
                 if stopped:
                     logger.info(f"🗣️🛑👄👍 {current_gen_id_str} Final TTS stopped confirmation received.")
@@ -1005,6 +1180,9 @@ class SpeechPipelineManager:
             else:
                 logger.info(f"🗣️🛑🤷 {current_gen_id_str} Nothing seemed active to abort, running_generation is None.")
 
+            if current_gen_obj.branch is not None:
+                self.speculation.release(current_gen_obj.branch, park=current_gen_obj.park_branch)
+
 
             # --- Final Cleanup of Trigger Events ---
             # Ensure workers don't accidentally pick up stale signals if they restart quickly
@@ -1029,7 +1207,38 @@ class SpeechPipelineManager:
             txt: The user input text to be synthesized.
         """
         logger.debug(f"🗣️📥 Queueing 'prepare' request for: '{txt[:50]}...'")
-        self.requests_queue.put(PipelineRequest("prepare", txt))
+        self._queue_request(PipelineRequest("prepare", txt))
+
+    def promote_hypothesis(self, txt: str) -> bool:
+        """
+        Makes the generation for the user's final text the running one.
+
+        If the running generation already answers `txt` (same text, or only
+        trivial trailing words added) it is kept. Otherwise a 'prepare' for
+        `txt` is queued, which reuses a parked speculative branch if one
+        matches. Either way, the remaining parked branches are discarded, as
+        the turn is over.
+
+        Args:
+            txt: The final user transcription.
+
+        Returns:
+            True if the running generation was kept. False if it is about to
+            be replaced; until the queued promote is processed it is still
+            `running_generation`, so callers must not release its audio or text.
+        """
+        gen = self.running_generation
+        if gen is not None and not gen.abortion_started and gen.text and self.speculation.matches(gen.text, txt):
+            logger.debug(f"🗣️🔮 [Gen {gen.id}] Running generation matches final text.")
+            self.speculation.discard_all()
+            return True
+        logger.info(f"🗣️🔮 Final text differs from running hypothesis, promoting '{txt[:50]}'")
+        self._queue_request(PipelineRequest("promote", txt))
+        return False
+
+    def _queue_request(self, request: PipelineRequest):
+        """Hands a request to the request processor."""
+        self.requests_queue.put(request)
 
     def finish_generation(self):
         """
@@ -1041,7 +1250,7 @@ class SpeechPipelineManager:
         future features like finalizing history or state.
         """
         logger.info(f"🗣️📥 Queueing 'finish' request")
-        self.requests_queue.put(PipelineRequest("finish"))
+        self._queue_request(PipelineRequest("finish"))
 
     def abort_generation(self, wait_for_completion: bool = False, timeout: float = 7.0, reason: str = ""):
         """
@@ -1065,7 +1274,7 @@ class SpeechPipelineManager:
         logger.info(f"🗣️🛑🚀 Requesting 'abort' (wait={wait_for_completion}, reason='{reason}') for {gen_id_str}")
 
         # Call the internal synchronous processor
-        self.process_abort_generation()
+        self.process_abort_generation(reason)
 
         # Optionally wait for completion
         if wait_for_completion:
@@ -1079,6 +1288,25 @@ class SpeechPipelineManager:
             self.abort_block_event.set()
 
 
+    def wait_for_generation_state(self, states: Iterable[GenerationState], timeout: Optional[float] = None) -> Optional[GenerationState]:
+        """
+        Blocks until the running generation reaches one of `states`.
+
+        Args:
+            states: Target states (terminal states always end the wait).
+            timeout: Maximum time to wait in seconds (None waits indefinitely).
+
+        Returns:
+            The state reached, or None on timeout or if no generation is running.
+        """
+        targets = set(states) | set(TERMINAL_GENERATION_STATES)
+        gen = self.running_generation
+        if gen is None:
+            return None
+        with self.generation_condition:
+            reached = self.generation_condition.wait_for(lambda: gen.state in targets, timeout=timeout)
+            return gen.state if reached else None
+
     def reset(self):
         """
         Resets the pipeline state completely.
@@ -1088,9 +1316,16 @@ class SpeechPipelineManager:
         """
         logger.info("🗣️🔄 Resetting pipeline state...")
         self.abort_generation(wait_for_completion=True, timeout=7.0, reason="reset") # Ensure clean slate
-        self.history = []
+        self.history.clear()
+        self.speculation.discard_all()
+        self.speculation.reset_budget()
+        self.timeline_stats.reset()
         logger.info("🗣️🧹 History cleared. Reset complete.")
 
+    def get_timeline_stats(self) -> dict:
+        """Returns this session's per-stage generation latency histograms, outcomes, recent timelines and jitter buffer state."""
+        return {**self.timeline_stats.get_stats(), "jitter_buffer": self.audio.get_jitter_stats()}
+
     def shutdown(self):
         """
         Initiates a graceful shutdown of the pipeline manager and worker threads.
@@ -1115,6 +1350,8 @@ class SpeechPipelineManager:
         logger.info("🗣️🔌🔔 Signaling events to wake up any waiting threads...")
         self.generator_ready_event.set()
         self.llm_answer_ready_event.set()
+        with self.generation_condition:
+            self.generation_condition.notify_all()
         # Also signal 'finished' and 'completion' events
         self.stop_llm_finished_event.set()
         self.stop_tts_quick_finished_event.set()
@@ -1122,6 +1359,27 @@ class SpeechPipelineManager:
         self.abort_completed_event.set()
         self.abort_block_event.set() # Ensure request processor isn't blocked
 
+        self._stop_workers()
+
+        # Shutdown audio processor
+        logger.info("🗣️🔌👄 Shutting down AudioProcessor...")
+        if hasattr(self.audio, 'shutdown'):
+            try:
+                self.audio.shutdown()
+                logger.info("🗣️🔌👄✅ AudioProcessor shutdown complete")
+            except Exception as e:
+                logger.error(f"🗣️🔌👄💥 Error during AudioProcessor shutdown: {e}")
+        else:
+            logger.warning("🗣️🔌👄⚠️ AudioProcessor has no shutdown method")
+
+        # Get final thread statistics
+        thread_stats = self.thread_manager.get_thread_stats()
+        logger.info(f"🗣️🔌📊 Final thread stats: {thread_stats}")
+
+        logger.info("🗣️🔌✅ Shutdown complete.")
+
+    def _stop_workers(self):
+        """Stops the worker threads started by `_start_workers`."""
         # Use ManagedThread system for proper cleanup
         logger.info("🗣️🔌🧹 Stopping managed threads...")
         managed_threads = [
@@ -1149,20 +1407,3 @@ class SpeechPipelineManager:
         if failed_threads:
             logger.warning(f"🗣️🔌⚠️ Threads that failed to stop gracefully: {failed_threads}")
             logger.info("🗣️🔌🧹 Thread manager will handle zombie cleanup automatically")
-
-        # Shutdown audio processor
-        logger.info("🗣️🔌👄 Shutting down AudioProcessor...")
-        if hasattr(self.audio, 'shutdown'):
-            try:
-                self.audio.shutdown()
-                logger.info("🗣️🔌👄✅ AudioProcessor shutdown complete")
-            except Exception as e:
-                logger.error(f"🗣️🔌👄💥 Error during AudioProcessor shutdown: {e}")
-        else:
-            logger.warning("🗣️🔌👄⚠️ AudioProcessor has no shutdown method")
-
-        # Get final thread statistics
-        thread_stats = self.thread_manager.get_thread_stats()
-        logger.info(f"🗣️🔌📊 Final thread stats: {thread_stats}")
-
-        logger.info("🗣️🔌✅ Shutdown complete.")
\ No newline at end of file
@@ -30,11 +30,14 @@ const clearBtn2 = document.getElementById("clearBtn2");
 // State
 let socket = null;
 let audioContext = null;
+let ttsContext = null; // Playback at the TTS engine's native rate when the browser allows it
+const TTS_SAMPLE_RATE = 24000;
 let mediaStream = null;
 let micWorkletNode = null;
 let ttsWorkletNode = null;
 let isTTSPlaying = false;
 let ignoreIncomingTTS = false;
+let latestGeneration = 0; // Newest assistant generation seen, older ones are stale
 let chatHistory = [];
 let typingUser = "";
 let typingAssistant = "";
@@ -149,8 +152,14 @@ async function startRawPcmCapture() {
 }
 
 async function setupTTSPlayback() {
-  await audioContext.audioWorklet.addModule("/static/ttsPlaybackProcessor.js");
-  ttsWorkletNode = new AudioWorkletNode(audioContext, "tts-playback-processor");
+  try {
+    ttsContext = new AudioContext({ sampleRate: TTS_SAMPLE_RATE });
+  } catch (err) {
+    console.warn("Native TTS sample rate not supported, using default:", err);
+    ttsContext = new AudioContext();
+  }
+  await ttsContext.audioWorklet.addModule("/static/ttsPlaybackProcessor.js");
+  ttsWorkletNode = new AudioWorkletNode(ttsContext, "tts-playback-processor");
 
   ttsWorkletNode.port.onmessage = (event) => {
     const { type } = event.data;
@@ -174,7 +183,14 @@ async function setupTTSPlayback() {
       }
     }
   };
-  ttsWorkletNode.connect(audioContext.destination);
+  ttsWorkletNode.connect(ttsContext.destination);
+
+  // Tell the server which rate to stream at (it resamples only if this differs from the engine's)
+  if (socket && socket.readyState === WebSocket.OPEN) {
+    socket.send(
+      JSON.stringify({ type: "audio_config", tts_sample_rate: ttsContext.sampleRate })
+    );
+  }
 }
 
 function cleanupAudio() {
@@ -186,6 +202,10 @@ function cleanupAudio() {
     ttsWorkletNode.disconnect();
     ttsWorkletNode = null;
   }
+  if (ttsContext) {
+    ttsContext.close();
+    ttsContext = null;
+  }
   if (audioContext) {
     audioContext.close();
     audioContext = null;
@@ -267,7 +287,15 @@ function renderMessages() {
   messagesDiv.scrollTop = messagesDiv.scrollHeight;
 }
 
-function handleJSONMessage({ type, content }) {
+function isStaleGeneration(generation) {
+  // Messages without a generation (fillers, final answers) are never stale
+  if (generation == null) return false;
+  if (generation < latestGeneration) return true;
+  latestGeneration = generation;
+  return false;
+}
+
+function handleJSONMessage({ type, content, generation }) {
   // Removed stats message handling
 
   if (type === "session_info") {
@@ -278,6 +306,14 @@ function handleJSONMessage({ type, content }) {
     return;
   }
 
+  if (type === "ping") {
+    // Echo immediately; the server measures the round trip to size its audio buffer
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ type: "pong", content }));
+    }
+    return;
+  }
+
   if (type === "partial_user_request") {
     typingUser = content?.trim() ? escapeHtml(content) : "";
     setVoiceAvatarState("listening");
@@ -294,6 +330,7 @@ function handleJSONMessage({ type, content }) {
     return;
   }
   if (type === "partial_assistant_answer") {
+    if (isStaleGeneration(generation)) return;
     typingAssistant = content?.trim() ? escapeHtml(content) : "";
     setVoiceAvatarState("thinking");
     renderMessages();
@@ -309,7 +346,7 @@ function handleJSONMessage({ type, content }) {
     return;
   }
   if (type === "tts_chunk") {
-    if (ignoreIncomingTTS) return;
+    if (ignoreIncomingTTS || isStaleGeneration(generation)) return;
     const int16Data = base64ToInt16Array(content);
     if (ttsWorkletNode) {
       ttsWorkletNode.port.postMessage(int16Data);
@@ -376,6 +413,7 @@ async function startConnection() {
   socket = new WebSocket(`${wsProto}//${location.host}/ws`);
 
   socket.onopen = async () => {
+    latestGeneration = 0;
     updateStatus("Connected. Activating mic and TTS…");
     await startRawPcmCapture();
     await setupTTSPlayback();
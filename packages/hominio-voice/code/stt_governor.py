@@ -0,0 +1,248 @@
+# stt_governor.py
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from thread_manager import create_managed_thread
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    """STT decoding settings applied to a session at one quality level."""
+    name: str
+    beam_size: int
+    beam_size_realtime: int
+    realtime_processing_pause: float
+    realtime_model: Optional[str] = None  # None keeps the session's configured realtime model
+
+
+# Ordered from best quality to cheapest
+DEFAULT_QUALITY_TIERS: List[QualityTier] = [
+    QualityTier("high", beam_size=3, beam_size_realtime=3, realtime_processing_pause=0.03),
+    QualityTier("medium", beam_size=2, beam_size_realtime=1, realtime_processing_pause=0.1),
+    QualityTier("low", beam_size=1, beam_size_realtime=1, realtime_processing_pause=0.25, realtime_model="tiny.en"),
+]
+
+
+@dataclass
+class TierChange:
+    """A single quality tier transition of one session."""
+    timestamp: float
+    from_tier: str
+    to_tier: str
+    reason: str
+    rtf: float
+    queue_depth: float
+
+
+@dataclass
+class GovernedSession:
+    """Governor bookkeeping for one registered session."""
+    key: str
+    apply_tier: Callable[[QualityTier], None]
+    tier_index: int = 0
+    last_change: float = field(default_factory=time.time)
+    rtf_samples: Deque[float] = field(default_factory=lambda: deque(maxlen=20))
+    queue_depth: int = 0
+    changes: Deque[TierChange] = field(default_factory=lambda: deque(maxlen=50))
+    change_count: int = 0
+
+
+class STTQualityGovernor:
+    """
+    Load-adaptive quality governor for speech-to-text sessions.
+
+    Sessions report decode real-time factors (decode time / audio duration) and
+    their ingress queue depth. A background thread aggregates these across all
+    sessions and, under pressure, steps every session one quality tier down
+    (smaller beams, slower partials, smaller realtime model). When load drops
+    again, sessions are stepped back up one tier at a time. A minimum dwell time
+    between changes prevents oscillation. Every change is recorded per session.
+    """
+
+    def __init__(
+            self,
+            tiers: Optional[List[QualityTier]] = None,
+            rtf_high: float = 0.5,
+            rtf_low: float = 0.2,
+            queue_high: int = 20,
+            queue_low: int = 5,
+            interval_s: float = 1.0,
+            min_dwell_s: float = 5.0,
+        ) -> None:
+        """
+        Initializes the governor.
+
+        Args:
+            tiers: Quality tiers ordered from best to cheapest.
+            rtf_high: Mean real-time factor above which sessions are stepped down.
+            rtf_low: Mean real-time factor below which sessions may step back up.
+            queue_high: Max session queue depth above which sessions are stepped down.
+            queue_low: Max session queue depth below which sessions may step back up.
+            interval_s: Evaluation interval of the background thread.
+            min_dwell_s: Minimum time a session stays in a tier before another change.
+        """
+        self.tiers = tiers or DEFAULT_QUALITY_TIERS
+        self.rtf_high = rtf_high
+        self.rtf_low = rtf_low
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.interval_s = interval_s
+        self.min_dwell_s = min_dwell_s
+
+        self.sessions: Dict[str, GovernedSession] = {}
+        self.lock = threading.RLock()
+        self.shutdown_event = threading.Event()
+        self.monitor_thread = None
+
+    # --- Registration ---
+
+    def register(self, key: str, apply_tier: Callable[[QualityTier], None]) -> None:
+        """
+        Registers a session and starts the evaluation thread if needed.
+
+        Args:
+            key: Unique session key.
+            apply_tier: Callback applying a `QualityTier` to the session.
+        """
+        with self.lock:
+            self.sessions[key] = GovernedSession(key=key, apply_tier=apply_tier)
+        self.start()
+
+    def unregister(self, key: str) -> None:
+        """Removes a session from governance."""
+        with self.lock:
+            self.sessions.pop(key, None)
+
+    # --- Reporting ---
+
+    def report_decode(self, key: str, audio_s: float, decode_s: float) -> None:
+        """
+        Records one decode of `audio_s` seconds of audio that took `decode_s` seconds.
+
+        Args:
+            key: The reporting session.
+            audio_s: Duration of the decoded audio in seconds.
+            decode_s: Wall-clock decode time in seconds.
+        """
+        if audio_s <= 0:
+            return
+        with self.lock:
+            session = self.sessions.get(key)
+            if session:
+                session.rtf_samples.append(decode_s / audio_s)
+
+    def report_queue_depth(self, key: str, depth: int) -> None:
+        """Records the current ingress queue depth of a session."""
+        with self.lock:
+            session = self.sessions.get(key)
+            if session:
+                session.queue_depth = depth
+
+    # --- Evaluation ---
+
+    def _load(self) -> Tuple[float, int]:
+        """Returns (mean real-time factor, max queue depth) across all sessions."""
+        samples = [rtf for s in self.sessions.values() for rtf in s.rtf_samples]
+        mean_rtf = sum(samples) / len(samples) if samples else 0.0
+        max_queue = max((s.queue_depth for s in self.sessions.values()), default=0)
+        return mean_rtf, max_queue
+
+    def evaluate(self) -> None:
+        """Compares the aggregated load with the thresholds and steps sessions down or up."""
+        with self.lock:
+            if not self.sessions:
+                return
+            mean_rtf, max_queue = self._load()
+
+            if mean_rtf > self.rtf_high or max_queue > self.queue_high:
+                step, reason = 1, "pressure"
+            elif mean_rtf < self.rtf_low and max_queue < self.queue_low:
+                step, reason = -1, "relief"
+            else:
+                return
+
+            now = time.time()
+            for session in self.sessions.values():
+                new_index = session.tier_index + step
+                if not 0 <= new_index < len(self.tiers) or now - session.last_change < self.min_dwell_s:
+                    continue
+                self._change_tier(session, new_index, reason, mean_rtf, max_queue, now)
+
+    def _change_tier(self, session: GovernedSession, new_index: int, reason: str,
+                     rtf: float, queue_depth: float, now: float) -> None:
+        """Applies a new tier to a session and records the change."""
+        old_tier, new_tier = self.tiers[session.tier_index], self.tiers[new_index]
+        try:
+            session.apply_tier(new_tier)
+        except Exception as e:
+            logger.error(f"👂🎚️ Failed to apply tier '{new_tier.name}' to {session.key}: {e}", exc_info=True)
+            return
+
+        session.tier_index = new_index
+        session.last_change = now
+        # Samples measured under the old tier no longer describe the load
+        session.rtf_samples.clear()
+        session.change_count += 1
+        session.changes.append(TierChange(now, old_tier.name, new_tier.name, reason, rtf, queue_depth))
+        logger.info(f"👂🎚️ {session.key}: quality {old_tier.name} → {new_tier.name} "
+                    f"({reason}, rtf={rtf:.2f}, queue={queue_depth})")
+
+    def start(self) -> None:
+        """Starts the background evaluation thread (idempotent)."""
+        if self.monitor_thread and self.monitor_thread.is_alive:
+            return
+
+        def monitor_loop():
+            while not self.shutdown_event.wait(self.interval_s):
+                try:
+                    self.evaluate()
+                except Exception as e:
+                    logger.error(f"👂🎚️ Error in STT governor evaluation: {e}")
+
+        self.shutdown_event.clear()
+        self.monitor_thread = create_managed_thread(
+            target=monitor_loop,
+            name="STTQualityGovernor",
+            daemon=True,
+            shutdown_event=self.shutdown_event,
+        )
+
+    def stop(self) -> None:
+        """Stops the background evaluation thread."""
+        self.shutdown_event.set()
+
+    def get_session_stats(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the current tier and tier change history of one session."""
+        with self.lock:
+            session = self.sessions.get(key)
+            if not session:
+                return None
+            return {
+                "tier": self.tiers[session.tier_index].name,
+                "change_count": session.change_count,
+                "changes": [change.__dict__ for change in session.changes],
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns aggregated load and the tier of every session."""
+        with self.lock:
+            mean_rtf, max_queue = self._load()
+            return {
+                "mean_rtf": mean_rtf,
+                "max_queue_depth": max_queue,
+                "sessions": {key: self.tiers[s.tier_index].name for key, s in self.sessions.items()},
+            }
+
+
+# Global governor instance
+_global_stt_governor = STTQualityGovernor()
+
+def get_stt_governor() -> STTQualityGovernor:
+    """Get the global STT quality governor instance."""
+    return _global_stt_governor
@@ -2,6 +2,9 @@ import logging
 logger = logging.getLogger(__name__)
 
 from turndetect import strip_ending_punctuation
+from incremental_decoder import IncrementalDecoder, get_shared_whisper_model
+from stt_governor import QualityTier, get_stt_governor
+from adaptive_endpointing import SpeakerPauseModel
 from difflib import SequenceMatcher
 from colors import Colors
 from text_similarity import TextSimilarity
@@ -16,11 +19,17 @@ import json
 import copy
 import time
 import re
-from typing import Optional, Callable, Any, Dict, List
+from typing import Optional, Callable, Any, Dict, List, Tuple
 
 # --- Configuration Flags ---
 USE_TURN_DETECTION = True
 START_STT_SERVER = False # Set to True to use the client/server version of RealtimeSTT
+USE_INCREMENTAL_REALTIME = False # Decode only a sliding tail window in the realtime pass (local recorder only)
+INCREMENTAL_TAIL_WINDOW_S = 6.0 # Max seconds of audio re-decoded per realtime cycle in incremental mode
+USE_FINAL_SHORTCUT = True # Reuse a stable realtime hypothesis instead of a full final decode (local recorder only)
+USE_SPECULATIVE_FINAL = True # Start the final decode early in the end-of-turn pause, discard it if speech resumes (local recorder only)
+USE_STT_GOVERNOR = True # Let the load-adaptive governor step decoding quality down/up across sessions
+USE_ADAPTIVE_ENDPOINTING = True # Scale turn detection pauses by the speaker's learned pause distribution
 
 # --- Recorder Configuration (Moved here for clarity, can be externalized) ---
 # Default config if none provided to constructor
@@ -40,7 +49,7 @@ DEFAULT_RECORDER_CONFIG: Dict[str, Any] = {
     "realtime_processing_pause": 0.03,
     "silero_use_onnx": True,
     "silero_deactivity_detection": True,
-    "early_transcription_on_silence": 0,
+    "early_transcription_on_silence": 0, # Keep 0: TranscriptionProcessor runs its own speculative final (USE_SPECULATIVE_FINAL)
     "beam_size": 3,
     "beam_size_realtime": 3,
     "no_log_file": True,
@@ -91,6 +100,25 @@ class TranscriptionProcessor:
     # Number of detections within the cache age required to trigger potential end
     _SENTENCE_CACHE_TRIGGER_COUNT: int = 3
 
+    # --- Constants for Final Pass Shortcut ---
+    # Identical realtime hypotheses required during silence before promoting one to final
+    _FINAL_SHORTCUT_MIN_CONFIRMATIONS: int = 2
+    # Grace period after silence onset in which the hypothesis may still have changed
+    _FINAL_SHORTCUT_STABILITY_GRACE_S: float = 0.05
+    # Plausible speaking rate bounds (words per second of speech) for a promoted hypothesis
+    _FINAL_SHORTCUT_MIN_WORDS_PER_S: float = 0.4
+    _FINAL_SHORTCUT_MAX_WORDS_PER_S: float = 6.0
+    # Minimum mean avg_logprob of a tail-only re-decode, below this the full decode runs
+    _FINAL_SHORTCUT_MIN_AVG_LOGPROB: float = -0.8
+
+    # --- Constants for Speculative Final Transcription ---
+    # Minimum recorded audio before a speculative final decode is started
+    _SPECULATIVE_MIN_AUDIO_S: float = 0.3
+    # Pause before a speculative decode starts (capped at half the silence window); shorter pauses are mid-utterance
+    _SPECULATIVE_MIN_PAUSE_S: float = 0.25
+    # Max time the final pass waits for an in-flight speculative decode
+    _SPECULATIVE_WAIT_TIMEOUT_S: float = 3.0
+
 
     def __init__(
             self,
@@ -107,6 +135,7 @@ class TranscriptionProcessor:
             tts_allowed_event: Optional[threading.Event] = None, # Note: This seems unused in the original code provided
             pipeline_latency: float = 0.5,
             recorder_config: Optional[Dict[str, Any]] = None, # Allow passing custom config
+            incremental_realtime: bool = USE_INCREMENTAL_REALTIME,
     ) -> None:
         """
         Initializes the TranscriptionProcessor.
@@ -125,6 +154,9 @@ class TranscriptionProcessor:
             tts_allowed_event: An event that might be set when TTS synthesis is allowed (currently unused in provided logic).
             pipeline_latency: Estimated latency of the downstream processing pipeline in seconds. Used for timing calculations.
             recorder_config: Optional dictionary to override default RealtimeSTT recorder configuration.
+            incremental_realtime: If True, the realtime pass is handled by an `IncrementalDecoder`
+                                  that keeps a committed prefix and only decodes a sliding tail
+                                  window, instead of RealtimeSTT re-decoding the whole utterance.
         """
         self.source_language = source_language
         self.realtime_transcription_callback = realtime_transcription_callback
@@ -149,6 +181,24 @@ class TranscriptionProcessor:
         self.silence_active: bool = False
         self.last_audio_copy: Optional[np.ndarray] = None
 
+        # Realtime hypothesis stability tracking (used by the final pass shortcut)
+        self._stable_partial_text: str = ""
+        self._stable_partial_since: float = 0.0
+        self._stable_partial_confirmations: int = 0
+        self._final_candidate: Optional[Dict[str, Any]] = None
+        self.final_pass_stats: Dict[str, int] = {"speculative": 0, "promoted": 0, "tail": 0, "full": 0}
+
+        # Speculative final transcription started at silence onset
+        self._speculative_final: Optional[Dict[str, Any]] = None
+        self._speculative_inflight: Optional[Dict[str, Any]] = None # Decode running on the recorder, maybe discarded
+        self._speculative_lock = threading.Lock()
+
+        # Load-adaptive quality governor
+        self.on_quality_tier_change: Optional[Callable[[str], None]] = None
+        self.quality_tier: Optional[str] = None
+        self.governor_key = f"transcriber_{id(self)}"
+        self._configured_realtime_model: Any = None
+
         self.on_tts_allowed_to_synthesize: Optional[Callable] = None # Note: Seems unused
 
         self.text_similarity = TextSimilarity(focus='end', n_words=5)
@@ -162,16 +212,45 @@ class TranscriptionProcessor:
         self.recorder_config = copy.deepcopy(recorder_config if recorder_config else DEFAULT_RECORDER_CONFIG)
         self.recorder_config['language'] = self.source_language # Ensure language is set
 
+        # Per-speaker endpointing, learned from this session's silence events
+        self.pause_model: Optional[SpeakerPauseModel] = SpeakerPauseModel() if USE_ADAPTIVE_ENDPOINTING else None
+
         if USE_TURN_DETECTION:
             logger.debug(f"👂🔄 {Colors.YELLOW}Turn detection enabled{Colors.RESET}")
             self.turn_detection = TurnDetection(
                 on_new_waiting_time=self.on_new_waiting_time,
                 local=local,
-                pipeline_latency=pipeline_latency
+                pipeline_latency=pipeline_latency,
+                pause_model=self.pause_model,
+            )
+
+        self.incremental_decoder: Optional[IncrementalDecoder] = None
+        if incremental_realtime and START_STT_SERVER:
+            logger.warning("👂⚠️ Incremental realtime decoding needs the local recorder, falling back to RealtimeSTT realtime pass.")
+        elif incremental_realtime:
+            logger.debug(f"👂🧩 {Colors.YELLOW}Incremental realtime decoding enabled{Colors.RESET}")
+            self.incremental_decoder = IncrementalDecoder(
+                model_name=self.recorder_config.get("realtime_model_type", "base.en"),
+                language=self.source_language,
+                beam_size=self.recorder_config.get("beam_size_realtime", 3),
+                initial_prompt=self.recorder_config.get("initial_prompt_realtime"),
+                tail_window_s=INCREMENTAL_TAIL_WINDOW_S,
             )
 
         self._create_recorder()
         self._start_silence_monitor()
+        if self.incremental_decoder:
+            self._start_incremental_realtime_worker()
+
+        # Settings restored when a pooled instance is reused (tiers change them at runtime)
+        self._configured_quality = QualityTier(
+            "configured",
+            beam_size=self.recorder_config.get("beam_size", 3),
+            beam_size_realtime=self.recorder_config.get("beam_size_realtime", 3),
+            realtime_processing_pause=self.recorder_config.get("realtime_processing_pause", 0.03),
+        )
+        if USE_STT_GOVERNOR:
+            get_stt_governor().register(self.governor_key, self.apply_quality_tier)
 
     # --- Recorder Parameter Abstraction ---
 
@@ -240,6 +319,7 @@ class TranscriptionProcessor:
         """
         def monitor():
             hot = False
+            speculative_silence = None # Silence start the speculative final was started for
             # Initialize silence_time using the abstracted getter
             self.silence_time = self._get_recorder_param("speech_end_silence_start", 0.0)
 
@@ -290,7 +370,13 @@ class TranscriptionProcessor:
                                 self.on_tts_allowed_to_synthesize()
                                 self._last_tts_allowed_time = current_time
 
-                    # 3. Handle "Hot" state (potential full transcription)
+                    # 3. Start the speculative final once the pause is unlikely to be mid-utterance
+                    if (speculative_silence != speech_end_silence_start
+                            and time_since_silence > min(self._SPECULATIVE_MIN_PAUSE_S, silence_waiting_time / 2)):
+                        speculative_silence = speech_end_silence_start
+                        self._start_speculative_final()
+
+                    # 4. Handle "Hot" state (potential full transcription)
                     hot_condition_met = time_since_silence > start_hot_condition_time
                     if hot_condition_met and not hot:
                         hot = True
@@ -318,6 +404,64 @@ class TranscriptionProcessor:
         monitor_thread = create_managed_thread(target=monitor, name="TranscriptionSilenceMonitor", daemon=True)
         # Note: Thread starts automatically when created (auto_start=True by default)
 
+    # --- Incremental Realtime Decoding ---
+    def _get_recording_audio(self) -> Optional[np.ndarray]:
+        """
+        Returns the frames of the current recording as float32 audio without
+        touching the managed buffer or `last_audio_copy` (hot path, called every
+        realtime cycle).
+
+        Returns:
+            Float32 NumPy array normalized to [-1.0, 1.0], or None if no frames exist.
+        """
+        frames = getattr(self.recorder, "frames", None)
+        if not frames:
+            return None
+        pcm = np.frombuffer(b''.join(list(frames)), dtype=np.int16)
+        if pcm.size == 0:
+            return None
+        return pcm.astype(np.float32) / INT16_MAX_ABS_VALUE
+
+    def _start_incremental_realtime_worker(self) -> None:
+        """
+        Starts a background thread that replaces RealtimeSTT's realtime pass.
+
+        While the recorder is recording, it hands the growing utterance to the
+        `IncrementalDecoder`, which only decodes the tail after the committed
+        prefix, and forwards the stitched text through the regular partial
+        transcription path (`_handle_partial`).
+        """
+        def worker():
+            last_samples = 0
+            while not self.shutdown_performed:
+                pause = self.recorder_config.get("realtime_processing_pause", 0.03)
+                if not self.recorder or not self._is_recorder_recording():
+                    last_samples = 0
+                    time.sleep(pause)
+                    continue
+
+                audio = self._get_recording_audio()
+                if audio is None or len(audio) == last_samples:
+                    time.sleep(pause)
+                    continue
+                last_samples = len(audio)
+
+                try:
+                    decode_start = time.time()
+                    text = self.incremental_decoder.process(audio)
+                    if USE_STT_GOVERNOR:
+                        get_stt_governor().report_decode(self.governor_key, self.incremental_decoder.last_window_s, time.time() - decode_start)
+                except Exception as e:
+                    logger.error(f"👂💥 Incremental realtime decode failed: {e}", exc_info=True)
+                    time.sleep(pause)
+                    continue
+
+                if text and self._is_recorder_recording():
+                    self._handle_partial(text)
+                time.sleep(pause)
+
+        create_managed_thread(target=worker, name="TranscriptionIncrementalRealtime", daemon=True)
+
     def on_new_waiting_time(
             self,
             waiting_time: float,
@@ -364,9 +508,11 @@ class TranscriptionProcessor:
                 self.full_transcription_callback(text)
 
         if self.recorder:
+            if (USE_FINAL_SHORTCUT or USE_SPECULATIVE_FINAL) and not START_STT_SERVER and hasattr(self.recorder, 'wait_audio') and hasattr(self.recorder, 'transcribe'):
+                self._final_pass_with_shortcut(on_final)
             # The specific method might differ between client/local STT versions
             # Assuming a common 'text' method exists or is adapted
-            if hasattr(self.recorder, 'text'):
+            elif hasattr(self.recorder, 'text'):
                 self.recorder.text(on_final) # type: ignore # Assume method exists
             elif START_STT_SERVER:
                  logger.warning("👂⚠️ Recorder client does not have a 'text' method. Attempting to set 'on_final_transcription' parameter.")
@@ -381,6 +527,296 @@ class TranscriptionProcessor:
             logger.error("👂❌ Cannot set final callback: Recorder not initialized.")
 
 
+    # --- Load-Adaptive Quality ---
+    def apply_quality_tier(self, tier: QualityTier) -> None:
+        """
+        Applies decoding settings of a quality tier (called by the STT governor).
+
+        Realtime beam size, realtime pause and realtime model take effect on the
+        next realtime cycle. The final beam size is used by the tail-only final
+        decode; RealtimeSTT's full final decode keeps the beam size its
+        transcription worker was started with.
+
+        Args:
+            tier: The quality tier to apply.
+        """
+        self.recorder_config["beam_size"] = tier.beam_size
+        self.recorder_config["beam_size_realtime"] = tier.beam_size_realtime
+        self.recorder_config["realtime_processing_pause"] = tier.realtime_processing_pause
+        self._set_recorder_param("beam_size", tier.beam_size)
+        self._set_recorder_param("beam_size_realtime", tier.beam_size_realtime)
+        self._set_recorder_param("realtime_processing_pause", tier.realtime_processing_pause)
+
+        if not START_STT_SERVER:
+            self._apply_realtime_model(tier.realtime_model)
+
+        self.quality_tier = tier.name
+        if self.on_quality_tier_change:
+            self.on_quality_tier_change(tier.name)
+
+    def _apply_realtime_model(self, model_name: Optional[str]) -> None:
+        """
+        Swaps the realtime Whisper model, or restores the configured one if
+        `model_name` is None.
+
+        Args:
+            model_name: faster-whisper model name, or None for the configured model.
+        """
+        if self.incremental_decoder:
+            target = model_name or self.incremental_decoder.model_name
+            self.incremental_decoder.model = get_shared_whisper_model(target)
+            return
+        if not self.recorder:
+            return
+        if model_name is None:
+            if self._configured_realtime_model is not None:
+                self._set_recorder_param("realtime_model_type", self._configured_realtime_model)
+                self._configured_realtime_model = None
+            return
+        current = self._get_recorder_param("realtime_model_type")
+        if not hasattr(current, "transcribe"):
+            return  # Recorder decodes realtime with its main model, nothing to swap
+        if self._configured_realtime_model is None:
+            self._configured_realtime_model = current
+        self._set_recorder_param("realtime_model_type", get_shared_whisper_model(model_name))
+
+    def report_queue_depth(self, depth: int) -> None:
+        """
+        Reports the ingress audio queue depth of this session to the STT governor.
+
+        Args:
+            depth: Number of audio chunks waiting to be fed.
+        """
+        if USE_STT_GOVERNOR:
+            get_stt_governor().report_queue_depth(self.governor_key, depth)
+
+    # --- Final Pass Shortcut ---
+    def _track_realtime_stability(self, text: str) -> None:
+        """
+        Records how long the current realtime hypothesis has been unchanged and
+        how many realtime updates confirmed it.
+
+        Args:
+            text: The latest realtime transcription text.
+        """
+        normalized = self._normalize_text(text)
+        if normalized != self._stable_partial_text:
+            self._stable_partial_text = normalized
+            self._stable_partial_since = time.time()
+            self._stable_partial_confirmations = 0
+        else:
+            self._stable_partial_confirmations += 1
+
+    def _snapshot_final_candidate(self) -> None:
+        """
+        Captures the realtime hypothesis and its stability at the moment the
+        recorder stops, before the final pass starts.
+        """
+        self._final_candidate = {
+            "text": self.realtime_text or "",
+            "stable_since": self._stable_partial_since,
+            "confirmations": self._stable_partial_confirmations,
+            "silence_start": self.silence_time,
+            "stop_time": time.time(),
+        }
+
+    def _passes_quality_guard(self, text: str, audio: np.ndarray, trailing_silence_s: float) -> bool:
+        """
+        Sanity checks a shortcut transcription before it replaces the full decode.
+
+        Rejects empty text and speaking rates outside the plausible range, which
+        catches truncated hypotheses and repetition hallucinations.
+
+        Args:
+            text: The candidate final text.
+            audio: The complete utterance audio (float32, 16 kHz).
+            trailing_silence_s: Duration of silence at the end of the audio.
+
+        Returns:
+            True if the candidate may be used as final transcription.
+        """
+        normalized = self._normalize_text(text)
+        if not normalized:
+            return False
+        speech_s = max(len(audio) / SAMPLE_RATE - trailing_silence_s, 0.5)
+        words_per_s = len(normalized.split()) / speech_s
+        return self._FINAL_SHORTCUT_MIN_WORDS_PER_S <= words_per_s <= self._FINAL_SHORTCUT_MAX_WORDS_PER_S
+
+    def _try_final_shortcut(self, audio: Optional[np.ndarray]) -> Optional[Tuple[str, str]]:
+        """
+        Tries to produce the final transcription without a full Whisper decode.
+
+        1. Promote: the realtime hypothesis stayed unchanged for the whole silence
+           window and was confirmed by several realtime updates.
+        2. Tail: with incremental decoding, keep the committed prefix and only
+           re-decode the audio after it with the final beam size.
+
+        Both paths must pass `_passes_quality_guard`; the tail path also needs a
+        sufficient decoder log probability.
+
+        Args:
+            audio: The complete utterance audio (float32, 16 kHz).
+
+        Returns:
+            A tuple of (text, path) where path is "promoted" or "tail", or None if
+            the full decode must run.
+        """
+        candidate = self._final_candidate
+        if audio is None or len(audio) == 0 or not candidate:
+            return None
+
+        silence_start = candidate["silence_start"]
+        trailing_silence_s = candidate["stop_time"] - silence_start if silence_start else 0.0
+
+        if (silence_start
+                and candidate["stable_since"] <= silence_start + self._FINAL_SHORTCUT_STABILITY_GRACE_S
+                and candidate["confirmations"] >= self._FINAL_SHORTCUT_MIN_CONFIRMATIONS
+                and self._passes_quality_guard(candidate["text"], audio, trailing_silence_s)):
+            return candidate["text"], "promoted"
+
+        if self.incremental_decoder:
+            try:
+                result = self.incremental_decoder.decode_final(audio, beam_size=self.recorder_config.get("beam_size", 3))
+            except Exception as e:
+                logger.error(f"👂💥 Tail-only final decode failed: {e}", exc_info=True)
+                return None
+            if result:
+                text, avg_logprob = result
+                if (avg_logprob >= self._FINAL_SHORTCUT_MIN_AVG_LOGPROB
+                        and self._passes_quality_guard(text, audio, trailing_silence_s)):
+                    return text, "tail"
+        return None
+
+    # --- Speculative Final Transcription ---
+    def _start_speculative_final(self) -> None:
+        """
+        Starts a final-quality decode of the audio recorded so far, called by
+        the silence monitor once the pause exceeds `_SPECULATIVE_MIN_PAUSE_S`,
+        so the result is ready when the silence window elapses.
+
+        The result is cached against the number of samples it covers and is
+        discarded by `_discard_speculative_final` if speech resumes. A running
+        decode cannot be cancelled and occupies the recorder's transcription
+        worker, so at most one is in flight; none is started while a
+        discarded one is still running.
+        """
+        if not USE_SPECULATIVE_FINAL or START_STT_SERVER or not hasattr(self.recorder, 'perform_final_transcription'):
+            return
+        with self._speculative_lock:
+            inflight = self._speculative_inflight
+            if inflight is not None and not inflight["done"].is_set():
+                logger.debug("👂🔮 Speculative final still running, not starting another.")
+                return
+        audio = self._get_recording_audio()
+        if audio is None or len(audio) < self._SPECULATIVE_MIN_AUDIO_S * SAMPLE_RATE:
+            return
+
+        entry = {"samples": len(audio), "text": None, "done": threading.Event(), "started": time.time()}
+        with self._speculative_lock:
+            self._speculative_final = entry
+            self._speculative_inflight = entry
+
+        def run():
+            try:
+                entry["text"] = self.recorder.perform_final_transcription(audio)
+                logger.debug(f"👂🔮 Speculative final ready in {(time.time() - entry['started']) * 1000:.0f} ms: {entry['text']}")
+            except Exception as e:
+                logger.error(f"👂💥 Speculative final transcription failed: {e}", exc_info=True)
+            finally:
+                entry["done"].set()
+
+        create_managed_thread(target=run, name="TranscriptionSpeculativeFinal", daemon=True)
+
+    def _discard_speculative_final(self) -> None:
+        """Drops the speculative final result (speech resumed, so it no longer covers the utterance)."""
+        with self._speculative_lock:
+            if self._speculative_final is not None:
+                logger.debug("👂🔮 Speech resumed, speculative final discarded.")
+            self._speculative_final = None
+
+    def _get_speculative_final(self, audio: Optional[np.ndarray], wait: bool) -> Optional[str]:
+        """
+        Returns the speculative final text if it is still valid for `audio`.
+
+        Args:
+            audio: The complete utterance audio, or None to skip the length check.
+            wait: If True, waits (bounded) for an in-flight speculative decode.
+
+        Returns:
+            The speculative text, or None if unavailable, discarded or not finished.
+        """
+        with self._speculative_lock:
+            entry = self._speculative_final
+        if entry is None:
+            return None
+        # Audio after the cached length is silence only, otherwise the entry would have been discarded
+        if audio is not None and len(audio) < entry["samples"]:
+            return None
+        if wait:
+            entry["done"].wait(self._SPECULATIVE_WAIT_TIMEOUT_S)
+        if not entry["done"].is_set():
+            return None
+        with self._speculative_lock:
+            if self._speculative_final is not entry:
+                return None
+        return entry["text"] or None
+
+    def _final_pass_with_shortcut(self, on_final: Callable[[Optional[str]], None]) -> None:
+        """
+        Waits for the recorder to finish an utterance and runs the final pass,
+        using the speculative final decode or the realtime hypothesis where
+        possible and the recorder's full decode as fallback. Mirrors `AudioToTextRecorder.text()`, which delivers
+        the result to the callback on a separate thread.
+
+        Args:
+            on_final: The final transcription handler.
+        """
+        try:
+            self.recorder.wait_audio()
+        except Exception as e:
+            if not self.shutdown_performed:
+                logger.error(f"👂💥 Error waiting for recorded audio: {e}", exc_info=True)
+            return
+
+        interrupt_event = getattr(self.recorder, "interrupt_stop_event", None)
+        if self.shutdown_performed or not self.recorder or (interrupt_event and interrupt_event.is_set()):
+            return
+
+        stop_time = self._final_candidate["stop_time"] if self._final_candidate else time.time()
+        audio = getattr(self.recorder, "audio", None)
+        speculative_text = self._get_speculative_final(audio, wait=True)
+        shortcut = self._try_final_shortcut(audio) if USE_FINAL_SHORTCUT and not speculative_text else None
+        if speculative_text:
+            text, path = speculative_text, "speculative"
+        elif shortcut:
+            text, path = shortcut
+        else:
+            text, path = self.recorder.transcribe(), "full"
+        self._final_candidate = None
+        self._discard_speculative_final()
+
+        self.final_pass_stats[path] += 1
+        if USE_STT_GOVERNOR and path in ("tail", "full") and audio is not None:
+            get_stt_governor().report_decode(self.governor_key, len(audio) / SAMPLE_RATE, time.time() - stop_time)
+        logger.info(f"👂⚡ Final pass '{path}' took {(time.time() - stop_time) * 1000:.0f} ms after recording stop (stats: {self.final_pass_stats})")
+        threading.Thread(target=on_final, args=(text,), daemon=True).start()
+
+    def get_endpointing_stats(self) -> Dict[str, Any]:
+        """
+        Returns this session's end-of-turn statistics.
+
+        Returns:
+            Final pass path counts, the turn detection worker statistics (None
+            without turn detection) and the speaker pause model's distributions,
+            false-cut rate and endpoint scale (None without adaptive endpointing).
+        """
+        turn_detection = getattr(self, 'turn_detection', None) if USE_TURN_DETECTION else None
+        return {
+            "final_pass": dict(self.final_pass_stats),
+            "turn_detection": turn_detection.get_stats() if turn_detection else None,
+            "pause_model": self.pause_model.get_stats() if self.pause_model else None,
+        }
+
     def abort_generation(self) -> None:
         """
         Clears the cache of potentially yielded sentences.
@@ -658,6 +1094,38 @@ class TranscriptionProcessor:
              logger.error(f"👂💥 Error getting audio copy: {e}", exc_info=True)
              return self.last_audio_copy # Return last known on error
 
+    def _handle_partial(self, text: Optional[str]) -> None:
+        """
+        Processes a real-time transcription update, from the recorder or the
+        incremental decoder: updates `realtime_text`, runs potential sentence end
+        detection, and forwards changed text to the realtime callback and
+        TurnDetection.
+
+        Args:
+            text: The latest real-time transcription text.
+        """
+        if text is None:
+            # logger.warning(f"👂❓ {Colors.RED}Partial text received None{Colors.RESET}") # Can be noisy
+            return
+        self.realtime_text = text # Update the latest realtime text
+        self._track_realtime_stability(text)
+
+        # Detect potential sentence ends based on punctuation stability
+        self.detect_potential_sentence_end(text)
+
+        # Process for partial transcription callback and turn detection
+        stripped_partial_user_text_new = strip_ending_punctuation(text)
+        # Log only significant changes or all partials based on debug level maybe
+        if stripped_partial_user_text_new != self.stripped_partial_user_text:
+            self.stripped_partial_user_text = stripped_partial_user_text_new
+            logger.debug(f"👂📝 Partial transcription: {Colors.CYAN}{text}{Colors.RESET}")
+            if self.realtime_transcription_callback:
+                self.realtime_transcription_callback(text)
+            if USE_TURN_DETECTION and hasattr(self, 'turn_detection'):
+                self.turn_detection.calculate_waiting_time(text=text)
+        else: # Log less critical updates differently (optional, uncomment if needed)
+             logger.debug(f"👂📝 Partial transcription (no change after strip): {Colors.GRAY}{text}{Colors.RESET}")
+
     def _create_recorder(self) -> None:
         """
         Internal helper to initialize the RealtimeSTT recorder instance
@@ -672,12 +1140,20 @@ class TranscriptionProcessor:
             recorder_silence_start = self._get_recorder_param("speech_end_silence_start", None)
             self.silence_time = recorder_silence_start if recorder_silence_start else time.time()
             logger.debug(f"👂🤫 Silence detected (start_silence_detection called). Silence time set to: {self.silence_time}")
+            if self.pause_model:
+                self.pause_model.on_silence_start(self.silence_time)
+            # Re-evaluate the latest text now that the speech tail's prosody is known
+            if USE_TURN_DETECTION and hasattr(self, 'turn_detection') and self.realtime_text:
+                self.turn_detection.calculate_waiting_time(text=self.realtime_text)
 
 
         def stop_silence_detection():
             """Callback triggered when recorder detects end of silence (start of speech)."""
             self.set_silence(False)
             self.silence_time = 0.0 # Reset silence time
+            if self.pause_model:
+                self.pause_model.on_speech_resume()
+            self._discard_speculative_final()
             logger.debug("👂🗣️ Speech detected (stop_silence_detection called). Silence time reset.")
 
 
@@ -686,6 +1162,13 @@ class TranscriptionProcessor:
             logger.debug("👂▶️ Recording started.")
             self.set_silence(False) # Ensure silence is marked inactive
             self.silence_time = 0.0   # Ensure silence timer is reset
+            self._stable_partial_text = ""
+            self._stable_partial_confirmations = 0
+            self._discard_speculative_final()
+            if self.incremental_decoder:
+                self.incremental_decoder.reset()
+            if self.pause_model:
+                self.pause_model.on_speech_start()
             if self.on_recording_start_callback:
                 self.on_recording_start_callback()
 
@@ -695,15 +1178,20 @@ class TranscriptionProcessor:
             before final transcription might be generated.
             """
             logger.debug("👂⏹️ Recording stopped.")
+            self._snapshot_final_candidate()
+            if self.pause_model:
+                self.pause_model.on_turn_end()
             # Get audio *before* recorder might clear it for final processing
             audio_copy = self.get_last_audio_copy() # Use get_last_audio_copy for robustness
             if self.before_final_sentence:
                 logger.debug("👂➡️ Calling before_final_sentence callback...")
-                # Pass the audio and the *current* realtime text
+                # Pass the audio and the speculative final text if it is already
+                # available, otherwise the *current* realtime text
+                text = self._get_speculative_final(None, wait=False) or self.realtime_text
                 try:
                     # Return value might influence recorder, pass it through.
                     # Default to False if callback returns None or throws error
-                    result = self.before_final_sentence(audio_copy, self.realtime_text)
+                    result = self.before_final_sentence(audio_copy, text)
                     return result if isinstance(result, bool) else False
                 except Exception as e:
                     logger.error(f"👂💥 Error in before_final_sentence callback: {e}", exc_info=True)
@@ -712,26 +1200,7 @@ class TranscriptionProcessor:
 
         def on_partial(text: Optional[str]):
             """Callback triggered for real-time transcription updates."""
-            if text is None:
-                # logger.warning(f"👂❓ {Colors.RED}Partial text received None{Colors.RESET}") # Can be noisy
-                return
-            self.realtime_text = text # Update the latest realtime text
-
-            # Detect potential sentence ends based on punctuation stability
-            self.detect_potential_sentence_end(text)
-
-            # Process for partial transcription callback and turn detection
-            stripped_partial_user_text_new = strip_ending_punctuation(text)
-            # Log only significant changes or all partials based on debug level maybe
-            if stripped_partial_user_text_new != self.stripped_partial_user_text:
-                self.stripped_partial_user_text = stripped_partial_user_text_new
-                logger.debug(f"👂📝 Partial transcription: {Colors.CYAN}{text}{Colors.RESET}")
-                if self.realtime_transcription_callback:
-                    self.realtime_transcription_callback(text)
-                if USE_TURN_DETECTION and hasattr(self, 'turn_detection'):
-                    self.turn_detection.calculate_waiting_time(text=text)
-            else: # Log less critical updates differently (optional, uncomment if needed)
-                 logger.debug(f"👂📝 Partial transcription (no change after strip): {Colors.GRAY}{text}{Colors.RESET}")
+            self._handle_partial(text)
 
 
         # --- Prepare Recorder Configuration ---
@@ -746,6 +1215,9 @@ class TranscriptionProcessor:
         # *** END CORRECTION ***
         active_config["on_recording_start"] = start_recording
         active_config["on_recording_stop"] = stop_recording # This callback happens before final text
+        if self.incremental_decoder:
+            # Realtime text comes from the incremental worker instead of the recorder
+            active_config["enable_realtime_transcription"] = False
 
         # Log the configuration being used
         def _pretty(v, max_len=60):
@@ -840,6 +1312,16 @@ class TranscriptionProcessor:
             # Reset turn detection if enabled
             if USE_TURN_DETECTION and hasattr(self, 'turn_detection'):
                 self.turn_detection.reset()
+
+            if self.incremental_decoder:
+                self.incremental_decoder.reset()
+
+            # A new session is a new speaker
+            if self.pause_model:
+                self.pause_model.reset()
+
+            # Detach the previous session's tier metric
+            self.on_quality_tier_change = None
             
             # Recreate recorder if it doesn't exist
             if not self.recorder:
@@ -851,6 +1333,11 @@ class TranscriptionProcessor:
                     
             # NOTE: Don't restart silence monitor here - it will be started
             # automatically when the transcription loop begins processing
+
+            # Restore configured decoding quality and re-register with the governor
+            if self.recorder and USE_STT_GOVERNOR:
+                self.apply_quality_tier(self._configured_quality)
+                get_stt_governor().register(self.governor_key, self.apply_quality_tier)
             
             if self.recorder:
                 logger.info("👂✅ TranscriptionProcessor successfully reinitialized")
@@ -877,6 +1364,9 @@ class TranscriptionProcessor:
                 logger.info("👂🔌 Cleaning up audio buffer manager...")
                 self.audio_buffer_manager.clear()
                 
+            if USE_STT_GOVERNOR:
+                get_stt_governor().unregister(self.governor_key)
+
             if hasattr(self, 'resource_tracker'):
                 logger.info("👂🔌 Cleaning up resource tracker...")
                 self.resource_tracker.untrack_resource("global", "TranscriptionProcessor", f"transcription_processor_{id(self)}")
@@ -0,0 +1,256 @@
+# tts_cache.py
+import collections
+import hashlib
+import logging
+import mmap
+import os
+import threading
+from queue import Queue
+from typing import Any, Dict, List, Optional, Tuple
+
+from thread_manager import create_managed_thread
+
+logger = logging.getLogger(__name__)
+
+# In-memory PCM budget (bytes) across all voices
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 32 * 1024 * 1024))
+# On-disk PCM budget (bytes); 0 disables spilling to disk
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.expanduser("~/.cache/hominio/tts_pcm"))
+# "0" disables the cache
+USE_TTS_CACHE = os.getenv("TTS_CACHE", "1") != "0"
+# Size of the chunks cached audio is streamed in (matches the stream's playout chunk size)
+CACHED_CHUNK_BYTES = 4096
+
+
+def preprocess_text(text: str) -> str:
+    """Normalizes a sentence the way it reaches the engine (whitespace-collapsed)."""
+    return " ".join(text.split())
+
+
+def cache_key(engine: str, voice: str, text: str) -> str:
+    """Content address of a sentence's audio for an engine and voice."""
+    payload = f"{engine}\x00{voice}\x00{preprocess_text(text)}".encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class TTSAudioCache:
+    """
+    Content-addressed cache of synthesized PCM, one entry per sentence.
+
+    Recently used sentences live in an in-memory LRU bounded by
+    `memory_bytes`. Entries evicted from memory are spilled to one file per
+    key in `disk_dir` and served from a read-only memory map on later hits,
+    so repeated greetings and apologies survive memory pressure and restarts.
+
+    Spilling runs on a background thread, never on the synthesis thread.
+    It keeps an LRU index of the spill files (scanned once at startup) and
+    their total size, and prunes the oldest files once the total exceeds
+    `disk_bytes`. Entries waiting to be written are still served from
+    memory.
+    """
+
+    def __init__(self, memory_bytes: int = TTS_CACHE_MEMORY_BYTES, disk_bytes: int = TTS_CACHE_DISK_BYTES,
+                 disk_dir: Optional[str] = TTS_CACHE_DIR) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            memory_bytes: Maximum PCM bytes held in memory.
+            disk_bytes: Maximum PCM bytes spilled to disk (0 disables spilling).
+            disk_dir: Directory of the spill files.
+        """
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.disk_dir = disk_dir if disk_bytes > 0 else None
+        self._entries: "collections.OrderedDict[str, bytes]" = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "spills": 0,
+                                      "spill_drops": 0}
+        # Disk tier state, guarded by _lock; the index is only changed by the spill worker and disk hits
+        self._pending: Dict[str, bytes] = {} # Evicted from memory, not yet written
+        self._pending_bytes = 0
+        self._disk_index: "collections.OrderedDict[str, int]" = collections.OrderedDict() # key -> size, oldest first
+        self._disk_used = 0
+        self._spill_queue: Queue = Queue()
+        self._spill_thread = None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pcm")
+
+    def get(self, key: str) -> Optional[List[bytes]]:
+        """
+        Returns the cached audio of a sentence as stream-sized chunks, or None.
+
+        Disk hits are promoted back into memory.
+        """
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is not None:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._chunked(pcm)
+
+            pcm = self._pending.get(key)
+        if pcm is None:
+            pcm = self._read_spilled(key)
+        with self._lock:
+            if pcm is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+            evicted = self._insert_locked(key, pcm)
+        self._spill(evicted)
+        return self._chunked(pcm)
+
+    def put(self, key: str, chunks: List[bytes]) -> None:
+        """Stores the complete audio of a sentence."""
+        pcm = b"".join(chunks)
+        if not pcm or len(pcm) > self.memory_bytes:
+            return
+        with self._lock:
+            evicted = self._insert_locked(key, pcm)
+            self.stats["stores"] += 1
+        self._spill(evicted)
+
+    @staticmethod
+    def _chunked(pcm: bytes) -> List[bytes]:
+        return [pcm[i:i + CACHED_CHUNK_BYTES] for i in range(0, len(pcm), CACHED_CHUNK_BYTES)]
+
+    def _insert_locked(self, key: str, pcm: bytes) -> List[Tuple[str, bytes]]:
+        """Adds to the LRU and returns the oldest entries evicted beyond the memory budget (lock held)."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = pcm
+        self._bytes += len(pcm)
+        evicted = []
+        while self._bytes > self.memory_bytes:
+            old_key, old_pcm = self._entries.popitem(last=False)
+            self._bytes -= len(old_pcm)
+            evicted.append((old_key, old_pcm))
+        return evicted
+
+    # --- Disk tier ---
+
+    def _spill(self, evicted: List[Tuple[str, bytes]]) -> None:
+        """Hands entries evicted from memory to the spill worker (drops them if it is too far behind)."""
+        if not self.disk_dir or not evicted:
+            return
+        with self._lock:
+            for key, pcm in evicted:
+                if key in self._disk_index or key in self._pending:
+                    continue
+                if self._pending_bytes + len(pcm) > self.memory_bytes:
+                    self.stats["spill_drops"] += 1
+                    continue
+                self._pending[key] = pcm
+                self._pending_bytes += len(pcm)
+                self._spill_queue.put(key)
+            if self._spill_thread is None:
+                self._spill_thread = create_managed_thread(target=self._spill_worker, name="TTSCacheSpill", daemon=True)
+
+    def _spill_worker(self) -> None:
+        """Writes pending entries to disk (atomic rename) and prunes beyond the disk budget."""
+        self._load_disk_index()
+        while True:
+            key = self._spill_queue.get()
+            with self._lock:
+                pcm = self._pending.get(key)
+                if pcm is not None and key in self._disk_index: # Spilled in an earlier run
+                    self._pending.pop(key)
+                    self._pending_bytes -= len(pcm)
+                    pcm = None
+            if pcm is None:
+                continue
+            path = self._path(key)
+            written = False
+            try:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(pcm)
+                os.replace(tmp_path, path)
+                written = True
+            except OSError as e:
+                logger.warning(f"👄💾💥 Failed to spill TTS cache entry {key}: {e}")
+            with self._lock:
+                self._pending.pop(key, None)
+                self._pending_bytes -= len(pcm)
+                if written:
+                    self.stats["spills"] += 1
+                    self._disk_index[key] = len(pcm)
+                    self._disk_used += len(pcm)
+                    victims = []
+                    while self._disk_used > self.disk_bytes and self._disk_index:
+                        victim, size = self._disk_index.popitem(last=False)
+                        self._disk_used -= size
+                        victims.append(victim)
+            if written:
+                for victim in victims:
+                    try:
+                        os.remove(self._path(victim))
+                    except OSError:
+                        pass
+
+    def _load_disk_index(self) -> None:
+        """Indexes the spill files of earlier runs, oldest first (once, on the spill worker)."""
+        try:
+            files = []
+            for entry in os.scandir(self.disk_dir):
+                if entry.name.endswith(".pcm"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-len(".pcm")], stat.st_size))
+        except OSError:
+            return
+        with self._lock:
+            for _, key, size in sorted(files):
+                if key not in self._disk_index:
+                    self._disk_index[key] = size
+                    self._disk_used += size
+
+    def _read_spilled(self, key: str) -> Optional[bytes]:
+        """Reads a spilled entry through a read-only memory map."""
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pcm = mm[:]
+            os.utime(path) # The disk index of the next run is ordered by mtime
+            return pcm
+        except (OSError, ValueError):
+            return None # Missing (or empty) file
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, hit rates and memory usage."""
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "disk_entries": len(self._disk_index),
+                "disk_bytes": self._disk_used,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_hit_rate": self.stats["memory_hits"] / lookups if lookups else 0.0,
+            }
+
+
+# Global TTS audio cache instance
+_global_tts_cache: Optional[TTSAudioCache] = None
+_global_tts_cache_lock = threading.Lock()
+
+def get_tts_cache() -> TTSAudioCache:
+    """Get the global TTS audio cache instance (created on first use)."""
+    global _global_tts_cache
+    with _global_tts_cache_lock:
+        if _global_tts_cache is None:
+            _global_tts_cache = TTSAudioCache()
+        return _global_tts_cache
@@ -1,4 +1,5 @@
 import logging
+import os
 import queue
 import threading
 import time
@@ -14,11 +15,21 @@ import transformers
 import collections
 import torch
 import re
+import string
+
+from turndetect_onnx import ONNXRUNTIME_AVAILABLE, OnnxCompletionClassifier, export_quantized_model, quantized_model_path
+from completion_cache import COMMON_PHRASES, get_completion_cache
+from adaptive_endpointing import SpeakerPauseModel
 
 # Configuration constants
 model_dir_local = "KoljaB/SentenceFinishedClassification"
 model_dir_cloud = "/root/models/sentenceclassification/"
 sentence_end_marks = ['.', '!', '?', '。'] # Characters considered sentence endings
+# Classifier backend per deployment: "torch" (float32 PyTorch) or "onnx" (int8 ONNX Runtime, for CPU nodes)
+TURN_DETECTION_BACKEND = os.getenv("TURN_DETECTION_BACKEND", "torch").lower()
+
+# Weight of the acoustic prosody score against the text completion probability
+PROSODY_WEIGHT = 0.3
 
 # Anchor points for probability-to-pause interpolation
 anchor_points = [
@@ -71,6 +82,22 @@ def preprocess_text(text: str) -> str:
 
     return text
 
+def clean_for_model(processed_text: str) -> str:
+    """
+    Prepares preprocessed text for the sentence completion model (and its cache key).
+
+    Removes all punctuation, then any remaining non-letter characters and
+    whitespace at the end.
+
+    Args:
+        processed_text: Text already passed through `preprocess_text`.
+
+    Returns:
+        The model-ready text.
+    """
+    transtext = processed_text.translate(str.maketrans('', '', string.punctuation))
+    return re.sub(r'[^a-zA-Z\s]+$', '', transtext).rstrip()
+
 def strip_ending_punctuation(text: str) -> str:
     """
     Removes trailing punctuation marks defined in `sentence_end_marks`.
@@ -188,16 +215,53 @@ class TurnDetection:
     _shared_tokenizer = None
     _model_loading_lock = threading.Lock()
     _device = None
+    _onnx_classifier = None
+    _completion_cache_prewarmed = False
+    _model_id = None
+
+    @classmethod
+    def _load_onnx_backend(cls, model=None) -> bool:
+        """
+        Sets up the quantized ONNX backend if `TURN_DETECTION_BACKEND` selects it.
+
+        Reuses a previously exported model from the cache directory; otherwise
+        exports and quantizes `model` (requires the loaded PyTorch model).
+
+        Args:
+            model: The loaded PyTorch classifier, or None if not loaded yet.
+
+        Returns:
+            True if the ONNX backend is active, False to use (or load) PyTorch.
+        """
+        if TURN_DETECTION_BACKEND != "onnx":
+            return False
+        if not ONNXRUNTIME_AVAILABLE:
+            logger.warning("🎤⚠️ TURN_DETECTION_BACKEND=onnx but onnxruntime is not installed, using PyTorch.")
+            return False
+
+        path = quantized_model_path()
+        try:
+            if not os.path.exists(path):
+                if model is None:
+                    return False  # Export needs the PyTorch model, load it first
+                export_quantized_model(model, cls._shared_tokenizer)
+            cls._onnx_classifier = OnnxCompletionClassifier(path, cls._shared_tokenizer)
+            return True
+        except Exception as e:
+            logger.error(f"🎤💥 Failed to set up ONNX turn detection backend, using PyTorch: {e}")
+            cls._onnx_classifier = None
+            return False
 
     @classmethod
     def _ensure_model_loaded(cls, local: bool = False):
         """Ensures the shared model and tokenizer are loaded exactly once."""
         with cls._model_loading_lock:
-            if cls._shared_model is not None:
+            if cls._shared_model is not None or cls._onnx_classifier is not None:
                 return  # Already loaded
             
             logger.info("🎤🔄 Loading shared turn detection model...")
             model_dir = model_dir_local if local else model_dir_cloud
+            cls._model_id = model_dir
             cls._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
             logger.info(f"🎤🔌 Using device: {cls._device}")
             
@@ -211,6 +275,10 @@ class TurnDetection:
             except Exception as e:
                 logger.info(f"🎤🔄 Local tokenizer loading failed ({e}), trying remote...")
                 cls._shared_tokenizer = transformers.DistilBertTokenizerFast.from_pretrained(model_dir)
+
+            # A cached quantized ONNX model makes the PyTorch model unnecessary
+            if cls._load_onnx_backend():
+                return
             
             # Load model with proper CUDA handling
             def _safe_model_to_device(model, device):
@@ -312,12 +380,31 @@ class TurnDetection:
                 _ = cls._shared_model(**inputs)  # Run one prediction
             logger.info("🎤✅ Shared classification model warmed up.")
 
+            # First run with the ONNX backend: export and quantize the model just loaded
+            cls._load_onnx_backend(cls._shared_model)
+
+    @classmethod
+    def _prewarm_completion_cache(cls) -> None:
+        """Prewarms the process-wide completion cache once, after the model is loaded."""
+        with cls._model_loading_lock:
+            if cls._completion_cache_prewarmed:
+                return
+            cls._completion_cache_prewarmed = True
+        try:
+            # Phrases take the same path as live text, so their keys match real lookups
+            phrases = [clean_for_model(preprocess_text(phrase)) for phrase in COMMON_PHRASES]
+            backend = "onnx-int8" if cls._onnx_classifier is not None else "torch"
+            get_completion_cache().prewarm(cls._predict_uncached, phrases, variant=f"{backend}-{cls._model_id}")
+        except Exception as e:
+            logger.warning(f"🎤⚠️ Completion cache prewarm failed: {e}")
+
     def __init__(
         self,
         on_new_waiting_time: callable,
         local: bool = False,
         pipeline_latency: float = 0.5,
         pipeline_latency_overhead: float = 0.1,
+        pause_model: Optional[SpeakerPauseModel] = None,
     ) -> None:
         """
         Initializes the TurnDetection instance.
@@ -331,10 +418,12 @@ class TurnDetection:
             local: If True, loads the model from `model_dir_local`, otherwise from `model_dir_cloud`.
             pipeline_latency: Estimated base latency of the STT/processing pipeline in seconds.
             pipeline_latency_overhead: Additional buffer added to the pipeline latency.
+            pause_model: Optional per-speaker pause model scaling the suggested pauses.
         """
         # Ensure shared model is loaded
         self._ensure_model_loaded(local)
-        
+        self._prewarm_completion_cache()
+
         self.on_new_waiting_time = on_new_waiting_time
 
         self.current_waiting_time: float = -1 # Tracks the last suggested time
@@ -342,7 +431,12 @@ class TurnDetection:
         self.text_time_deque: collections.deque[tuple[float, str]] = collections.deque(maxlen=100)
         self.texts_without_punctuation: collections.deque[tuple[str, str]] = collections.deque(maxlen=20)
 
-        self.text_queue: queue.Queue[str] = queue.Queue() # Queue for incoming text
+        self.text_queue: queue.Queue[tuple[float, str]] = queue.Queue() # Queue of (enqueue time, text)
+        # Latest-only processing bookkeeping
+        self._last_model_input: Optional[str] = None
+        self._last_prob_complete: float = 0.0
+        self.suggestion_staleness: collections.deque[float] = collections.deque(maxlen=100) # Seconds from enqueue to processing
+        self.worker_stats: dict[str, int] = {"processed": 0, "collapsed": 0, "inference_skipped": 0}
         self.text_worker = create_managed_thread(
             target=self._text_worker,
             name="TurnDetection_TextWorker",
@@ -354,14 +448,17 @@ class TurnDetection:
         self.device = self._device
         self.tokenizer = self._shared_tokenizer
         self.classification_model = self._shared_model
+        self.onnx_classifier = self._onnx_classifier
         
         self.max_length: int = 128 # Max sequence length for the model
         self.pipeline_latency: float = pipeline_latency
         self.pipeline_latency_overhead: float = pipeline_latency_overhead
+        self.pause_model: Optional[SpeakerPauseModel] = pause_model
+        # Optional acoustic turn-end score (0.0-1.0 or None), set by AudioInputProcessor
+        self.prosody_source: Optional[Callable[[], Optional[float]]] = None
 
-        # Initialize completion probability cache with OrderedDict for LRU behavior
-        self._completion_probability_cache: collections.OrderedDict[str, float] = collections.OrderedDict()
-        self._completion_probability_cache_max_size: int = 256 # Max size for the LRU cache
+        # Completion probabilities are cached process-wide, shared by all sessions
+        self.completion_cache = get_completion_cache()
 
         # Default dynamic pause settings (initialized for speed_factor=0.0)
         self.detection_speed: float = 0.5
@@ -447,8 +544,8 @@ class TurnDetection:
         """
         Calculates the probability that the given sentence is complete using the ML model.
 
-        Uses an internal LRU cache (`_completion_probability_cache`) to store and
-        retrieve results for previously seen sentences, improving performance.
+        Uses the process-wide completion cache (keyed by the normalized model
+        input) so sentences seen by any session skip model inference.
 
         Args:
             sentence: The input sentence string to analyze.
@@ -458,41 +555,52 @@ class TurnDetection:
             sentence is considered complete by the model.
         """
         # Check cache first
-        if sentence in self._completion_probability_cache:
-            self._completion_probability_cache.move_to_end(sentence) # Mark as recently used
-            return self._completion_probability_cache[sentence]
+        prob_complete = self.completion_cache.get(sentence)
+        if prob_complete is not None:
+            return prob_complete
+
+        # If not in cache, run model prediction and store the result
+        prob_complete = self._predict_uncached(sentence)
+        self.completion_cache.put(sentence, prob_complete)
+        return prob_complete
+
+    @classmethod
+    def _predict_uncached(cls, sentence: str) -> float:
+        """Runs the active backend (ONNX or PyTorch) on a sentence (no caching)."""
+        if cls._onnx_classifier is not None:
+            return cls._onnx_classifier.predict(sentence)
+        return cls._predict_torch(sentence)
 
-        # If not in cache, run model prediction
-        import torch
+    @classmethod
+    def _predict_torch(cls, sentence: str) -> float:
+        """
+        Runs the PyTorch classifier on a sentence (no caching).
+
+        Args:
+            sentence: The model-ready input sentence.
+
+        Returns:
+            The probability (0.0 to 1.0) of the 'complete' label.
+        """
         import torch.nn.functional as F
 
-        inputs = self.tokenizer(
+        inputs = cls._shared_tokenizer(
             sentence,
             return_tensors="pt",
             truncation=True,
             padding="max_length",
-            max_length=self.max_length
+            max_length=128
         )
         # Move input tensors to the correct device (CPU or GPU)
-        inputs = {key: value.to(self.device) for key, value in inputs.items()}
+        inputs = {key: value.to(cls._device) for key, value in inputs.items()}
 
         with torch.no_grad(): # Disable gradient calculation for inference
-            outputs = self.classification_model(**inputs)
+            outputs = cls._shared_model(**inputs)
 
         logits = outputs.logits
         # Apply softmax to get probabilities [prob_incomplete, prob_complete]
         probabilities = F.softmax(logits, dim=1).squeeze().tolist()
-        prob_complete = probabilities[1] # Index 1 corresponds to 'complete' label
-
-        # Store the result in the cache
-        self._completion_probability_cache[sentence] = prob_complete
-        self._completion_probability_cache.move_to_end(sentence) # Mark as recently used
-
-        # Maintain cache size (LRU eviction)
-        if len(self._completion_probability_cache) > self._completion_probability_cache_max_size:
-            self._completion_probability_cache.popitem(last=False) # Remove the least recently used item
-
-        return prob_complete
+        return probabilities[1] # Index 1 corresponds to 'complete' label
 
     def get_suggested_whisper_pause(self, text: str) -> float:
         """
@@ -527,39 +635,58 @@ class TurnDetection:
         """
         Background worker thread that processes text from the queue for turn detection.
 
-        Continuously retrieves text items from `self.text_queue`. For each item, it:
+        Continuously retrieves text items from `self.text_queue`. Partial transcripts
+        can arrive faster than the classifier runs, so a backlog is collapsed to the
+        newest text: older items only update the history deques. For the newest item, it:
         1. Preprocesses the text.
         2. Updates text history deques.
         3. Finds recent matching text segments to analyze punctuation consistency.
         4. Calculates an average pause based on observed punctuation in matches.
         5. Cleans the text further for the sentence completion model.
-        6. Gets the completion probability from the model (using cache).
-        7. Interpolates the model's probability to another pause value.
+        6. Gets the completion probability from the model (reusing the previous
+           result if the model input is unchanged, otherwise using the cache).
+        7. Blends in the acoustic prosody score (if available) and interpolates
+           the resulting probability to another pause value.
         8. Combines the punctuation-based pause and model-based pause using weighting.
-        9. Applies a speed factor and adjustments (e.g., for ellipses).
+        9. Applies a speed factor, adjustments (e.g., for ellipses) and the
+           speaker's learned pause scale.
         10. Ensures the final pause meets minimum pipeline latency requirements.
         11. Calls `suggest_time` with the final calculated pause duration.
+        Records how stale each processed text is (`suggestion_staleness`).
         Handles queue timeouts gracefully to allow for potential shutdown.
         """
         while True:
             try:
                 # Wait for text from the queue, with a timeout to avoid blocking forever
-                text = self.text_queue.get(block=True, timeout=0.1)
+                items = [self.text_queue.get(block=True, timeout=0.1)]
             except queue.Empty:
                 # No text received within the timeout, loop again
                 time.sleep(0.01) # Small sleep to yield CPU when idle
                 continue
 
+            # Drain the backlog, only the newest text is worth a classifier call
+            while True:
+                try:
+                    items.append(self.text_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Older texts still feed the punctuation history
+            for queued_at, stale_text in items[:-1]:
+                self._record_text(preprocess_text(stale_text), queued_at)
+            if len(items) > 1:
+                self.worker_stats["collapsed"] += len(items) - 1
+                logger.debug(f"🎤⏩ Collapsed {len(items) - 1} queued texts to the newest")
+
+            queued_at, text = items[-1]
+
             # --- Processing starts when text is received ---
             logger.debug(f"🎤⚙️ Starting pause calculation for: \"{text}\"")
             
             processed_text = preprocess_text(text) # Apply initial cleaning
 
             # Update history deques
-            current_time = time.time()
-            self.text_time_deque.append((current_time, processed_text))
-            text_without_punctuation = strip_ending_punctuation(processed_text)
-            self.texts_without_punctuation.append((processed_text, text_without_punctuation))
+            self._record_text(processed_text, queued_at)
 
             # Analyze recent matching texts for consistent punctuation pauses
             matches = find_matching_texts(self.texts_without_punctuation)
@@ -584,16 +711,25 @@ class TurnDetection:
             whisper_suggested_pause = avg_pause # Use the averaged pause
 
             # Prepare text for the sentence completion model (remove all punctuation)
-            import string
-            transtext = processed_text.translate(str.maketrans('', '', string.punctuation))
-            # Further clean potentially remaining non-alphanumeric chars at the end
-            cleaned_for_model = re.sub(r'[^a-zA-Z\s]+$', '', transtext).rstrip() # Also remove trailing spaces
+            cleaned_for_model = clean_for_model(processed_text)
 
-            # Get sentence completion probability
-            prob_complete = self.get_completion_probability(cleaned_for_model)
+            # Get sentence completion probability (partials often only change punctuation)
+            if cleaned_for_model == self._last_model_input:
+                prob_complete = self._last_prob_complete
+                self.worker_stats["inference_skipped"] += 1
+            else:
+                prob_complete = self.get_completion_probability(cleaned_for_model)
+                self._last_model_input = cleaned_for_model
+                self._last_prob_complete = prob_complete
+
+            # Blend in acoustic turn-end cues (pitch, energy, lengthening) when available
+            prosody_score = self.prosody_source() if self.prosody_source else None
+            prob_turn_end = prob_complete
+            if prosody_score is not None:
+                prob_turn_end = (1 - PROSODY_WEIGHT) * prob_complete + PROSODY_WEIGHT * prosody_score
 
             # Interpolate probability to a pause duration
-            sentence_finished_model_pause = interpolate_detection(prob_complete)
+            sentence_finished_model_pause = interpolate_detection(prob_turn_end)
 
             # Combine pauses: weighted average giving more importance to punctuation pause
             weight_towards_whisper = 0.65
@@ -607,7 +743,11 @@ class TurnDetection:
             if contains_ellipses:
                 final_pause += 0.2
 
-            logger.debug(f"🎤📊 Calculated pauses: Punct={whisper_suggested_pause:.2f}, Model={sentence_finished_model_pause:.2f}, Weighted={weighted_pause:.2f}, Final={final_pause:.2f} for \"{processed_text}\" (Prob={prob_complete:.2f})")
+            # Adapt to the speaker's observed pause behaviour
+            if self.pause_model is not None:
+                final_pause = self.pause_model.adjust(final_pause)
+
+            logger.debug(f"🎤📊 Calculated pauses: Punct={whisper_suggested_pause:.2f}, Model={sentence_finished_model_pause:.2f}, Weighted={weighted_pause:.2f}, Final={final_pause:.2f} for \"{processed_text}\" (Prob={prob_complete:.2f}, Turn end={prob_turn_end:.2f})")
 
 
             # Ensure final pause is not less than the pipeline latency overhead
@@ -619,8 +759,42 @@ class TurnDetection:
             # Suggest the calculated time via callback
             self.suggest_time(final_pause, processed_text) # Use processed_text for context
 
-            # Mark task as done for the queue (important if using queue.join())
-            self.text_queue.task_done()
+            staleness = time.time() - queued_at
+            self.suggestion_staleness.append(staleness)
+            self.worker_stats["processed"] += 1
+            logger.debug(f"🎤⏱️ Pause suggestion staleness: {staleness * 1000:.1f}ms")
+
+            # Mark tasks as done for the queue (important if using queue.join())
+            for _ in items:
+                self.text_queue.task_done()
+
+    def _record_text(self, processed_text: str, timestamp: float) -> None:
+        """
+        Appends a preprocessed text to the history deques.
+
+        Args:
+            processed_text: The text after `preprocess_text`.
+            timestamp: When the text was queued.
+        """
+        self.text_time_deque.append((timestamp, processed_text))
+        text_without_punctuation = strip_ending_punctuation(processed_text)
+        self.texts_without_punctuation.append((processed_text, text_without_punctuation))
+
+    def get_stats(self) -> dict:
+        """
+        Returns text worker statistics.
+
+        Returns:
+            Dictionary with processed/collapsed/inference_skipped counters and the
+            mean and max staleness (seconds between queuing a text and suggesting
+            its pause) over the recent suggestions.
+        """
+        staleness = list(self.suggestion_staleness)
+        return {
+            **self.worker_stats,
+            "mean_staleness_s": sum(staleness) / len(staleness) if staleness else 0.0,
+            "max_staleness_s": max(staleness, default=0.0),
+        }
 
     def calculate_waiting_time(
             self,
@@ -635,15 +809,15 @@ class TurnDetection:
             text: The text segment (e.g., from STT) to be processed.
         """
         logger.debug(f"🎤📥 Queuing text for pause calculation: \"{text}\"")
-        self.text_queue.put(text)
+        self.text_queue.put((time.time(), text))
 
     def reset(self) -> None:
         """
         Resets the internal state of the TurnDetection instance.
 
-        Clears the text history deques, the model prediction cache, and resets the
-        current waiting time tracker. Useful for starting a new conversation or
-        interaction context.
+        Clears the text history deques and resets the current waiting time
+        tracker. Useful for starting a new conversation or interaction context.
+        The completion probability cache is process-wide and is kept.
         """
         logger.debug(f"🎤🔄 Resetting TurnDetection state.")
         # Clear the history deques
@@ -651,9 +825,7 @@ class TurnDetection:
         self.texts_without_punctuation.clear()
         # Reset the last suggested time
         self.current_waiting_time = -1
-        # Clear the prediction cache
-        if hasattr(self, "_completion_probability_cache"):
-            self._completion_probability_cache.clear()
+        self._last_model_input = None
         # Clear the processing queue (optional, might discard unprocessed items)
         # while not self.text_queue.empty():
         #     try:
@@ -0,0 +1,208 @@
+# turndetect_onnx.py
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    logger.debug("🎤ℹ️ onnxruntime not available - ONNX turn detection backend disabled")
+
+# Where exported/quantized models are cached between runs
+ONNX_CACHE_DIR = os.getenv("TURN_DETECTION_ONNX_DIR", os.path.expanduser("~/.cache/hominio/turndetect_onnx"))
+# Intra-op threads per inference session; a single short sequence does not scale past a few cores
+ONNX_INTRA_OP_THREADS = int(os.getenv("TURN_DETECTION_ORT_THREADS", min(4, os.cpu_count() or 1)))
+
+
+def quantized_model_path(out_dir: str = ONNX_CACHE_DIR) -> str:
+    """Returns the cache path of the int8 quantized ONNX classifier."""
+    return os.path.join(out_dir, "sentence_finished_int8.onnx")
+
+
+def export_quantized_model(model: Any, tokenizer: Any, out_dir: str = ONNX_CACHE_DIR, max_length: int = 128) -> str:
+    """
+    Exports the sentence completion classifier to ONNX and applies int8 dynamic quantization.
+
+    Exported files are cached in `out_dir`; an existing quantized model is reused.
+
+    Args:
+        model: The PyTorch `DistilBertForSequenceClassification` model.
+        tokenizer: The matching tokenizer (used to build the export example).
+        out_dir: Directory for the fp32 and int8 ONNX files.
+        max_length: Maximum sequence length supported by the exported graph.
+
+    Returns:
+        Path of the int8 quantized ONNX model.
+    """
+    quantized_path = quantized_model_path(out_dir)
+    if os.path.exists(quantized_path):
+        return quantized_path
+
+    import copy
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, "sentence_finished_fp32.onnx")
+
+    logger.info("🎤📦 Exporting turn detection classifier to ONNX...")
+    example = tokenizer("This is an export sentence.", return_tensors="pt", truncation=True, max_length=max_length)
+    # Export from a CPU copy, the shared model may live on the GPU
+    cpu_model = copy.deepcopy(model).to("cpu").eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            cpu_model,
+            (example["input_ids"], example["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=14,
+        )
+
+    logger.info("🎤📦 Quantizing ONNX classifier to int8...")
+    quantize_dynamic(fp32_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class OnnxCompletionClassifier:
+    """
+    Sentence completion classifier running an int8 quantized ONNX graph on
+    ONNX Runtime's CPU provider.
+
+    Inputs are tokenized without padding (the graph has a dynamic sequence
+    axis), which avoids running attention over up to 128 pad tokens for short
+    partial transcripts.
+    """
+
+    def __init__(self, model_path: str, tokenizer: Any, max_length: int = 128, intra_op_threads: int = ONNX_INTRA_OP_THREADS) -> None:
+        """
+        Creates the ONNX Runtime session.
+
+        Args:
+            model_path: Path of the (quantized) ONNX model.
+            tokenizer: The DistilBERT tokenizer matching the model.
+            max_length: Maximum tokenized length (longer inputs are truncated).
+            intra_op_threads: Threads used inside a single inference call.
+        """
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        logger.info(f"🎤✅ ONNX turn detection backend ready ({model_path}, {intra_op_threads} intra-op threads)")
+
+    def predict(self, sentence: str) -> float:
+        """
+        Returns the probability that `sentence` is complete.
+
+        Args:
+            sentence: The model-ready (punctuation-free) text.
+
+        Returns:
+            Probability between 0.0 and 1.0 of the 'complete' label.
+        """
+        inputs = self.tokenizer(sentence, return_tensors="np", truncation=True, max_length=self.max_length)
+        logits = self.session.run(
+            ["logits"],
+            {
+                "input_ids": inputs["input_ids"].astype(np.int64),
+                "attention_mask": inputs["attention_mask"].astype(np.int64),
+            },
+        )[0][0]
+        # Numerically stable softmax over [incomplete, complete]
+        exp = np.exp(logits - np.max(logits))
+        return float(exp[1] / exp.sum())
+
+
+def check_parity(onnx_classifier: OnnxCompletionClassifier, torch_predict: Any, sentences: Optional[List[str]] = None,
+                 tolerance: float = 0.05) -> Dict[str, Any]:
+    """
+    Compares ONNX probabilities against the PyTorch model.
+
+    Intended to be run once per deployment after switching backends, since
+    quantization shifts probabilities slightly: `python turndetect_onnx.py --parity`.
+
+    Args:
+        onnx_classifier: The ONNX backend under test.
+        torch_predict: Callable returning the PyTorch completion probability for a sentence.
+        sentences: Sentences to compare (defaults to a small mixed set).
+        tolerance: Maximum allowed absolute probability difference.
+
+    Returns:
+        Dictionary with 'max_abs_diff', 'mean_abs_diff', 'passed' and per-sentence 'results'.
+    """
+    sentences = sentences or [
+        "yes", "okay", "thank you", "I was thinking about", "what time is it",
+        "can you tell me", "that sounds great", "and then we went to the", "no", "let me think",
+    ]
+    results = []
+    for sentence in sentences:
+        onnx_prob = onnx_classifier.predict(sentence)
+        torch_prob = torch_predict(sentence)
+        results.append({"sentence": sentence, "onnx": onnx_prob, "torch": torch_prob, "diff": abs(onnx_prob - torch_prob)})
+
+    diffs = [r["diff"] for r in results]
+    report = {
+        "max_abs_diff": max(diffs),
+        "mean_abs_diff": sum(diffs) / len(diffs),
+        "passed": max(diffs) <= tolerance,
+        "results": results,
+    }
+    log = logger.info if report["passed"] else logger.warning
+    log(f"🎤⚖️ ONNX parity: max diff {report['max_abs_diff']:.4f}, mean diff {report['mean_abs_diff']:.4f} (tolerance {tolerance})")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Export the int8 ONNX turn detection classifier and check it against PyTorch.")
+    parser.add_argument("--parity", action="store_true", help="compare ONNX and PyTorch probabilities, exit 1 beyond the tolerance")
+    parser.add_argument("--model", default="KoljaB/SentenceFinishedClassification", help="PyTorch model directory or hub ID")
+    parser.add_argument("--onnx-dir", default=ONNX_CACHE_DIR, help="directory of the exported ONNX models")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="maximum absolute probability difference")
+    args = parser.parse_args()
+
+    from logsetup import setup_logging
+    setup_logging(logging.INFO)
+    if not ONNXRUNTIME_AVAILABLE:
+        sys.exit("onnxruntime is not installed")
+
+    import torch
+    import transformers
+
+    # Both backends are loaded explicitly; the server only loads PyTorch when no ONNX model is cached
+    tokenizer = transformers.DistilBertTokenizerFast.from_pretrained(args.model)
+    torch_model = transformers.DistilBertForSequenceClassification.from_pretrained(args.model).eval()
+    classifier = OnnxCompletionClassifier(export_quantized_model(torch_model, tokenizer, args.onnx_dir), tokenizer)
+
+    def torch_predict(sentence: str) -> float:
+        # Same inputs as TurnDetection._predict_torch
+        inputs = tokenizer(sentence, return_tensors="pt", truncation=True, padding="max_length", max_length=128)
+        with torch.no_grad():
+            logits = torch_model(**inputs).logits
+        return torch.softmax(logits, dim=1)[0, 1].item()
+
+    if args.parity:
+        report = check_parity(classifier, torch_predict, tolerance=args.tolerance)
+        for result in report["results"]:
+            print(f"{result['diff']:.4f}  onnx={result['onnx']:.4f}  torch={result['torch']:.4f}  {result['sentence']}")
+        print(f"max diff {report['max_abs_diff']:.4f}, mean diff {report['mean_abs_diff']:.4f}: "
+              f"{'PASSED' if report['passed'] else 'FAILED'} (tolerance {args.tolerance})")
+        sys.exit(0 if report["passed"] else 1)